@@ -0,0 +1,334 @@
+# stringart_app/api.py
+#
+# Versioned JSON API for automation clients, next to the HTML form in
+# views.home. Jobs go through the same runner and scheduler as the page
+# (views.submit_job) but without preview PNGs, and are polled rather than
+# streamed:
+#
+#   POST   /api/v1/jobs               submit a job
+#   POST   /api/v1/jobs/bulk          submit one job per image, or several specs
+#   GET    /api/v1/jobs/<id>          state and per-result progress
+#   GET    /api/v1/jobs/<id>/results  vectors as JSON, or ?format=binary for
+#                                     one result in the compact vector format
+#   DELETE /api/v1/jobs/<id>          cancel a running job, or forget a
+#                                     finished one
+#
+# Finished jobs are otherwise forgotten STRINGART_API_JOB_TTL_SECONDS after
+# they end, since no result stream ends to discard them as the page's do.
+#
+# A job spec is a JSON object: "images" (a list of {"name", "data"} with
+# base64-encoded image files), "algorithms", "n_anchors", "n_strings",
+# "levels", "string_counts", "tier", "continuous", "min_skip", "no_repeat",
+# "hough_candidates", "scoring", "stopping" (false, or overrides of the
+# convergence tests as in control.StoppingCriteria), "extend" (an earlier
+# job id), "refine" and "debug". "target_seconds" (and optionally "cpus", the
+# share of a CPU to count on) has autotune.tune choose n_anchors, n_strings
+# and algorithm knobs to finish in about that long, with the given
+# n_anchors / n_strings as upper bounds; the choice is in the job status
+# under "autotune". Multipart requests may instead upload the images as files named
+# "images", with the rest of the spec as JSON in a "spec" field; that
+# skips base64 and Django's DATA_UPLOAD_MAX_MEMORY_SIZE cap on JSON bodies.
+#
+
+import base64
+import binascii
+import json
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_http_methods, require_POST
+
+from . import vector_format
+from .control import StoppingCriteria
+from .planner import ALGORITHMS
+from .scheduler import REJECTED
+from .views import (
+    JOB_FINISHED, JOB_META, JOB_RESULTS, JOB_STATE, QUEUED, RUNNING, TARGET_SIZE,
+    JobOptions, _result_vectors, cancel_job, discard_job, submit_job,
+)
+
+API_PREFIX = "/api/v1/jobs"
+
+# Jobs submitted through the API, for evict_expired_jobs
+API_JOBS: Dict[str, None] = {}
+_api_jobs_lock = threading.Lock()
+
+
+class SpecError(ValueError):
+    """A job spec that can't be run; reported as 400 Bad Request."""
+
+
+def _int(spec: Dict[str, Any], key: str, default: int, low: int = 1) -> int:
+    value = spec.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, int) or value < low:
+        raise SpecError(f"'{key}' must be an integer >= {low}")
+    return value
+
+
+def _positive(spec: Dict[str, Any], key: str) -> Optional[float]:
+    value = spec.get(key)
+    if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0):
+        raise SpecError(f"'{key}' must be a positive number")
+    return value
+
+
+def _job_options(spec: Dict[str, Any]) -> JobOptions:
+    """JobOptions from an API job spec; raises SpecError on invalid fields."""
+    algos = spec.get("algorithms") or list(ALGORITHMS.keys())
+    if isinstance(algos, str):
+        algos = [algos]
+    unknown = [a for a in algos if a not in ALGORITHMS]
+    if unknown:
+        raise SpecError(f"Unknown algorithm(s) {unknown}; choose from {list(ALGORITHMS.keys())}")
+
+    tiers = settings.STRINGART_TIME_BUDGET_TIERS
+    tier = spec.get("tier", "unlimited")
+    if tier not in tiers:
+        raise SpecError(f"Unknown tier '{tier}'; choose from {list(tiers)}")
+
+    counts = spec.get("string_counts") or []
+    if not isinstance(counts, list) or not all(isinstance(n, int) and n > 0 for n in counts):
+        raise SpecError("'string_counts' must be a list of positive integers")
+
+    stopping = spec.get("stopping")
+    if stopping not in (None, False) and not isinstance(stopping, dict):
+        raise SpecError("'stopping' must be false or an object of stopping criteria")
+    if isinstance(stopping, dict):
+        unknown = set(stopping) - set(StoppingCriteria.FIELDS)
+        if unknown:
+            raise SpecError(f"Unknown stopping criteria {sorted(unknown)}")
+        if not all(v is None or (isinstance(v, (int, float)) and not isinstance(v, bool) and v >= 0)
+                   for v in stopping.values()):
+            raise SpecError("Stopping criteria must be non-negative numbers or null")
+
+    extend = spec.get("extend")
+    if extend is not None and not isinstance(extend, str):
+        raise SpecError("'extend' must be a job id")
+
+    return JobOptions(
+        algorithms=list(algos),
+        n_anchors=_int(spec, "n_anchors", 180, low=3),
+        n_strings=_int(spec, "n_strings", 200),
+        levels=_int(spec, "levels", 8, low=2),
+        string_counts=counts,
+        time_budget=tiers[tier],
+        winding={
+            "continuous": True,
+            "min_skip": _int(spec, "min_skip", 0, low=0),
+            "no_repeat": bool(spec.get("no_repeat")),
+        } if spec.get("continuous") else {},
+        hough_candidates=bool(spec.get("hough_candidates")),
+        scoring=spec.get("scoring") or None,
+        stopping=stopping,
+        extend_job=extend,
+        refine_time=settings.STRINGART_REFINE_SECONDS if spec.get("refine") else None,
+        debug=bool(spec.get("debug")),
+        previews=False,
+        target_latency=_positive(spec, "target_seconds"),
+        cpus=_positive(spec, "cpus"),
+    )
+
+
+def _json_images(spec: Dict[str, Any]) -> Dict[str, bytes]:
+    images = spec.get("images")
+    if not isinstance(images, list) or not images:
+        raise SpecError("'images' must be a non-empty list of {\"name\", \"data\"} objects")
+    files = {}
+    for i, image in enumerate(images):
+        if not isinstance(image, dict) or not isinstance(image.get("data"), str):
+            raise SpecError(f"images[{i}] needs base64 'data'")
+        try:
+            files[str(image.get("name") or f"image-{i}")] = base64.b64decode(image["data"], validate=True)
+        except binascii.Error:
+            raise SpecError(f"images[{i}].data is not valid base64")
+    return files
+
+
+def _read_request(request):
+    """(spec, uploaded files) from a JSON or multipart request body."""
+    if request.content_type == "application/json":
+        try:
+            spec = json.loads(request.body or b"{}")
+        except (ValueError, UnicodeDecodeError):
+            raise SpecError("Request body is not valid JSON")
+        uploads = {}
+    else:
+        try:
+            spec = json.loads(request.POST.get("spec") or "{}")
+        except ValueError:
+            raise SpecError("'spec' is not valid JSON")
+        uploads = {f.name: f.read() for f in request.FILES.getlist("images")}
+    if not isinstance(spec, dict):
+        raise SpecError("Job spec must be a JSON object")
+    return spec, uploads
+
+
+def evict_expired_jobs(now: Optional[float] = None) -> int:
+    """
+    Discard API jobs that finished more than STRINGART_API_JOB_TTL_SECONDS
+    ago, and stop tracking ones already deleted; returns how many went.
+    """
+    now = time.monotonic() if now is None else now
+    ttl = settings.STRINGART_API_JOB_TTL_SECONDS
+    with _api_jobs_lock:
+        expired = [
+            job_id for job_id in API_JOBS
+            if job_id not in JOB_META or now - JOB_META[job_id].get("finished_at", now) > ttl
+        ]
+        for job_id in expired:
+            del API_JOBS[job_id]
+            discard_job(job_id)
+    return len(expired)
+
+
+def _submit(files: Dict[str, bytes], spec: Dict[str, Any]) -> tuple:
+    """Submit one job; returns (response body, HTTP status)."""
+    evict_expired_jobs()
+    job_id, record, estimate = submit_job(files, _job_options(spec))
+    if record.status == REJECTED:
+        return {"error": f"Job rejected: {record.reason}", "estimate": estimate.as_dict()}, 503
+    with _api_jobs_lock:
+        API_JOBS[job_id] = None
+    return {
+        "job_id": job_id,
+        "status": record.status,
+        "estimate": estimate.as_dict(),
+        "links": {"self": f"{API_PREFIX}/{job_id}", "results": f"{API_PREFIX}/{job_id}/results"},
+    }, 202
+
+
+@csrf_exempt
+@require_POST
+def create_job(request):
+    try:
+        spec, uploads = _read_request(request)
+        files = uploads or _json_images(spec)
+        body, status = _submit(files, spec)
+    except SpecError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    return JsonResponse(body, status=status)
+
+
+@csrf_exempt
+@require_POST
+def create_jobs_bulk(request):
+    """
+    Many jobs in one request, each accepted or rejected on its own. JSON
+    bodies give {"jobs": [spec, ...]}, with optional shared "defaults";
+    multipart uploads become one job per image, all with the same spec.
+    """
+    try:
+        spec, uploads = _read_request(request)
+        if uploads:
+            jobs = [({name: data}, spec) for name, data in uploads.items()]
+        else:
+            specs = spec.get("jobs")
+            if not isinstance(specs, list) or not specs:
+                raise SpecError("'jobs' must be a non-empty list of job specs")
+            if not all(isinstance(s, dict) for s in specs):
+                raise SpecError("Each entry of 'jobs' must be a JSON object")
+            defaults = spec.get("defaults") or {}
+            jobs = [(None, {**defaults, **s}) for s in specs]
+        if len(jobs) > settings.STRINGART_API_MAX_BULK_JOBS:
+            raise SpecError(f"At most {settings.STRINGART_API_MAX_BULK_JOBS} jobs per bulk request")
+    except SpecError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    results = []
+    for files, job_spec in jobs:
+        try:
+            body, status = _submit(files or _json_images(job_spec), job_spec)
+        except SpecError as e:
+            body, status = {"error": str(e)}, 400
+        results.append({**body, "http_status": status})
+    return JsonResponse({"jobs": results})
+
+
+def _job_status(job_id: str) -> Dict[str, Any]:
+    meta = JOB_META[job_id]
+    results = JOB_RESULTS[job_id]
+    finished = JOB_FINISHED.get(job_id, set())
+    return {
+        "job_id": job_id,
+        "state": JOB_STATE.get(job_id),
+        "n_anchors": meta["n_anchors"],
+        "n_strings": meta["n_strings"],
+        "autotune": meta["autotune"],
+        "results": [
+            {
+                "algorithm": algo,
+                "name": name,
+                "strings": len(results.vectors.get((algo, name), ())),
+                "finished": (algo, name) in finished,
+                "progress": results.progress.get((algo, name)),
+            }
+            for algo in meta["algorithms"] for name in meta["images"]
+        ],
+    }
+
+
+@csrf_exempt
+@require_http_methods(["GET", "DELETE"])
+def job_detail(request, job_id):
+    job_id = str(job_id)
+    if job_id not in JOB_META:
+        return JsonResponse({"error": "Unknown job"}, status=404)
+
+    if request.method == "DELETE":
+        if JOB_STATE.get(job_id) in (QUEUED, RUNNING):
+            cancel_job(job_id)
+        else:
+            discard_job(job_id)
+        return HttpResponse(status=204)
+
+    return JsonResponse(_job_status(job_id))
+
+
+@require_GET
+def job_results(request, job_id):
+    """
+    Vectors per (algorithm, image) as JSON, optionally filtered by
+    ?algorithm= and ?name=; unfinished results hold the vectors so far.
+    ?format=binary returns one finished result (both filters required) in
+    the compact vector format.
+    """
+    job_id = str(job_id)
+    if job_id not in JOB_META:
+        return JsonResponse({"error": "Unknown job"}, status=404)
+    meta = JOB_META[job_id]
+    algorithm = request.GET.get("algorithm")
+    name = request.GET.get("name")
+    fmt = request.GET.get("format", "json").lower()
+    finished = JOB_FINISHED.get(job_id, set())
+
+    if fmt == "binary":
+        if not (algorithm and name):
+            return JsonResponse({"error": "format=binary needs ?algorithm= and ?name="}, status=400)
+        if (algorithm, name) not in finished:
+            return JsonResponse({"error": "Result is not finished yet"}, status=409)
+        vectors, n_anchors = _result_vectors(job_id, algorithm, name)
+        return HttpResponse(
+            vector_format.dumps(vectors, n_anchors, TARGET_SIZE, algorithm),
+            content_type="application/octet-stream",
+        )
+    if fmt != "json":
+        return JsonResponse({"error": f"Unknown format '{fmt}'"}, status=400)
+
+    results = []
+    for algo in meta["algorithms"]:
+        for stem in meta["images"]:
+            if algorithm not in (None, algo) or name not in (None, stem):
+                continue
+            vectors, _ = _result_vectors(job_id, algo, stem)
+            results.append({
+                "algorithm": algo,
+                "name": stem,
+                "n_anchors": meta["n_anchors"],
+                "finished": (algo, stem) in finished,
+                "vectors": vectors,
+            })
+    return JsonResponse({"job_id": job_id, "state": JOB_STATE.get(job_id), "results": results})
@@ -0,0 +1,22 @@
+# stringart_app/apps.py
+
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class StringartAppConfig(AppConfig):
+    name = 'stringart_app'
+
+    def ready(self):
+        # Algorithms import lazily on first use; optionally pay that cost at
+        # boot instead (True for all, or a list of registry keys).
+        warmup = getattr(settings, 'STRINGART_WARMUP_ALGORITHMS', False)
+        if warmup:
+            from .image_to_vector_algorithms import ALGORITHMS
+            ALGORITHMS.warm_up(None if warmup is True else warmup)
+
+        # Compile the scoring kernels (or load them from Numba's disk cache)
+        # now rather than inside the first job.
+        if getattr(settings, 'STRINGART_WARMUP_KERNELS', True):
+            from . import kernels
+            kernels.warm_up()
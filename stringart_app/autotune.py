@@ -0,0 +1,382 @@
+# stringart_app/autotune.py
+#
+# Settings chosen to meet a latency target. Run time grows with
+# anchors² × pixels × strings, so rather than have users guess n_anchors and
+# n_strings, a job can give a target latency and the share of a CPU it can
+# count on, and tune() picks n_anchors, n_strings, greedy's sample_pairs and
+# each algorithm's TUNABLES (memetic's population and generations,
+# annealing's iterations) that the cost model says fit.
+#
+# The model has costs.py's form (seconds per chord pair, per string and per
+# string × pair, at 200×200) plus a term for the work each algorithm's
+# knobs drive. Its coefficients are costs.py's, times per-term factors
+# fitted to timing samples by least squares on log(predicted / measured),
+# shrunk towards 1, so a handful of samples can't throw them far. The
+# samples come from a benchmark report (calibrate_from_report, e.g. the
+# output of `stringart_benchmark --profile full`) and from every run the web
+# tier finishes (CostModel.record), and the fit is redone as they arrive.
+#
+
+import json
+import math
+import threading
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from itertools import product
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .costs import ALGORITHM_COSTS, DEFAULT_COST, HEADROOM, TABLE_SECONDS_PER_PAIR, n_pairs
+from .image_to_vector_algorithms import ALGORITHMS
+
+# Canvas side the coefficients apply to; chord lengths scale with it
+REFERENCE_SIZE = 200
+# planner.generate_string_vectors' default
+DEFAULT_SAMPLE_PAIRS = 1000
+# How many samples' worth of weight the costs.py coefficients carry
+PRIOR_WEIGHT = 1.0
+# Most recent timing samples kept per algorithm
+MAX_SAMPLES = 500
+
+# Settings tune() chooses from, ascending
+ANCHOR_CHOICES = tuple(range(60, 361, 20))
+STRING_CHOICES = tuple(sorted({int(round(50 * 1.25 ** k, -1)) for k in range(24)}))
+# Values tried per knob, spaced geometrically from its minimum to its default
+KNOB_STEPS = 6
+# Most strings per anchor tune() chooses; beyond this, extra strings mostly
+# retrace chords (and algorithms that pick distinct chords run out of them)
+STRINGS_PER_ANCHOR = 10
+
+
+@dataclass(frozen=True)
+class KnobCost:
+    """
+    An algorithm's effort knobs: the least value tune() may give each (the
+    most is its default), the units of work a run's settings amount to, and
+    the seconds per unit before fitting. The knob term replaces costs.py's
+    per-string term, which at the defaults it equals.
+    """
+    minimums: Dict[str, int]
+    work: Callable[[Dict[str, float]], float]
+    seconds_per_unit: float
+    # knobs that bound a loop, and the progress counter of its actual count
+    counters: Dict[str, str] = field(default_factory=dict)
+
+
+KNOB_COSTS: Dict[str, KnobCost] = {
+    # each string scores sample_pairs sampled chords
+    "greedy": KnobCost({"sample_pairs": 100}, lambda r: r["n_strings"] * r["sample_pairs"] * r["scale"], 1.2e-5),
+    # each generation renders every genome's strings
+    "memetic": KnobCost(
+        {"pop_size": 6, "generations": 10},
+        lambda r: r["pop_size"] * r["generations"] * r["n_strings"] * r["scale"],
+        5e-6,
+        counters={"generations": "generations"},
+    ),
+    # each iteration copies the current solution
+    "simualted-annealing": KnobCost(
+        {"iterations": 500}, lambda r: r["iterations"] * r["n_strings"], 2e-8,
+        counters={"iterations": "iterations"},
+    ),
+}
+
+# Seconds per pair², for algorithms whose solve grows faster than the
+# pair count (the CBC model of graph-optimisation)
+SECONDS_PER_PAIR_SQUARED: Dict[str, float] = {"graph-optimisation": 3e-8}
+
+TERMS = ("setup", "strings", "strings_pairs", "knobs", "setup_squared")
+
+
+def knob_defaults(algorithm: str) -> Dict[str, int]:
+    """An algorithm's knobs at their default values."""
+    knobs = KNOB_COSTS.get(algorithm)
+    if knobs is None:
+        return {}
+    defaults = {"sample_pairs": DEFAULT_SAMPLE_PAIRS, **ALGORITHMS.attribute(algorithm, "TUNABLES")}
+    return {name: defaults[name] for name in knobs.minimums}
+
+
+def _features(algorithm: str, run: Dict[str, float]) -> np.ndarray:
+    """One run's amount of each of TERMS."""
+    scale = run.get("size", REFERENCE_SIZE) / REFERENCE_SIZE
+    pairs = n_pairs(int(run["n_anchors"]))
+    knobs = KNOB_COSTS.get(algorithm)
+    return np.array([
+        pairs * scale,
+        run["n_strings"],
+        run["n_strings"] * pairs * scale,
+        knobs.work({**knob_defaults(algorithm), **run, "scale": scale}) if knobs else 0.0,
+        (pairs * scale) ** 2,
+    ])
+
+
+def _prior(algorithm: str) -> np.ndarray:
+    """costs.py's coefficients for each of TERMS."""
+    cost = ALGORITHM_COSTS.get(algorithm, DEFAULT_COST)
+    knobs = KNOB_COSTS.get(algorithm)
+    return np.array([
+        cost.seconds_per_pair,
+        0.0 if knobs else cost.seconds_per_string,
+        cost.seconds_per_pair_string,
+        knobs.seconds_per_unit if knobs else 0.0,
+        SECONDS_PER_PAIR_SQUARED.get(algorithm, 0.0),
+    ])
+
+
+class CostModel:
+    """
+    Seconds per algorithm run, refitted from timing samples. Thread-safe:
+    runs record into it while jobs are being tuned.
+    """
+
+    def __init__(self, prior_weight: float = PRIOR_WEIGHT, max_samples: int = MAX_SAMPLES):
+        self.prior_weight = prior_weight
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[Tuple[np.ndarray, float]]] = defaultdict(lambda: deque(maxlen=max_samples))
+        self._factors: Dict[str, np.ndarray] = {}
+        self._report: Optional[Path] = None
+        self._report_lock = threading.Lock()
+
+    def record(self, algorithm: str, run: Dict[str, float], seconds: float) -> None:
+        """
+        Add a timing sample: `run` holds n_anchors, n_strings, size and any
+        knob values the run had; `seconds` is how long it took.
+        """
+        if seconds <= 0:
+            return
+        with self._lock:
+            self._samples[algorithm].append((_features(algorithm, run), seconds))
+            self._factors.pop(algorithm, None)
+
+    def record_progress(self, algorithm: str, run: Dict[str, float], progress: Dict[str, Any]) -> None:
+        """
+        Add a sample from a run's final progress event, counting the strings
+        and loop iterations it actually did rather than those it was allowed.
+        """
+        run = dict(run)
+        counters = progress.get("counters", {})
+        if ALGORITHMS.attribute(algorithm, "PREFIX_RESULTS"):
+            run["n_strings"] = progress["strings"]
+        knobs = KNOB_COSTS.get(algorithm)
+        for knob, counter in (knobs.counters.items() if knobs else ()):
+            if counter in counters:
+                run[knob] = counters[counter]
+        self.record(algorithm, run, progress["elapsed"])
+
+    def calibrate_on_first_use(self, report: Path) -> None:
+        """
+        Have the next load_calibration() (tune() calls it) add the
+        benchmark report at `report` as samples, so startup reads nothing.
+        """
+        self._report = Path(report)
+
+    def load_calibration(self) -> None:
+        """Add the report given to calibrate_on_first_use(), once."""
+        with self._report_lock:
+            report, self._report = self._report, None
+            if report is not None and report.exists():
+                calibrate_from_report(json.loads(report.read_text()), self)
+
+    def samples(self, algorithm: str) -> int:
+        with self._lock:
+            return len(self._samples.get(algorithm, ()))
+
+    def factors(self, algorithm: str) -> np.ndarray:
+        """Fitted multiplier on each prior coefficient; all 1 without samples."""
+        with self._lock:
+            factors = self._factors.get(algorithm)
+            if factors is None:
+                factors = self._factors[algorithm] = self._fit(algorithm)
+            return factors
+
+    def _fit(self, algorithm: str) -> np.ndarray:
+        from scipy.optimize import least_squares
+
+        prior = _prior(algorithm)
+        active = prior > 0
+        factors = np.ones(len(TERMS))
+        # each sample's seconds per term at the prior coefficients
+        terms = np.array([(feats * prior)[active] for feats, _ in self._samples.get(algorithm, ())])
+        if not len(terms):
+            return factors
+        seconds = np.array([s for _, s in self._samples[algorithm]])
+        usable = terms.sum(axis=1) > 0
+        terms, seconds = terms[usable], seconds[usable]
+        # fit log factors: one residual per sample, and PRIOR_WEIGHT samples'
+        # worth spread over the factors pulling them towards 0
+        weight = math.sqrt(self.prior_weight / int(active.sum()))
+
+        def residuals(log_factors: np.ndarray) -> np.ndarray:
+            return np.concatenate([np.log(terms @ np.exp(log_factors) / seconds), weight * log_factors])
+
+        fit = least_squares(residuals, np.zeros(int(active.sum())), bounds=(-12, 12))
+        factors[active] = np.exp(fit.x)
+        return factors
+
+    def coefficients(self, algorithm: str) -> Dict[str, float]:
+        return dict(zip(TERMS, (_prior(algorithm) * self.factors(algorithm)).tolist()))
+
+    def predict(self, algorithm: str, run: Dict[str, float]) -> float:
+        """Seconds one run of `algorithm` with these settings should take."""
+        return float(_features(algorithm, run) @ (_prior(algorithm) * self.factors(algorithm)))
+
+    @staticmethod
+    def table_seconds(n_anchors: int, size: int = REFERENCE_SIZE) -> float:
+        """Building the job's chord table, shared by its runs."""
+        return TABLE_SECONDS_PER_PAIR * n_pairs(n_anchors) * size / REFERENCE_SIZE
+
+
+MODEL = CostModel()
+
+
+def calibrate_from_report(report: Dict[str, Any], model: CostModel = MODEL) -> int:
+    """
+    Add the cases of a benchmark report (see benchmarks/runner.py) to
+    `model` as timing samples; returns how many were usable.
+    """
+    used = 0
+    for r in report.get("results", ()):
+        if r.get("error") or r["algorithm"] not in ALGORITHMS:
+            continue
+        progress = {
+            "strings": r["n_vectors"],
+            "elapsed": r["wall_seconds"],
+            "counters": r.get("algorithm_counters", {}),
+        }
+        model.record_progress(r["algorithm"], {
+            "n_anchors": r["n_anchors"], "n_strings": r["n_strings"], "size": r["size"],
+        }, progress)
+        used += 1
+    return used
+
+
+@dataclass
+class TunedSettings:
+    """What tune() chose, and the model's prediction for it."""
+    target_seconds: float
+    cpus: float
+    n_anchors: int
+    n_strings: int
+    # greedy's candidate sample per string
+    sample_pairs: int
+    # per algorithm, TUNABLES keyword arguments for generate()
+    options: Dict[str, Dict[str, int]]
+    # per algorithm, predicted seconds of one run (one image)
+    run_seconds: Dict[str, float]
+    # predicted seconds of the whole job, with costs.HEADROOM
+    predicted_seconds: float
+    # False if even the smallest settings are predicted to miss the target
+    fits: bool
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "target_seconds": self.target_seconds,
+            "cpus": self.cpus,
+            "n_anchors": self.n_anchors,
+            "n_strings": self.n_strings,
+            "sample_pairs": self.sample_pairs,
+            "options": self.options,
+            "run_seconds": {a: round(s, 3) for a, s in self.run_seconds.items()},
+            "predicted_seconds": round(self.predicted_seconds, 2),
+            "fits": self.fits,
+        }
+
+
+def _knob_choices(algorithm: str) -> List[Dict[str, int]]:
+    """Every combination of each knob's KNOB_STEPS values."""
+    knobs = KNOB_COSTS.get(algorithm)
+    if knobs is None:
+        return [{}]
+    defaults = knob_defaults(algorithm)
+    values = {
+        name: sorted({int(round(v)) for v in np.geomspace(low, defaults[name], KNOB_STEPS)})
+        for name, low in knobs.minimums.items()
+    }
+    return [dict(zip(values, combo)) for combo in product(*values.values())]
+
+
+def tune(
+    algorithms: Sequence[str],
+    target_seconds: float,
+    cpus: float = 1.0,
+    n_images: int = 1,
+    size: int = REFERENCE_SIZE,
+    max_anchors: Optional[int] = None,
+    max_strings: Optional[int] = None,
+    model: Optional[CostModel] = None,
+) -> TunedSettings:
+    """
+    Settings for a job running each of `algorithms` over `n_images` images
+    in about `target_seconds` with `cpus` CPUs. Runs are single-threaded and
+    sequential, so only a share of one CPU (cpus < 1, e.g. 0.5 when two jobs
+    share a core) changes anything.
+
+    n_anchors and n_strings are chosen first, with every knob at its least:
+    the pair with the largest product that fits, capped at `max_anchors`,
+    `max_strings` and STRINGS_PER_ANCHOR. Predictions are for the full
+    string count, so runs that converge earlier finish sooner. What is left
+    of the budget is then split evenly between
+    the algorithms with knobs, each raising its knobs towards their
+    defaults as far as its share allows.
+    """
+    model = model or MODEL
+    model.load_calibration()
+    budget = target_seconds * min(cpus, 1.0) / HEADROOM
+    lowest = {a: {name: low for name, low in KNOB_COSTS[a].minimums.items()} if a in KNOB_COSTS else {}
+              for a in algorithms}
+
+    def job_seconds(n_anchors: int, n_strings: int, knobs: Dict[str, Dict[str, int]]) -> Dict[str, float]:
+        return {
+            a: model.predict(a, {"n_anchors": n_anchors, "n_strings": n_strings, "size": size, **knobs[a]})
+            for a in algorithms
+        }
+
+    anchors = [n for n in ANCHOR_CHOICES if max_anchors is None or n <= max_anchors] or [max_anchors]
+    strings = [n for n in STRING_CHOICES if max_strings is None or n <= max_strings] or [max_strings]
+    best: Optional[Tuple[int, int, float]] = None
+    for n_anchors in anchors:
+        table = model.table_seconds(n_anchors, size)
+        for n_strings in strings:
+            if n_strings > STRINGS_PER_ANCHOR * n_anchors:
+                break
+            spent = table + n_images * sum(job_seconds(n_anchors, n_strings, lowest).values())
+            if spent > budget:
+                break  # more strings only cost more
+            if best is None or n_anchors * n_strings >= best[0] * best[1]:
+                best = (n_anchors, n_strings, spent)
+
+    fits = best is not None
+    if best is None:
+        best = (anchors[0], strings[0], 0.0)
+    n_anchors, n_strings, spent = best
+
+    floor = job_seconds(n_anchors, n_strings, lowest)
+    tuned = [a for a in algorithms if a in KNOB_COSTS]
+    share = max(0.0, budget - spent) / (n_images * len(tuned)) if tuned else 0.0
+    options = dict(lowest)
+    for a in tuned:
+        affordable = [
+            knobs for knobs in _knob_choices(a)
+            if model.predict(a, {"n_anchors": n_anchors, "n_strings": n_strings, "size": size, **knobs})
+            <= floor[a] + share
+        ]
+        if affordable:
+            options[a] = max(affordable, key=lambda knobs: sum(math.log(v) for v in knobs.values()))
+
+    run_seconds = job_seconds(n_anchors, n_strings, options)
+    total = model.table_seconds(n_anchors, size) + n_images * sum(run_seconds.values())
+    sample_pairs = options.get("greedy", {}).get("sample_pairs", DEFAULT_SAMPLE_PAIRS)
+    return TunedSettings(
+        target_seconds=target_seconds,
+        cpus=cpus,
+        n_anchors=n_anchors,
+        n_strings=n_strings,
+        sample_pairs=sample_pairs,
+        options={a: kw for a, kw in ((a, {k: v for k, v in knobs.items() if k != "sample_pairs"})
+                                      for a, knobs in options.items()) if kw},
+        run_seconds=run_seconds,
+        predicted_seconds=total * HEADROOM / min(cpus, 1.0),
+        fits=fits,
+    )
@@ -0,0 +1,167 @@
+# stringart_app/batch.py
+#
+# Offline batch processing: run string-art algorithms over many images on a
+# process pool, writing each result's vectors and a rendered preview to an
+# output directory. Each worker process keeps its own chord-table cache, so
+# after its first image of a given size the per-image cost is only the solve.
+#
+
+import glob
+import logging
+import multiprocessing
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from . import vector_format
+from .planner import ALGORITHMS, generate_string_vectors
+from .preprocessing import load_image_to_pixels
+from .renderer import render_vector_list
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tif", ".tiff", ".webp"}
+
+
+@dataclass(frozen=True)
+class BatchTask:
+    """
+    One (image, algorithm) unit of work and where its outputs go.
+    """
+    source: Path
+    algorithm: str
+    output_dir: Path
+    n_anchors: int = 180
+    n_strings: int = 200
+    levels: int = 8
+    size: int = 200
+    time_budget: Optional[float] = None
+    # continuous-thread winding (ignored by algorithms that don't support it)
+    continuous: bool = False
+    min_skip: int = 0
+    no_repeat: bool = False
+
+    @property
+    def vectors_path(self) -> Path:
+        return self.output_dir / self.algorithm / f"{self.source.stem}.sart"
+
+    @property
+    def preview_path(self) -> Path:
+        return self.output_dir / self.algorithm / f"{self.source.stem}.png"
+
+    def is_done(self) -> bool:
+        return self.vectors_path.exists() and self.preview_path.exists()
+
+
+def find_inputs(patterns: Iterable[str]) -> List[Path]:
+    """
+    Expand glob patterns (``**`` recurses) into a sorted, de-duplicated list
+    of image files.
+    """
+    found = {
+        Path(p).resolve()
+        for pattern in patterns
+        for p in glob.glob(os.path.expanduser(pattern), recursive=True)
+    }
+    return sorted(p for p in found if p.is_file() and p.suffix.lower() in IMAGE_SUFFIXES)
+
+
+def save_vectors(path: Path, vectors: List[Dict[str, int]], n_anchors: int, size: int, algorithm: str) -> None:
+    """
+    Write vectors in the binary vector format via a temporary file, so a
+    half-written result is never mistaken for a finished one.
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(vector_format.dumps(vectors, n_anchors, (size, size), algorithm))
+    os.replace(tmp, path)
+
+
+def load_vectors(path: Path) -> List[Dict[str, int]]:
+    _, pairs = vector_format.loads(path.read_bytes())
+    return vector_format.to_dicts(pairs)
+
+
+def run_task(task: BatchTask) -> Dict[str, Any]:
+    """
+    Process one task in the current process and return its result record.
+    Failures are recorded in the record rather than raised, so one bad image
+    doesn't abort the batch.
+    """
+    logger = logging.getLogger("stringart_app.batch")
+    t0 = time.perf_counter()
+    record: Dict[str, Any] = {
+        "source": str(task.source),
+        "algorithm": task.algorithm,
+        "n_vectors": 0,
+        "seconds": 0.0,
+        "error": None,
+    }
+    try:
+        pixels = load_image_to_pixels(
+            path=task.source,
+            size=(task.size, task.size),
+            levels=task.levels,
+            gamma=0.8,
+            autocontrast=True,
+        )
+        options = {}
+        if task.continuous and ALGORITHMS[task.algorithm].SUPPORTS_CONTINUOUS:
+            options = {"continuous": True, "min_skip": task.min_skip, "no_repeat": task.no_repeat}
+        vectors = generate_string_vectors(
+            pixels,
+            n_anchors=task.n_anchors,
+            n_strings=task.n_strings,
+            algorithm=task.algorithm,
+            logger=logger,
+            time_budget=task.time_budget,
+            **options,
+        )
+
+        task.vectors_path.parent.mkdir(parents=True, exist_ok=True)
+        preview = render_vector_list(vectors, size=(task.size, task.size), n_anchors=task.n_anchors, logger=logger)
+        tmp = task.preview_path.with_name(task.preview_path.name + ".tmp")
+        preview.save(tmp, format="PNG")
+        os.replace(tmp, task.preview_path)
+        # vectors last: their presence marks the task as done
+        save_vectors(task.vectors_path, vectors, task.n_anchors, task.size, task.algorithm)
+        record["n_vectors"] = len(vectors)
+    except Exception as exc:
+        record["error"] = f"{type(exc).__name__}: {exc}"
+    record["seconds"] = time.perf_counter() - t0
+    return record
+
+
+def run_batch(
+    tasks: List[BatchTask],
+    workers: Optional[int] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Run every task across `workers` processes (default: one per CPU) and
+    return their records in completion order. Interrupting the batch
+    terminates the workers immediately rather than letting running solves
+    finish.
+    """
+    workers = workers or os.cpu_count() or 1
+    results: List[Dict[str, Any]] = []
+
+    def collect(records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            results.append(record)
+            if on_result:
+                on_result(record)
+
+    if workers == 1:
+        collect(run_task(task) for task in tasks)
+        return results
+
+    pool = multiprocessing.Pool(processes=min(workers, max(1, len(tasks))))
+    try:
+        collect(pool.imap_unordered(run_task, tasks))
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return results
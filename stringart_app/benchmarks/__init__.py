@@ -0,0 +1,19 @@
+# stringart_app/benchmarks/__init__.py
+#
+# Benchmark harness for the registered string-art algorithms.
+# Run with `python manage.py stringart_benchmark` or `pytest -m benchmark`
+# (see tests/test_benchmarks.py).
+
+from .corpus import BenchmarkCase, PROFILES, build_cases, load_corpus_image
+from .kernels import run_kernel_benchmarks
+from .loadtest import LoadProfile, local_server, run_load_test
+from .scoring import run_scoring_benchmarks
+from .runner import (
+    BASELINE_PATH,
+    Thresholds,
+    compare_to_baseline,
+    load_report,
+    run_case,
+    run_suite,
+    write_report,
+)
@@ -0,0 +1,117 @@
+# stringart_app/benchmarks/corpus.py
+
+import itertools
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+import numpy as np
+from PIL import Image
+
+from ..preprocessing import DEFAULT_LEVELS
+
+# Seed used for every synthetic image and every algorithm run, so two
+# benchmark runs on the same machine see identical inputs.
+DEFAULT_SEED = 1234
+
+
+def _gradient(size: int, rng: np.random.Generator) -> np.ndarray:
+    """Left-to-right ramp from black to white."""
+    return np.tile(np.linspace(0, 255, size), (size, 1))
+
+
+def _disc(size: int, rng: np.random.Generator) -> np.ndarray:
+    """Dark filled disc on white, the classic string-art portrait stand-in."""
+    y, x = np.mgrid[:size, :size]
+    r = np.hypot(x - size / 2, y - size / 2)
+    return np.where(r < size * 0.3, 0.0, 255.0)
+
+
+def _stripes(size: int, rng: np.random.Generator) -> np.ndarray:
+    """Diagonal stripes; lots of straight edges for the Hough-based methods."""
+    y, x = np.mgrid[:size, :size]
+    return np.where(((x + y) // max(1, size // 8)) % 2 == 0, 32.0, 224.0)
+
+
+def _noise(size: int, rng: np.random.Generator) -> np.ndarray:
+    """Smoothed seeded noise, a worst case for edge detection."""
+    small = rng.uniform(0, 255, (max(2, size // 8),) * 2).astype(np.uint8)
+    return np.array(Image.fromarray(small).resize((size, size), Image.Resampling.BILINEAR), dtype=np.float64)
+
+
+def _camera(size: int, rng: np.random.Generator) -> np.ndarray:
+    """scikit-image's bundled 'camera' photograph."""
+    from skimage import data
+    return np.array(Image.fromarray(data.camera()).resize((size, size), Image.Resampling.LANCZOS), dtype=np.float64)
+
+
+IMAGES: Dict[str, Callable[[int, np.random.Generator], np.ndarray]] = {
+    "gradient": _gradient,
+    "disc": _disc,
+    "stripes": _stripes,
+    "noise": _noise,
+    "camera": _camera,
+}
+
+
+@dataclass(frozen=True)
+class BenchmarkCase:
+    algorithm: str
+    image: str
+    size: int
+    n_anchors: int
+    n_strings: int
+    seed: int = DEFAULT_SEED
+
+    @property
+    def key(self) -> str:
+        """Stable identifier used to match a result against the baseline."""
+        return f"{self.algorithm}|{self.image}|{self.size}|{self.n_anchors}|{self.n_strings}"
+
+
+# Each profile is the cross product of its images × sizes × anchors × strings.
+PROFILES: Dict[str, Dict[str, list]] = {
+    "quick": {
+        "images": ["gradient", "disc", "stripes"],
+        "sizes": [48],
+        "n_anchors": [16, 32],
+        "n_strings": [20],
+    },
+    "full": {
+        "images": ["gradient", "disc", "stripes", "noise", "camera"],
+        "sizes": [100, 200],
+        "n_anchors": [90, 180],
+        "n_strings": [100, 200],
+    },
+    # samples for the autotuner's cost model (see autotune.py), at the
+    # web tier's canvas size
+    "calibration": {
+        "images": ["disc", "camera"],
+        "sizes": [200],
+        "n_anchors": [90, 180],
+        "n_strings": [100, 300],
+    },
+}
+
+
+def load_corpus_image(name: str, size: int, seed: int = DEFAULT_SEED, levels: int = DEFAULT_LEVELS) -> np.ndarray:
+    """
+    Build corpus image `name` at size×size and quantize it the same way
+    `load_image_to_pixels` does, returning a uint8 (H, W) array.
+    """
+    rng = np.random.default_rng(seed)
+    arr = IMAGES[name](size, rng).astype(np.float32)
+    scale = (levels - 1) / 255.0
+    return (np.round(arr * scale) / scale).astype(np.uint8)
+
+
+def build_cases(profile: str, algorithms: List[str], seed: int = DEFAULT_SEED) -> List[BenchmarkCase]:
+    """
+    Expand a named profile into concrete cases for each algorithm.
+    """
+    spec = PROFILES[profile]
+    return [
+        BenchmarkCase(algo, image, size, n_anchors, n_strings, seed)
+        for algo, image, size, n_anchors, n_strings in itertools.product(
+            algorithms, spec["images"], spec["sizes"], spec["n_anchors"], spec["n_strings"]
+        )
+    ]
@@ -0,0 +1,78 @@
+# stringart_app/benchmarks/kernels.py
+#
+# Side-by-side timings of every kernel on every available backend, on
+# inputs shaped like the algorithms' own (see kernels/).
+
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .. import kernels
+from ..chords import chord_table
+from ..renderer import generate_radial_anchors
+
+
+def _inputs(n_anchors: int, size: int, seed: int) -> Dict[str, Any]:
+    rng = np.random.default_rng(seed)
+    anchors = generate_radial_anchors(n_anchors, size, size)
+    nails = np.array([(int(x), int(y)) for x, y in anchors], dtype=np.int64)
+    ends = np.array([(i, j) for i in range(n_anchors) for j in range(i + 1, n_anchors)], dtype=np.intp)
+    line_ptr, line_xs, line_ys = kernels.numpy_backend.bresenham_lines(nails[ends[:, 0]], nails[ends[:, 1]])
+    table = chord_table(n_anchors, size, size)
+    canvas = np.full(size * size, 255, dtype=np.int16)
+    canvas[rng.random(size * size) < 0.3] = 0
+    return {
+        "starts": nails[ends[:, 0]],
+        "ends": nails[ends[:, 1]],
+        "line": (line_ptr, line_xs, line_ys),
+        "orig": rng.random((size, size, 3), dtype=np.float32),
+        "current": rng.random((size, size, 3), dtype=np.float32),
+        # one nail's chords, as michael-crum scores per move
+        "nail_chords": np.flatnonzero((ends[:, 0] == 0) | (ends[:, 1] == 0)),
+        "table": table,
+        "canvas": canvas,
+        "pixels": rng.integers(0, 256, size * size).astype(np.int16),
+        # a greedy iteration's sampled candidates
+        "sampled": rng.choice(len(table), min(1000, len(table)), replace=False),
+    }
+
+
+def run_kernel_benchmarks(
+    n_anchors: int = 180,
+    size: int = 200,
+    repeat: int = 5,
+    seed: int = 0,
+    backends: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Best-of-`repeat` seconds per (kernel, backend). Each backend is warmed
+    up first so compilation never lands in the timings.
+    """
+    data = _inputs(n_anchors, size, seed)
+    color = np.zeros(3, dtype=np.float32)
+    line_ptr, line_xs, line_ys = data["line"]
+    masks = data["table"].masks
+
+    calls: Dict[str, Callable[[Any], Any]] = {
+        "bresenham_lines": lambda b: b.bresenham_lines(data["starts"], data["ends"]),
+        "fearless_scores": lambda b: b.fearless_scores(
+            data["orig"], data["current"], color, 0.25, line_ptr, line_xs, line_ys, data["nail_chords"], 0.2
+        ),
+        "chord_gains": lambda b: b.chord_gains(
+            data["canvas"], data["pixels"], masks.indptr, masks.indices, data["sampled"]
+        ),
+    }
+
+    results = []
+    for name in backends or list(kernels.BACKENDS):
+        backend = kernels.get_backend(name)
+        kernels.warm_up(backend)
+        for kernel, call in calls.items():
+            timings = []
+            for _ in range(max(1, repeat)):
+                t0 = time.perf_counter()
+                call(backend)
+                timings.append(time.perf_counter() - t0)
+            results.append({"kernel": kernel, "backend": name, "seconds": min(timings)})
+    return results
@@ -0,0 +1,442 @@
+# stringart_app/benchmarks/loadtest.py
+#
+# Load test for the web tier. Starts the app the way it is deployed (by
+# default the Dockerfile's Uvicorn command) or targets one that
+# is already running, then has N simulated users each do what the page
+# does: upload images for a preview, start a job, follow its log and
+# result streams to the end, and cancel some jobs part way. The server's
+# CPU time and RSS are sampled throughout. The report gives latency
+# percentiles, error rates and server usage, so deployment configurations
+# can be compared by running it once per --server-cmd.
+#
+# Run with `python manage.py stringart_loadtest`.
+#
+
+import base64
+import http.cookiejar
+import json
+import os
+import random
+import shlex
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+from .corpus import DEFAULT_SEED, load_corpus_image
+
+# The Dockerfile's server command; {port} is filled in
+DEFAULT_SERVER_CMD = (
+    "uvicorn stringart_project.asgi:application --workers 1 --timeout-keep-alive 2 "
+    "--log-level info --host 127.0.0.1 --port {port}"
+)
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]
+
+
+@dataclass
+class LoadProfile:
+    """What each simulated user does, and how many of them there are."""
+    clients: int = 8
+    jobs_per_client: int = 1
+    # share of jobs cancelled once their first vector arrives
+    cancel_fraction: float = 0.25
+    algorithms: Sequence[str] = ("coverage",)
+    # corpus images uploaded with every job
+    images: Sequence[str] = ("disc",)
+    n_anchors: int = 180
+    n_strings: int = 200
+    # seconds over which client start times are spread
+    ramp: float = 1.0
+    # a job not finished after this long counts as a timeout
+    job_timeout: float = 120.0
+    seed: int = DEFAULT_SEED
+
+
+@dataclass
+class JobRecord:
+    """One simulated job: what happened, and when (seconds since submit)."""
+    client: int
+    cancel: bool
+    outcome: str = "pending"  # completed, cancelled, rejected, timeout, error
+    # the first failure seen, including a failed stop after the job ended
+    error: str = ""
+    preview_seconds: Optional[float] = None
+    submit_seconds: Optional[float] = None
+    first_vector: Optional[float] = None
+    cancel_sent: Optional[float] = None
+    finished: Optional[float] = None
+    vectors: int = 0
+
+
+class _Client:
+    """One browser: a cookie jar (for the CSRF token) and its requests."""
+
+    def __init__(self, base_url: str, timeout: float):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+
+    def _csrf(self) -> str:
+        return next((c.value for c in self.cookies if c.name == "csrftoken"), "")
+
+    def open(self, path: str, data: Optional[bytes] = None, content_type: Optional[str] = None):
+        request = urllib.request.Request(self.base_url + path, data=data)
+        if data is not None:
+            request.add_header("X-CSRFToken", self._csrf())
+            request.add_header("Referer", self.base_url + "/")
+            if content_type:
+                request.add_header("Content-Type", content_type)
+        return self.opener.open(request, timeout=self.timeout)
+
+    def request(self, path: str, data: Optional[bytes] = None, content_type: Optional[str] = None):
+        """(status, body) of a request; HTTP errors are returned, not raised."""
+        try:
+            with self.open(path, data, content_type) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def post_form(self, path: str, fields: List[tuple]):
+        return self.request(path, urllib.parse.urlencode(fields).encode(), "application/x-www-form-urlencoded")
+
+    def post_multipart(self, path: str, fields: List[tuple], files: List[tuple]):
+        boundary = uuid.uuid4().hex
+        body = BytesIO()
+        for name, value in fields:
+            body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+        for name, filename, data in files:
+            body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+                       f'filename="{filename}"\r\nContent-Type: image/png\r\n\r\n'.encode())
+            body.write(data + b"\r\n")
+        body.write(f"--{boundary}--\r\n".encode())
+        return self.request(path, body.getvalue(), f"multipart/form-data; boundary={boundary}")
+
+    def events(self, path: str) -> Iterator[str]:
+        """The data of each server-sent event, until the server ends the stream."""
+        with self.open(path) as response:
+            for line in response:
+                if line.startswith(b"data: "):
+                    yield line[6:].rstrip(b"\r\n").decode()
+
+
+def _png(image: np.ndarray) -> bytes:
+    buf = BytesIO()
+    Image.fromarray(image).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def _run_job(client: _Client, profile: LoadProfile, uploads: List[tuple], record: JobRecord) -> None:
+    t0 = time.perf_counter()
+    status, _ = client.post_multipart(
+        "/", [("algorithms", a) for a in profile.algorithms],
+        [("images", name, data) for name, data in uploads],
+    )
+    record.preview_seconds = time.perf_counter() - t0
+    if status != 200:
+        record.outcome, record.error = "error", f"preview HTTP {status}"
+        return
+
+    t0 = time.perf_counter()
+    status, body = client.post_form("/", [
+        ("run_algos", "1"),
+        ("n_anchors", profile.n_anchors),
+        ("n_strings", profile.n_strings),
+        *(("algorithms", a) for a in profile.algorithms),
+        *(("image_name", name) for name, _ in uploads),
+        *(("image_data", base64.b64encode(data).decode("ascii")) for _, data in uploads),
+    ])
+    record.submit_seconds = time.perf_counter() - t0
+    if status == 503:
+        record.outcome = "rejected"
+        return
+    if status != 200:
+        record.outcome, record.error = "error", f"submit HTTP {status}"
+        return
+    job_id = json.loads(body)["job_id"]
+
+    done = threading.Event()
+    # each (algorithm, image) run ends with a final progress event
+    results_done = threading.Event()
+    expected = len(profile.algorithms) * len(uploads)
+
+    def stop() -> None:
+        client.request(f"/stop-job/{job_id}/", b"")
+
+    def follow_logs() -> None:
+        # the job's last log line says how it ended; a cancelled job's
+        # stream may instead just close
+        try:
+            for line in client.events(f"/stream-logs/?job_id={job_id}"):
+                if line.startswith("Job complete") or line.startswith("Job cancelled"):
+                    if record.outcome == "pending":
+                        record.finished = time.perf_counter() - t0
+                        record.outcome = "completed" if line.startswith("Job complete") else "cancelled"
+                    done.set()
+            if record.outcome == "pending" and record.cancel_sent is not None:
+                record.finished = time.perf_counter() - t0
+                record.outcome = "cancelled"
+        except OSError as e:
+            if not done.is_set() and record.outcome == "pending":
+                record.outcome, record.error = "error", f"log stream: {e}"
+        finally:
+            done.set()
+
+    def follow_results() -> None:
+        finals = 0
+        try:
+            for data in client.events(f"/stream-results/?job_id={job_id}"):
+                event = json.loads(data)
+                if event.get("phase") == "progress" and event["progress"].get("final"):
+                    finals += 1
+                    if finals == expected:
+                        results_done.set()
+                if event.get("phase") != "algorithm":
+                    continue
+                record.vectors += 1
+                if record.first_vector is None:
+                    record.first_vector = time.perf_counter() - t0
+                    if record.cancel:
+                        record.cancel_sent = time.perf_counter() - t0
+                        stop()
+        except OSError as e:
+            if not done.is_set() and record.outcome == "pending":
+                record.outcome, record.error = "error", f"result stream: {e}"
+        finally:
+            results_done.set()
+
+    readers = [threading.Thread(target=follow_logs, daemon=True), threading.Thread(target=follow_results, daemon=True)]
+    for reader in readers:
+        reader.start()
+    deadline = time.monotonic() + profile.job_timeout
+    if not done.wait(profile.job_timeout) and record.outcome == "pending":
+        record.outcome = "timeout"
+    if record.outcome == "completed":
+        # the page keeps its streams open until the last vectors arrive
+        if results_done.wait(max(0.0, deadline - time.monotonic())):
+            record.finished = time.perf_counter() - t0
+        else:
+            record.outcome = "timeout"
+    # like closing the page: ends both streams and frees the job. If every
+    # server thread is held by a stream this never gets through.
+    try:
+        stop()
+    except OSError as e:
+        record.error = record.error or f"stop-job: {e}"
+    for reader in readers:
+        reader.join(timeout=5.0)
+
+
+def _client(index: int, base_url: str, profile: LoadProfile, uploads: List[tuple],
+            records: List[JobRecord], lock: threading.Lock, rng: random.Random,
+            on_job: Optional[Callable[[JobRecord], None]]) -> None:
+    time.sleep(profile.ramp * index / max(1, profile.clients))
+    client = _Client(base_url, timeout=profile.job_timeout)
+    for _ in range(profile.jobs_per_client):
+        record = JobRecord(client=index, cancel=rng.random() < profile.cancel_fraction)
+        with lock:
+            records.append(record)
+        try:
+            status, _ = client.request("/")  # sets the CSRF cookie, as loading the page does
+            if status != 200:
+                record.outcome, record.error = "error", f"page HTTP {status}"
+                continue
+            _run_job(client, profile, uploads, record)
+        except OSError as e:
+            record.outcome, record.error = "error", str(e)
+        if on_job:
+            on_job(record)
+
+
+class ProcessSampler:
+    """
+    CPU seconds and RSS of a process and its descendants (e.g. a server
+    and its worker processes), sampled from /proc on a background thread.
+    """
+
+    def __init__(self, pid: int, interval: float = 0.25):
+        self.pid = pid
+        self.interval = interval
+        self.peak_rss = 0
+        self.samples: List[tuple] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def available() -> bool:
+        return os.path.exists("/proc/self/stat")
+
+    def _tree(self) -> List[int]:
+        children: Dict[int, List[int]] = {}
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                try:
+                    with open(f"/proc/{entry}/stat") as fh:
+                        ppid = int(fh.read().rsplit(")", 1)[1].split()[1])
+                except (OSError, IndexError, ValueError):
+                    continue
+                children.setdefault(ppid, []).append(int(entry))
+        tree, todo = [], [self.pid]
+        while todo:
+            pid = todo.pop()
+            tree.append(pid)
+            todo.extend(children.get(pid, ()))
+        return tree
+
+    def sample(self) -> tuple:
+        """(cpu seconds, rss bytes) of the whole tree now."""
+        ticks = os.sysconf("SC_CLK_TCK")
+        page = os.sysconf("SC_PAGE_SIZE")
+        cpu, rss = 0.0, 0
+        for pid in self._tree():
+            try:
+                with open(f"/proc/{pid}/stat") as fh:
+                    fields = fh.read().rsplit(")", 1)[1].split()
+                with open(f"/proc/{pid}/statm") as fh:
+                    rss += int(fh.read().split()[1]) * page
+            except (OSError, IndexError, ValueError):
+                continue
+            cpu += (int(fields[11]) + int(fields[12])) / ticks  # utime + stime
+        return cpu, rss
+
+    def _run(self) -> None:
+        while True:
+            cpu, rss = self.sample()
+            self.samples.append((time.perf_counter(), cpu, rss))
+            self.peak_rss = max(self.peak_rss, rss)
+            if self._stop.wait(self.interval):
+                break
+
+    def __enter__(self) -> "ProcessSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def summary(self) -> Dict[str, float]:
+        (t0, cpu0, rss0), (t1, cpu1, _) = self.samples[0], self.samples[-1]
+        return {
+            "cpu_seconds": cpu1 - cpu0,
+            "cpu_percent": 100.0 * (cpu1 - cpu0) / max(t1 - t0, 1e-9),
+            "start_rss_mb": rss0 / 2 ** 20,
+            "peak_rss_mb": self.peak_rss / 2 ** 20,
+        }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def local_server(command: str = DEFAULT_SERVER_CMD, startup_timeout: float = 60.0) -> Iterator[tuple]:
+    """
+    Run `command` (with {port} filled in) from the project directory until
+    it answers on that port; yields (base url, process). Its output goes to
+    a temporary log file, whose tail is shown if it fails to start.
+    """
+    port = _free_port()
+    log = tempfile.TemporaryFile()
+    proc = subprocess.Popen(shlex.split(command.format(port=port)), cwd=PROJECT_DIR, stdout=log, stderr=log)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            try:
+                urllib.request.urlopen(base_url + "/", timeout=5).close()
+                break
+            except (OSError, urllib.error.HTTPError):
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    log.seek(0)
+                    tail = log.read().decode(errors="replace")[-2000:]
+                    raise RuntimeError(f"Server did not start: {command!r}\n{tail}")
+                time.sleep(0.2)
+        yield base_url, proc
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        log.close()
+
+
+def _percentiles(values: List[float]) -> Optional[Dict[str, float]]:
+    if not values:
+        return None
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99), "max": float(max(values)), "n": len(values)}
+
+
+def run_load_test(
+    base_url: str,
+    profile: LoadProfile,
+    server_pid: Optional[int] = None,
+    on_job: Optional[Callable[[JobRecord], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Run `profile` against the app at `base_url` and return the report.
+    `server_pid` (e.g. from local_server) adds the server's CPU and RSS.
+    """
+    rng = random.Random(profile.seed)
+    uploads = [(f"{name}.png", _png(load_corpus_image(name, 200, seed=profile.seed))) for name in profile.images]
+    records: List[JobRecord] = []
+    lock = threading.Lock()
+
+    sampler = ProcessSampler(server_pid) if server_pid and ProcessSampler.available() else None
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=_client, daemon=True,
+                         args=(i, base_url, profile, uploads, records, lock, random.Random(rng.random()), on_job))
+        for i in range(profile.clients)
+    ]
+    if sampler:
+        sampler.__enter__()
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        if sampler:
+            sampler.__exit__(None, None, None)
+    wall = time.perf_counter() - started
+
+    outcomes: Dict[str, int] = {}
+    for r in records:
+        outcomes[r.outcome] = outcomes.get(r.outcome, 0) + 1
+    failed = sum(1 for r in records if r.outcome in ("error", "timeout") or r.error)
+    return {
+        "profile": asdict(profile) | {"algorithms": list(profile.algorithms), "images": list(profile.images)},
+        "base_url": base_url,
+        "wall_seconds": wall,
+        "jobs": len(records),
+        "outcomes": outcomes,
+        "error_rate": failed / max(1, len(records)),
+        "rejection_rate": outcomes.get("rejected", 0) / max(1, len(records)),
+        "errors": sorted({r.error for r in records if r.error}),
+        "preview_seconds": _percentiles([r.preview_seconds for r in records if r.preview_seconds is not None]),
+        "time_to_first_vector": _percentiles([r.first_vector for r in records if r.first_vector is not None]),
+        "job_latency": _percentiles([r.finished for r in records if r.outcome == "completed"]),
+        # from asking to cancel until the job's streams close
+        "cancel_latency": _percentiles([r.finished - r.cancel_sent for r in records
+                                        if r.outcome == "cancelled" and r.cancel_sent is not None]),
+        "server": sampler.summary() if sampler and sampler.samples else None,
+    }
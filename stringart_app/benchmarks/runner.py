@@ -0,0 +1,248 @@
+# stringart_app/benchmarks/runner.py
+
+import json
+import logging
+import multiprocessing
+import platform
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .corpus import BenchmarkCase, load_corpus_image
+from ..planner import generate_string_vectors, ALGORITHMS
+from ..renderer import render_vector_list
+
+# Bump when the shape of a result record changes, so old baselines are
+# recognisable as incomparable.
+REPORT_VERSION = 1
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+
+@dataclass
+class Thresholds:
+    """
+    Allowed relative growth over the baseline before a case counts as a
+    regression (0.25 = 25% slower/larger/worse).
+    """
+    time: float = 0.25
+    memory: float = 0.25
+    error: float = 0.05
+    # timings below this many seconds are too noisy to compare
+    min_seconds: float = 0.05
+
+
+def _peak_rss_kb() -> int:
+    """Process high-water RSS in KiB (ru_maxrss is bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_case(case: BenchmarkCase, trace_memory: bool = False, repeat: int = 1) -> Dict[str, Any]:
+    """
+    Run a single benchmark case and return its result record.
+
+    Wall time is the fastest of `repeat` untraced runs; when `trace_memory` is set the
+    algorithm is run a second time under tracemalloc to get its Python-heap
+    peak without the tracing overhead skewing the timings.
+    """
+    logger = logging.getLogger("stringart_app.benchmarks")
+    phases: Dict[str, float] = {}
+
+    # First lookup imports the algorithm module; time it separately so the
+    # import never lands in the generate timings.
+    already_loaded = ALGORITHMS.is_loaded(case.algorithm)
+    try:
+        ALGORITHMS.load(case.algorithm)
+    except ImportError:
+        pass  # surfaces as this case's error below
+    import_seconds = None if already_loaded else ALGORITHMS.import_seconds.get(case.algorithm)
+
+    t0 = time.perf_counter()
+    pixels = load_corpus_image(case.image, case.size, seed=case.seed)
+    phases["preprocess"] = time.perf_counter() - t0
+
+    # the algorithm's own per-phase timings and loop counters arrive in its
+    # final progress event
+    algorithm_phases: Dict[str, float] = {}
+    algorithm_counters: Dict[str, float] = {}
+
+    def on_progress(progress: Dict[str, Any]) -> None:
+        if progress.get("final"):
+            algorithm_phases.clear()
+            algorithm_phases.update(progress["phases"])
+            algorithm_counters.clear()
+            algorithm_counters.update(progress.get("counters", {}))
+
+    def generate() -> List[Dict[str, int]]:
+        random.seed(case.seed)
+        np.random.seed(case.seed)
+        return generate_string_vectors(
+            pixels,
+            n_anchors=case.n_anchors,
+            n_strings=case.n_strings,
+            algorithm=case.algorithm,
+            logger=logger,
+            progress_callback=on_progress,
+        )
+
+    error: Optional[str] = None
+    timings: List[float] = []
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        try:
+            vectors = generate()
+        except Exception as exc:  # record the failure rather than abort the suite
+            vectors = []
+            error = f"{type(exc).__name__}: {exc}"
+        timings.append(time.perf_counter() - t0)
+        if error:
+            break
+    phases["generate"] = min(timings)
+
+    t0 = time.perf_counter()
+    rendered = np.array(
+        render_vector_list(vectors, size=(case.size, case.size), n_anchors=case.n_anchors, logger=logger),
+        dtype=np.float64,
+    )
+    phases["render"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    sse = float(np.sum((rendered - pixels.astype(np.float64)) ** 2))
+    phases["score"] = time.perf_counter() - t0
+
+    record: Dict[str, Any] = {
+        **asdict(case),
+        "key": case.key,
+        "wall_seconds": phases["generate"],
+        "wall_seconds_all": timings,
+        "import_seconds": import_seconds,
+        "phases": phases,
+        "algorithm_phases": dict(algorithm_phases),
+        "algorithm_counters": dict(algorithm_counters),
+        "n_vectors": len(vectors),
+        "sse": sse,
+        "peak_rss_kb": _peak_rss_kb(),
+        "tracemalloc_peak_kb": None,
+        "error": error,
+    }
+
+    if trace_memory and error is None:
+        tracemalloc.start()
+        try:
+            generate()
+            record["tracemalloc_peak_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+        finally:
+            tracemalloc.stop()
+
+    return record
+
+
+def run_suite(
+    cases: List[BenchmarkCase],
+    trace_memory: bool = False,
+    isolate: bool = True,
+    repeat: int = 1,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Run every case and return a machine-readable report.
+
+    With `isolate`, each case runs in a fresh spawned process so that
+    peak RSS belongs to that case alone rather than the whole suite.
+    """
+    results: List[Dict[str, Any]] = []
+
+    if isolate:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx, max_tasks_per_child=1) as pool:
+            for case in cases:
+                record = pool.submit(run_case, case, trace_memory, repeat).result()
+                results.append(record)
+                if on_result:
+                    on_result(record)
+    else:
+        for case in cases:
+            record = run_case(case, trace_memory, repeat)
+            results.append(record)
+            if on_result:
+                on_result(record)
+
+    return {
+        "version": REPORT_VERSION,
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "isolated": isolate,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare_to_baseline(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    thresholds: Thresholds = Thresholds(),
+) -> List[Dict[str, Any]]:
+    """
+    Return one entry per metric that regressed beyond its threshold.
+    Cases missing from the baseline are ignored.
+    """
+    base_by_key = {r["key"]: r for r in baseline.get("results", [])}
+    # RSS is only per-case when both runs isolated each case in its own process
+    compare_rss = report["meta"].get("isolated") and baseline.get("meta", {}).get("isolated")
+    regressions: List[Dict[str, Any]] = []
+
+    for r in report["results"]:
+        base = base_by_key.get(r["key"])
+        if base is None:
+            continue
+
+        checks = [("sse", thresholds.error)]
+        if max(r["wall_seconds"], base["wall_seconds"]) >= thresholds.min_seconds:
+            checks.append(("wall_seconds", thresholds.time))
+        if r.get("tracemalloc_peak_kb") and base.get("tracemalloc_peak_kb"):
+            checks.append(("tracemalloc_peak_kb", thresholds.memory))
+        if compare_rss:
+            checks.append(("peak_rss_kb", thresholds.memory))
+        if r["error"] and not base["error"]:
+            regressions.append({"key": r["key"], "metric": "error", "baseline": None, "current": r["error"]})
+
+        for metric, allowed in checks:
+            old, new = base[metric], r[metric]
+            if old is None or new is None:
+                continue
+            if new > old * (1 + allowed) and new - old > 1e-9:
+                regressions.append({
+                    "key": r["key"],
+                    "metric": metric,
+                    "baseline": old,
+                    "current": new,
+                    "ratio": (new / old) if old else None,
+                })
+
+    return regressions
+
+
+def load_report(path: Path) -> Dict[str, Any]:
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def write_report(report: Dict[str, Any], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as fh:
+        json.dump(report, fh, indent=2, sort_keys=True)
@@ -0,0 +1,113 @@
+# stringart_app/candidates.py
+#
+# Shared Hough candidate stage: edge-detect an image, find its prominent line
+# segments and snap their endpoints to nails, giving a few hundred chords
+# worth considering instead of all ~16k. Several algorithms (and several runs
+# on the same upload) want the same set, so it is computed once per image and
+# parameters and cached per process.
+#
+
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import numpy as np
+from skimage.feature import canny
+from skimage.transform import probabilistic_hough_line
+
+# Distinct (image, n_anchors, params) results kept per process
+CACHE_SIZE = 16
+
+_cache: "OrderedDict[tuple, HoughCandidates]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class HoughParams:
+    """
+    Canny and probabilistic Hough settings. `seed` fixes the Hough
+    transform's random sampling so a cached result is the result.
+    """
+    sigma: float = 1.0
+    threshold: int = 10
+    line_length: int = 30
+    line_gap: int = 5
+    seed: int = 0
+
+
+@dataclass(frozen=True, eq=False)
+class HoughCandidates:
+    """
+    Anchor pairs (i < j, sorted) that some Hough segment snaps onto, and how
+    many segments were found.
+    """
+    pairs: List[Tuple[int, int]]
+    n_segments: int
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+
+def snap_to_anchors(points: np.ndarray, n_anchors: int, width: int, height: int) -> np.ndarray:
+    """
+    Nearest nail to each (x, y) point by its angle about the canvas centre.
+    Anchors are evenly spaced from 12 o'clock clockwise (see
+    generate_radial_anchors), so the index is the angle divided by the nail
+    spacing: O(1) per point rather than a distance to every anchor.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    angles = np.arctan2(points[:, 1] - height / 2, points[:, 0] - width / 2) + math.pi / 2
+    return np.rint(angles * n_anchors / (2 * math.pi)).astype(np.intp) % n_anchors
+
+
+def _image_key(pixels: np.ndarray) -> tuple:
+    data = np.ascontiguousarray(pixels)
+    return data.shape, data.dtype.str, hashlib.blake2b(data.tobytes(), digest_size=16).digest()
+
+
+def _detect(pixels: np.ndarray, n_anchors: int, params: HoughParams) -> HoughCandidates:
+    height, width = pixels.shape
+    edges = canny(pixels / 255.0, sigma=params.sigma)
+    segments = probabilistic_hough_line(
+        edges,
+        threshold=params.threshold,
+        line_length=params.line_length,
+        line_gap=params.line_gap,
+        rng=params.seed,
+    )
+    if not segments:
+        return HoughCandidates(pairs=[], n_segments=0)
+
+    ends = snap_to_anchors(np.array(segments, dtype=np.float64).reshape(-1, 2), n_anchors, width, height)
+    ends = ends.reshape(-1, 2)
+    ends = ends[ends[:, 0] != ends[:, 1]]
+    ends.sort(axis=1)
+    pairs = [(int(i), int(j)) for i, j in np.unique(ends, axis=0)]
+    return HoughCandidates(pairs=pairs, n_segments=len(segments))
+
+
+def hough_candidates(pixels: np.ndarray, n_anchors: int, params: HoughParams = HoughParams()) -> HoughCandidates:
+    """
+    Return the (cached) Hough candidate chords of a grayscale image.
+    """
+    key = (_image_key(pixels), n_anchors, params)
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+            return hit
+
+    result = _detect(pixels, n_anchors, params)
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,102 @@
+# stringart_app/checkpoints.py
+#
+# Solver state saved at the end of a run, so that asking for more strings
+# on the same image continues where the run stopped instead of starting
+# over. Algorithms with SUPPORTS_RESUME hand their state (residual or
+# canvas, pruned candidate set, RNG state) to a checkpoint callback and
+# accept it back as `resume`; the planner checks that a checkpoint belongs
+# to the same image and parameters before passing it on.
+#
+# Checkpoints are held in memory, pickled and zlib-compressed, and expire
+# after a TTL.
+#
+
+import hashlib
+import pickle
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+
+
+@dataclass(eq=False)
+class Checkpoint:
+    """
+    The vectors a run produced and the algorithm's state after the last of
+    them. `key` identifies the inputs the state depends on (see input_key).
+    """
+    algorithm: str
+    key: str
+    vectors: List[Dict[str, int]]
+    state: Dict[str, Any]
+
+
+def input_key(pixels: np.ndarray, n_anchors: int, line_thickness: int, options: Dict[str, Any]) -> str:
+    """
+    Digest of everything that shapes a run's trajectory: the image, the
+    nail count and thickness, and the algorithm options (winding,
+    candidates, seed). n_strings and time limits are deliberately left out.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(pixels).tobytes())
+    h.update(repr((pixels.shape, str(pixels.dtype), n_anchors, line_thickness, sorted(options.items()))).encode())
+    return h.hexdigest()
+
+
+class CheckpointStore:
+    """
+    Thread-safe store of compressed checkpoints under caller-chosen keys.
+    Entries expire `ttl` seconds after they were stored; beyond
+    `max_entries` the oldest go first.
+    """
+
+    def __init__(self, ttl: float = 1800.0, max_entries: int = 256,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, key: Hashable, checkpoint: Checkpoint) -> int:
+        """Store `checkpoint` under `key`, replacing any previous one. Returns its compressed size."""
+        blob = zlib.compress(pickle.dumps(checkpoint, protocol=pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            now = self._clock()
+            self._entries.pop(key, None)
+            self._entries[key] = (now + self.ttl, blob)
+            self._evict(now)
+        return len(blob)
+
+    def get(self, key: Hashable) -> Optional[Checkpoint]:
+        """The checkpoint stored under `key`, or None if there is none or it expired."""
+        with self._lock:
+            self._evict(self._clock())
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return pickle.loads(zlib.decompress(entry[1]))
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._evict(self._clock())
+            return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """Compressed size of every stored checkpoint."""
+        with self._lock:
+            return sum(len(blob) for _, blob in self._entries.values())
+
+    def _evict(self, now: float) -> None:
+        # entries are in insertion order and share one TTL, so the expired
+        # ones are at the front
+        while self._entries:
+            key, (expires, _) = next(iter(self._entries.items()))
+            if expires > now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[key]
@@ -0,0 +1,149 @@
+# stringart_app/chords.py
+#
+# Shared chord geometry: every anchor pair of a canvas, its length and the
+# pixels its rasterised line covers. Building this for 180 anchors means
+# drawing ~16k lines, which used to be repeated by each algorithm on every
+# image; the table is cached per process so only the first image of a given
+# size pays for it.
+#
+
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw
+from scipy import sparse
+
+from .renderer import generate_radial_anchors
+
+# Distinct (n_anchors, size, thickness) tables kept per process
+CACHE_SIZE = 4
+
+
+@dataclass(frozen=True, eq=False)
+class ChordTable:
+    """
+    Geometry of all anchor pairs (i < j) on a width × height canvas.
+
+    `masks` is a sparse (n_pairs × width*height) boolean matrix whose row k
+    marks the pixels covered by chord `pairs[k]`, exactly as PIL draws it, so
+    `masks @ image.ravel()` scores every chord against an image in one call.
+    `nail_chords[a]` / `nail_targets[a]` list the chords touching nail a and
+    the nail at their other end, for walking a continuous thread.
+    Treat the arrays as read-only; they are shared by every caller.
+    """
+    n_anchors: int
+    width: int
+    height: int
+    line_thickness: int
+    anchors: List[Tuple[float, float]]
+    pairs: List[Tuple[int, int]]
+    lengths: np.ndarray
+    masks: sparse.csr_matrix
+    pair_index: Dict[Tuple[int, int], int]
+    nail_chords: List[np.ndarray]
+    nail_targets: List[np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def pixels(self, k: int) -> np.ndarray:
+        """Flat indices of the pixels covered by chord k."""
+        return self.masks.indices[self.masks.indptr[k]:self.masks.indptr[k + 1]]
+
+    def rows(self, pairs: Iterable[Tuple[int, int]]) -> np.ndarray:
+        """Chord indices of `pairs`, given in either orientation."""
+        return np.array([self.pair_index[(min(i, j), max(i, j))] for i, j in pairs], dtype=np.intp)
+
+    def chords_from(self, nail: int, min_skip: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Chord indices leaving `nail` and the nails they end on, skipping chords
+        to nails fewer than `min_skip` positions away around the circle.
+        """
+        chords, targets = self.nail_chords[nail], self.nail_targets[nail]
+        if min_skip > 1:
+            gap = np.abs(targets - nail)
+            keep = np.minimum(gap, self.n_anchors - gap) >= min_skip
+            chords, targets = chords[keep], targets[keep]
+        return chords, targets
+
+    @cached_property
+    def by_pixel(self) -> sparse.csr_matrix:
+        """
+        `masks` transposed: row p marks the chords covering pixel p, so a
+        change on a few pixels updates per-chord sums without rescoring
+        every chord. Built on first use.
+        """
+        return self.masks.T.tocsr()
+
+    def dense(self, k: int) -> np.ndarray:
+        """Chord k as a flat boolean mask."""
+        mask = np.zeros(self.width * self.height, dtype=bool)
+        mask[self.pixels(k)] = True
+        return mask
+
+
+def _rasterise(a: Tuple[float, float], b: Tuple[float, float], width: int, height: int,
+               line_thickness: int) -> np.ndarray:
+    """
+    Flat pixel indices of the line a–b as drawn by PIL on the full canvas.
+    Drawing into the line's bounding box (shifted by whole pixels, so the
+    rasterisation is identical) avoids allocating a full canvas per chord.
+    """
+    pad = line_thickness + 1
+    x0 = max(0, int(np.floor(min(a[0], b[0]))) - pad)
+    y0 = max(0, int(np.floor(min(a[1], b[1]))) - pad)
+    x1 = min(width, int(np.ceil(max(a[0], b[0]))) + pad + 1)
+    y1 = min(height, int(np.ceil(max(a[1], b[1]))) + pad + 1)
+
+    img = Image.new('L', (x1 - x0, y1 - y0), color=0)
+    ImageDraw.Draw(img).line(
+        [(a[0] - x0, a[1] - y0), (b[0] - x0, b[1] - y0)], fill=255, width=line_thickness
+    )
+    ys, xs = np.nonzero(np.array(img))
+    return ((ys + y0) * width + (xs + x0)).astype(np.int32)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def chord_table(n_anchors: int, width: int, height: int, line_thickness: int = 1) -> ChordTable:
+    """
+    Return the (cached) ChordTable for this anchor count, canvas size and
+    line thickness.
+    """
+    anchors = generate_radial_anchors(n_anchors, width, height)
+    pairs = [(i, j) for i in range(n_anchors) for j in range(i + 1, n_anchors)]
+    lengths = np.array([
+        np.hypot(anchors[i][0] - anchors[j][0], anchors[i][1] - anchors[j][1])
+        for i, j in pairs
+    ], dtype=np.float32)
+
+    rows = [_rasterise(anchors[i], anchors[j], width, height, line_thickness) for i, j in pairs]
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(r) for r in rows], out=indptr[1:])
+    indices = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int32)
+    masks = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=bool), indices, indptr),
+        shape=(len(pairs), width * height),
+    )
+
+    ends = np.array(pairs, dtype=np.intp).reshape(-1, 2)
+    nail_chords, nail_targets = [], []
+    for nail in range(n_anchors):
+        chords = np.flatnonzero((ends[:, 0] == nail) | (ends[:, 1] == nail))
+        nail_chords.append(chords)
+        nail_targets.append(np.where(ends[chords, 0] == nail, ends[chords, 1], ends[chords, 0]))
+
+    return ChordTable(
+        n_anchors=n_anchors,
+        width=width,
+        height=height,
+        line_thickness=line_thickness,
+        anchors=anchors,
+        pairs=pairs,
+        lengths=lengths,
+        masks=masks,
+        pair_index={p: k for k, p in enumerate(pairs)},
+        nail_chords=nail_chords,
+        nail_targets=nail_targets,
+    )
@@ -0,0 +1,181 @@
+# stringart_app/control.py
+#
+# Run-control primitives the algorithms check at safe points in their loops:
+# deadlines (return the best result so far), cancellation (abandon the run)
+# and convergence (stop once further steps no longer pay off).
+#
+
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+
+class Deadline:
+    """
+    An absolute point on the time.monotonic() clock after which an algorithm
+    should stop refining and return its best valid result so far.
+    `Deadline(None)` never expires.
+    """
+
+    def __init__(self, at: Optional[float] = None):
+        self.at = at
+
+    @classmethod
+    def after(cls, seconds: Optional[float]) -> "Deadline":
+        return cls(None if seconds is None else time.monotonic() + seconds)
+
+    @classmethod
+    def coerce(cls, deadline: Optional[float] = None, time_budget: Optional[float] = None) -> "Deadline":
+        """
+        Combine an absolute `deadline` (monotonic seconds) and a relative
+        `time_budget` (seconds from now), keeping whichever ends sooner.
+        """
+        candidates = [t for t in (deadline, None if time_budget is None else time.monotonic() + time_budget)
+                      if t is not None]
+        return cls(min(candidates) if candidates else None)
+
+    def expired(self) -> bool:
+        return self.at is not None and time.monotonic() >= self.at
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (never negative), or None when unbounded."""
+        return None if self.at is None else max(0.0, self.at - time.monotonic())
+
+    def __bool__(self) -> bool:
+        """True when this deadline actually bounds the run."""
+        return self.at is not None
+
+
+class JobCancelled(Exception):
+    """Raised from inside an algorithm when its cancellation token is set."""
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation flag checked by algorithms at iteration
+    granularity. Wraps anything with an `is_set()` method, so a job's
+    threading.Event or a multiprocessing.Event shared with a pool worker
+    can cancel a run directly.
+    """
+
+    def __init__(self, event=None):
+        self.event = event if event is not None else threading.Event()
+
+    @classmethod
+    def coerce(cls, token=None) -> "CancellationToken":
+        """Wrap an Event (or None, meaning never cancelled) as a token."""
+        return token if isinstance(token, cls) else cls(token)
+
+    def cancel(self) -> None:
+        self.event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self.event.is_set():
+            raise JobCancelled()
+
+
+class StoppingCriteria:
+    """
+    Convergence tests an algorithm applies to its own objective (lower is
+    better) after each step: a string placed, an iteration, a generation.
+
+    - plateau: over the last `plateau_window` steps the objective fell by
+      less than `plateau_ratio` of the most it fell over any earlier window
+    - target_error: the objective is down to `target_error` times its value
+      at start(), e.g. 0.2 for an 80% reduction
+    - stale: `max_stale` steps in a row without a new best
+
+    A test is off while its parameter is None. check() returns the name of
+    the first test that fires, which the algorithm reports as its stop reason.
+    """
+
+    FIELDS = ("plateau_window", "plateau_ratio", "target_error", "max_stale")
+
+    def __init__(
+        self,
+        plateau_window: Optional[int] = None,
+        plateau_ratio: float = 0.002,
+        target_error: Optional[float] = None,
+        max_stale: Optional[int] = None,
+    ):
+        self.plateau_window = plateau_window
+        self.plateau_ratio = plateau_ratio
+        self.target_error = target_error
+        self.max_stale = max_stale
+        self.start(None)
+
+    @classmethod
+    def coerce(cls, criteria=None, defaults: Optional[dict] = None) -> "StoppingCriteria":
+        """
+        `criteria` as StoppingCriteria: None for `defaults` alone, a dict to
+        override some of them, False to disable every test.
+        """
+        if isinstance(criteria, cls):
+            return criteria
+        if criteria is False:
+            return cls()
+        settings = {**(defaults or {}), **(criteria or {})}
+        unknown = set(settings) - set(cls.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown stopping criteria {sorted(unknown)}. Valid options: {', '.join(cls.FIELDS)}")
+        return cls(**settings)
+
+    def __bool__(self) -> bool:
+        """True when any test is enabled."""
+        return any(v is not None for v in (self.plateau_window, self.target_error, self.max_stale))
+
+    def start(self, objective: Optional[float]) -> None:
+        """Reset the tests for a run whose objective starts at `objective`."""
+        self.initial = objective
+        self.best = objective
+        self.stale = 0
+        self.peak_drop = 0.0
+        self.history: deque = deque(maxlen=(self.plateau_window or 0) + 1)
+        if objective is not None:
+            self.history.append(objective)
+
+    def check(self, objective: float) -> Optional[str]:
+        """Record the objective after one more step; the reason to stop, or None to go on."""
+        objective = float(objective)
+        if self.initial is None:
+            self.start(objective)
+            return None
+
+        if objective < self.best:
+            self.best, self.stale = objective, 0
+        else:
+            self.stale += 1
+        if self.max_stale is not None and self.stale >= self.max_stale:
+            return "stale"
+
+        if self.target_error is not None and objective <= self.target_error * self.initial:
+            return "target_error"
+
+        if self.plateau_window:
+            self.history.append(objective)
+            if len(self.history) == self.history.maxlen:
+                drop = self.history[0] - self.history[-1]
+                if self.peak_drop > 0 and drop < self.plateau_ratio * self.peak_drop:
+                    return "plateau"
+                self.peak_drop = max(self.peak_drop, drop)
+        return None
+
+    def get_state(self) -> dict:
+        """Progress so far, for a checkpoint; see set_state."""
+        return {
+            "initial": self.initial, "best": self.best, "stale": self.stale,
+            "peak_drop": self.peak_drop, "history": list(self.history),
+        }
+
+    def set_state(self, state: Optional[dict]) -> None:
+        """Continue from get_state() of an earlier run, so a resumed run stops where one long run would."""
+        if not state:
+            return
+        self.initial, self.best, self.stale = state["initial"], state["best"], state["stale"]
+        self.peak_drop = state["peak_drop"]
+        self.history.extend(state["history"])
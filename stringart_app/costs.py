@@ -0,0 +1,136 @@
+# stringart_app/costs.py
+#
+# Cost model for string-art jobs: estimated peak memory and CPU-seconds from
+# the job parameters alone, before anything runs. Memory is dominated by the
+# chord table (one sparse row per anchor pair, so quadratic in n_anchors) and
+# by per-pair working arrays; both grow fast enough that a single large job
+# can exhaust the container.
+#
+# Coefficients were fitted on a 200×200 canvas with 60–240 anchors and
+# 100–400 strings, measured with tracemalloc and time.process_time(). The
+# scheduler records estimate vs. measurement per job, so they can be re-fitted.
+#
+
+import math
+from dataclasses import dataclass
+from typing import Dict, Iterable, Tuple
+
+# Multiplier on every estimate, to stay on the safe side of the fit
+HEADROOM = 1.25
+
+
+@dataclass(frozen=True)
+class AlgorithmCost:
+    """
+    Per-algorithm coefficients: working memory per anchor pair and per canvas
+    pixel, and CPU time as setup per pair plus, per string placed, a fixed
+    cost and a cost per pair.
+    """
+    bytes_per_pair: float
+    bytes_per_pixel: float = 60.0
+    seconds_per_pair: float = 0.0
+    seconds_per_string: float = 0.0
+    seconds_per_pair_string: float = 0.0
+
+
+ALGORITHM_COSTS: Dict[str, AlgorithmCost] = {
+    "coverage": AlgorithmCost(1000, seconds_per_string=5e-4, seconds_per_pair_string=1.5e-7),
+    "graph-optimisation": AlgorithmCost(1400, seconds_per_pair=2.5e-5),
+    "greedy": AlgorithmCost(1200, seconds_per_string=1.2e-2, seconds_per_pair_string=7e-7),
+    "hough-greedy": AlgorithmCost(50, seconds_per_string=1e-4),
+    "memetic": AlgorithmCost(60, seconds_per_string=1.5e-2, seconds_per_pair_string=2e-7),
+    "michael-crum": AlgorithmCost(1300, seconds_per_string=5e-3, seconds_per_pair_string=2.6e-6),
+    "simualted-annealing": AlgorithmCost(900, seconds_per_pair=4e-6),
+}
+
+# Used for algorithms registered without coefficients: the most expensive
+# of the fitted ones on each axis
+DEFAULT_COST = AlgorithmCost(
+    bytes_per_pair=max(c.bytes_per_pair for c in ALGORITHM_COSTS.values()),
+    seconds_per_pair=max(c.seconds_per_pair for c in ALGORITHM_COSTS.values()),
+    seconds_per_string=max(c.seconds_per_string for c in ALGORITHM_COSTS.values()),
+    seconds_per_pair_string=max(c.seconds_per_pair_string for c in ALGORITHM_COSTS.values()),
+)
+
+# Chord table: peak while building (row arrays plus the assembled CSR) per
+# covered pixel, the pair index per pair, and build time per pair
+TABLE_BYTES_PER_PIXEL = 12.0
+TABLE_BYTES_PER_PAIR = 100.0
+TABLE_SECONDS_PER_PAIR = 1e-4
+
+
+@dataclass(frozen=True)
+class CostEstimate:
+    peak_bytes: int
+    cpu_seconds: float
+
+    @property
+    def peak_mb(self) -> float:
+        return self.peak_bytes / 2 ** 20
+
+    def as_dict(self) -> Dict[str, float]:
+        return {"peak_mb": round(self.peak_mb, 1), "cpu_seconds": round(self.cpu_seconds, 1)}
+
+
+def n_pairs(n_anchors: int) -> int:
+    return n_anchors * (n_anchors - 1) // 2
+
+
+def chord_pixels(n_anchors: int, size: Tuple[int, int], line_thickness: int = 1) -> int:
+    """
+    Approximate non-zeros of the chord table: the mean chord of a circle of
+    radius r is 4r/π long, and PIL covers ~0.9 pixels per unit length of a
+    one-pixel line.
+    """
+    radius = max(1.0, min(size) / 2 - 10)  # generate_radial_anchors' margin
+    return int(n_pairs(n_anchors) * 0.9 * 4 * radius / math.pi * line_thickness)
+
+
+def estimate_run(
+    algorithm: str,
+    n_anchors: int,
+    n_strings: int,
+    size: Tuple[int, int] = (200, 200),
+    line_thickness: int = 1,
+) -> CostEstimate:
+    """
+    Working memory and CPU of one algorithm run, excluding the shared chord
+    table (see estimate_table).
+    """
+    cost = ALGORITHM_COSTS.get(algorithm, DEFAULT_COST)
+    pairs = n_pairs(n_anchors)
+    peak = cost.bytes_per_pair * pairs + cost.bytes_per_pixel * size[0] * size[1]
+    cpu = (
+        cost.seconds_per_pair * pairs
+        + n_strings * (cost.seconds_per_string + cost.seconds_per_pair_string * pairs)
+    )
+    return CostEstimate(int(peak * HEADROOM), cpu * HEADROOM)
+
+
+def estimate_table(n_anchors: int, size: Tuple[int, int] = (200, 200), line_thickness: int = 1) -> CostEstimate:
+    """Peak memory and CPU of building one chord table."""
+    pairs = n_pairs(n_anchors)
+    peak = TABLE_BYTES_PER_PIXEL * chord_pixels(n_anchors, size, line_thickness) + TABLE_BYTES_PER_PAIR * pairs
+    return CostEstimate(int(peak * HEADROOM), TABLE_SECONDS_PER_PAIR * pairs * HEADROOM)
+
+
+def estimate_job(
+    algorithms: Iterable[str],
+    n_images: int,
+    n_anchors: int,
+    n_strings: int,
+    size: Tuple[int, int] = (200, 200),
+    line_thickness: int = 1,
+) -> CostEstimate:
+    """
+    Peak memory and total CPU of a job running each algorithm over each
+    image. Runs are sequential, so the peak is the chord table plus the
+    largest single run; CPU adds up over every run.
+    """
+    table = estimate_table(n_anchors, size, line_thickness)
+    runs = [estimate_run(a, n_anchors, n_strings, size, line_thickness) for a in algorithms]
+    # the decoded images themselves: a few full-size copies each
+    images = n_images * size[0] * size[1] * 16
+    peak = table.peak_bytes + images + max((r.peak_bytes for r in runs), default=0)
+    cpu = table.cpu_seconds + n_images * sum(r.cpu_seconds for r in runs)
+    return CostEstimate(int(peak), cpu)
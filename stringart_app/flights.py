@@ -0,0 +1,126 @@
+# stringart_app/flights.py
+#
+# Single-flight coalescing of identical runs. When a job is about to solve
+# an (image, algorithm, parameters) combination that another job is
+# already solving, it subscribes to that run instead of starting its own:
+# it replays the events produced so far and then follows the rest live.
+# The run stops early only once every subscriber has left (cancelled), so
+# one user cancelling doesn't cut the others short.
+#
+
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .sse_logging import EventLog
+
+
+def run_key(data: bytes, **params: Any) -> str:
+    """
+    Digest of an encoded image and every parameter that shapes a run's
+    output, so that two runs with equal keys would stream the same events.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(data)
+    h.update(repr(sorted(params.items())).encode())
+    return h.hexdigest()
+
+
+class Flight:
+    """
+    One run in progress and the jobs subscribed to it. The leader appends
+    the run's result events to `events`, labelled for its own job, and
+    closes it with an `outcome` when the run ends; `checkpoint` holds the
+    run's end-of-run solver state, if any.
+
+    A flight doubles as the run's cancellation event (see control.py): it
+    is set once no subscriber is left.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.events = EventLog()
+        self.outcome: Optional[str] = None
+        self.checkpoint = None
+        self._subscribers: set = set()
+        self._left = False
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def is_set(self) -> bool:
+        return self._left
+
+
+class FlightTable:
+    """
+    Thread-safe registry of the flights in progress, by run key.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, Flight] = {}
+        self._lock = threading.Lock()
+        self.totals: Dict[str, int] = {"led": 0, "followed": 0}
+
+    def join(self, key: str, job_id: str) -> Tuple[Flight, bool]:
+        """
+        Subscribe `job_id` to the flight for `key`, starting one if none is
+        in progress (or the current one is being abandoned). True when the
+        caller leads, i.e. runs the computation itself.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leading = flight is None or flight.is_set()
+            if leading:
+                flight = self._flights[key] = Flight(key)
+            flight._subscribers.add(job_id)
+            self.totals["led" if leading else "followed"] += 1
+            return flight, leading
+
+    def leave(self, job_id: str) -> List[Flight]:
+        """
+        Unsubscribe a job from every flight it is in. A flight left without
+        subscribers is set, so its leader's run stops at the next check.
+        Followers are woken so they notice their own cancellation.
+        """
+        with self._lock:
+            left = [f for f in self._flights.values() if job_id in f._subscribers]
+            for flight in left:
+                flight._subscribers.discard(job_id)
+                if not flight._subscribers:
+                    flight._left = True
+        for flight in left:
+            flight.events.notify()
+        return left
+
+    def finish(self, flight: Flight, outcome: str) -> None:
+        """End a flight: record how its run ended and release its followers."""
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+            flight.outcome = outcome
+        flight.events.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+    def render_prometheus(self) -> str:
+        """Coalescing counters in Prometheus text format."""
+        with self._lock:
+            in_flight = len(self._flights)
+            subscribers = sum(f.subscribers for f in self._flights.values())
+            totals = dict(self.totals)
+        lines = [
+            "# HELP stringart_flights_in_progress Runs in progress that identical runs can join.",
+            "# TYPE stringart_flights_in_progress gauge",
+            f"stringart_flights_in_progress {in_flight}",
+            "# HELP stringart_flight_subscribers Jobs subscribed to runs in progress.",
+            "# TYPE stringart_flight_subscribers gauge",
+            f"stringart_flight_subscribers {subscribers}",
+            "# HELP stringart_flight_runs_total Runs by whether the job led the computation or followed one.",
+            "# TYPE stringart_flight_runs_total counter",
+        ]
+        lines += [f'stringart_flight_runs_total{{role="{role}"}} {n}' for role, n in sorted(totals.items())]
+        return "\n".join(lines) + "\n"
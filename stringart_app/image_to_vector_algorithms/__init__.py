@@ -1,36 +1,164 @@
 # stringart_app/image_to_vector_algorithms/__init__.py
 
+import ast
 import pkgutil
 import importlib
-import inspect
-from typing import Dict, Type, Callable, Optional
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Callable, Mapping, Optional
 import numpy as np
 
 from .base import StringArtAlgorithm
+from ..control import CancellationToken
 
-ALGORITHMS: Dict[str, StringArtAlgorithm] = {}
-
-# --- Auto-discover all modules in this package ---
-package_name = __name__  # "stringart_app.image_to_vector_algorithms"
-package_path = __path__  # filesystem path to this directory
-
-for finder, module_name, is_pkg in pkgutil.iter_modules(package_path):
-    if module_name in ("base", "__init__"):
-        continue  # skip base and this init
-    full_name = f"{package_name}.{module_name}"
-    module = importlib.import_module(full_name)
-
-    # Find all concrete subclasses of StringArtAlgorithm in the module
-    for _, cls in inspect.getmembers(module, inspect.isclass):
-        if (
-            issubclass(cls, StringArtAlgorithm)
-            and cls is not StringArtAlgorithm
-            and not inspect.isabstract(cls)
-        ):
-            # Derive the registry key from module_name.
-            # e.g. module coverage → key "coverage"
-            key = module_name.replace("_", "-")
-            ALGORITHMS[key] = cls()
+
+@dataclass(frozen=True)
+class AlgorithmInfo:
+    """
+    What the registry knows about an algorithm before importing it.
+    """
+    key: str
+    module: str
+    class_name: str
+    description: str
+    # Class constants with literal values (flags, TUNABLES, ...), as written
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+class AlgorithmRegistry(Mapping[str, StringArtAlgorithm]):
+    """
+    Read-only mapping of registry key → algorithm instance.
+
+    Algorithm modules are discovered by parsing their source for a class
+    deriving from StringArtAlgorithm, so listing names and metadata never
+    imports scikit-image, PuLP, scipy and friends. Each implementation is
+    imported and instantiated on first lookup, and its import time recorded.
+    """
+
+    def __init__(self, package_name: str, package_path: Iterable[str]):
+        self.package_name = package_name
+        self._infos: Dict[str, AlgorithmInfo] = {}
+        self._instances: Dict[str, StringArtAlgorithm] = {}
+        self.import_seconds: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        for finder, module_name, is_pkg in pkgutil.iter_modules(package_path):
+            if module_name in ("base", "__init__") or is_pkg:
+                continue  # skip base and this init
+            source = Path(finder.path, f"{module_name}.py")
+            info = self._scan(module_name, source)
+            if info is not None:
+                self._infos[info.key] = info
+
+    def _scan(self, module_name: str, source: Path) -> Optional[AlgorithmInfo]:
+        tree = ast.parse(source.read_text(encoding="utf-8"), filename=str(source))
+        for node in tree.body:
+            if not isinstance(node, ast.ClassDef):
+                continue
+            bases = {getattr(b, "id", None) or getattr(b, "attr", None) for b in node.bases}
+            if "StringArtAlgorithm" in bases:
+                doc = ast.get_docstring(node) or ""
+                # Derive the registry key from module_name.
+                # e.g. module coverage → key "coverage"
+                return AlgorithmInfo(
+                    key=module_name.replace("_", "-"),
+                    module=f"{self.package_name}.{module_name}",
+                    class_name=node.name,
+                    description=doc.split("\n\n")[0].strip(),
+                    attributes=self._constants(node),
+                )
+        return None
+
+    @staticmethod
+    def _constants(node: ast.ClassDef) -> Dict[str, Any]:
+        """
+        Class-body assignments whose values are literals, or built from
+        literals and earlier constants (e.g. {"pop_size": POP_SIZE}).
+        """
+        constants: Dict[str, Any] = {}
+
+        def value(expr: ast.expr) -> Any:
+            if isinstance(expr, ast.Name):
+                return constants[expr.id]
+            if isinstance(expr, (ast.Tuple, ast.List, ast.Set)):
+                items = [value(e) for e in expr.elts]
+                return {ast.Tuple: tuple, ast.List: list, ast.Set: set}[type(expr)](items)
+            if isinstance(expr, ast.Dict) and None not in expr.keys:
+                return {value(k): value(v) for k, v in zip(expr.keys, expr.values)}
+            return ast.literal_eval(expr)
+
+        for stmt in node.body:
+            if isinstance(stmt, ast.Assign) and len(stmt.targets) == 1:
+                target, expr = stmt.targets[0], stmt.value
+            elif isinstance(stmt, ast.AnnAssign) and stmt.value is not None:
+                target, expr = stmt.target, stmt.value
+            else:
+                continue
+            if isinstance(target, ast.Name):
+                try:
+                    constants[target.id] = value(expr)
+                except (KeyError, ValueError, TypeError, SyntaxError):
+                    pass
+        return constants
+
+    def info(self, key: str) -> AlgorithmInfo:
+        return self._infos[key]
+
+    def attribute(self, key: str, name: str) -> Any:
+        """
+        A class attribute of an algorithm (e.g. PREFIX_RESULTS or TUNABLES),
+        read from its source while the module isn't imported yet.
+        """
+        algo = self._instances.get(key)
+        if algo is not None:
+            return getattr(algo, name)
+        attributes = self._infos[key].attributes
+        return attributes[name] if name in attributes else getattr(StringArtAlgorithm, name)
+
+    def is_loaded(self, key: str) -> bool:
+        return key in self._instances
+
+    def load(self, key: str) -> StringArtAlgorithm:
+        """Import, instantiate and cache the algorithm registered as `key`."""
+        algo = self._instances.get(key)
+        if algo is not None:
+            return algo
+        info = self._infos[key]
+        with self._lock:
+            if key not in self._instances:
+                t0 = time.perf_counter()
+                module = importlib.import_module(info.module)
+                algo = getattr(module, info.class_name)()
+                algo.name = key
+                self.import_seconds[key] = time.perf_counter() - t0
+                self._instances[key] = algo
+        return self._instances[key]
+
+    def warm_up(self, keys: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """
+        Eagerly load `keys` (default: every algorithm), e.g. before forking
+        workers, and return the import time of each.
+        """
+        for key in (self._infos if keys is None else keys):
+            self.load(key)
+        return dict(self.import_seconds)
+
+    def __getitem__(self, key: str) -> StringArtAlgorithm:
+        return self.load(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._infos
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._infos)
+
+    def __len__(self) -> int:
+        return len(self._infos)
+
+
+ALGORITHMS = AlgorithmRegistry(__name__, __path__)
 
 def generate_string_vectors(
     pixels: np.ndarray,
@@ -41,10 +169,18 @@ def generate_string_vectors(
     algorithm: str = "greedy",
     *,
     vector_callback: Optional[Callable[[int, int], None]] = None,
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    deadline: Optional[float] = None,
+    time_budget: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    **options: Any,
 ) -> list[dict[str, int]]:
     """
     Dispatch to whichever StringArtAlgorithm you’ve registered.
-    Optionally stream each vector via vector_callback(from_idx, to_idx).
+    Optionally stream each vector via vector_callback(from_idx, to_idx)
+    and progress snapshots via progress_callback(dict), returning early
+    with the best result so far once `deadline` / `time_budget` is reached
+    and raising JobCancelled once `cancel_token` is set.
     """
     algo = ALGORITHMS.get(algorithm)
     if algo is None:
@@ -57,4 +193,9 @@ def generate_string_vectors(
         line_thickness=line_thickness,
         sample_pairs=sample_pairs,
         vector_callback=vector_callback,
+        progress_callback=progress_callback,
+        deadline=deadline,
+        time_budget=time_budget,
+        cancel_token=cancel_token,
+        **options,
     )
@@ -1,13 +1,46 @@
 # stringart_app/image_to_vector_algorithms/base.py
 
-from typing import List, Dict, Optional, Callable
+from typing import Any, List, Dict, Optional, Callable, Sequence
 import numpy as np
 import logging
 
+from ..control import CancellationToken, Deadline
+from ..instrumentation import RunMetrics
+
 class StringArtAlgorithm:
     """
     Interface for any image→vector algorithm.
     """
+    # Registry key, set when the algorithm is registered
+    name: Optional[str] = None
+    # Whether generate() accepts continuous / start_nail / min_skip / no_repeat
+    # to wind a single continuous thread
+    SUPPORTS_CONTINUOUS = False
+    # Whether generate() accepts candidate_pairs, restricting its search to
+    # a precomputed set of chords (e.g. the shared Hough candidates)
+    SUPPORTS_CANDIDATES = False
+    # Whether generate_batch() scores all images together rather than
+    # running generate() on each in turn
+    SUPPORTS_BATCH = False
+    # Whether generate() accepts resume (a Checkpoint of an earlier run on
+    # the same inputs, continued rather than restarted) and
+    # checkpoint_callback (called with the solver state at the end)
+    SUPPORTS_RESUME = False
+    # Whether every prefix of generate()'s result is the result for that
+    # many strings, as for algorithms that add strings one at a time and
+    # never revisit them; one run then serves several string counts
+    PREFIX_RESULTS = False
+    # Chord-scoring engines generate() accepts as scoring=...: "masks"
+    # (sparse pixel masks, the default) and/or "radon" (see radon.py)
+    SCORING_ENGINES = ("masks",)
+    # Default StoppingCriteria settings; generate(stopping=...) overrides
+    # them per run, or turns them off with stopping=False
+    STOPPING: Dict[str, Any] = {}
+    # Algorithm-specific effort settings generate() accepts as keyword
+    # arguments, with their defaults; the autotuner (see autotune.py)
+    # lowers them to fit a latency target
+    TUNABLES: Dict[str, int] = {}
+
     def generate(
         self,
         pixels: np.ndarray,
@@ -17,7 +50,12 @@ class StringArtAlgorithm:
         sample_pairs: int,
         logger: Optional[logging.Logger] = None,
         *,
-        vector_callback: Optional[Callable[[int, int], None]] = None
+        vector_callback: Optional[Callable[[int, int], None]] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        deadline: Optional[float] = None,
+        time_budget: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        stopping: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, int]]:
         """
         Given a grayscale pixel-map, return a list of up-to-n_strings {"from": i, "to": j} pairs.
@@ -30,5 +68,74 @@ class StringArtAlgorithm:
         :param logger: Optional logger for debug/info messages
         :param vector_callback: Optional callback called as each vector is generated,
                                 signature vector_callback(from_idx: int, to_idx: int)
+        :param progress_callback: Optional callback receiving progress dicts
+                                  (strings, strings_per_sec, candidates_evaluated, error)
+        :param deadline: Optional absolute time.monotonic() by which to return
+        :param time_budget: Optional seconds from now by which to return; when
+                            either bound is hit the algorithm stops at its next
+                            safe point and returns its best valid result so far
+        :param cancel_token: Optional CancellationToken (or Event) checked at
+                             iteration granularity; once set the run raises
+                             JobCancelled and its partial result is discarded
+        :param stopping: Optional StoppingCriteria settings overriding
+                         STOPPING (plateau_window, plateau_ratio,
+                         target_error, max_stale), or False to run the
+                         full length; the reason a run ended is reported
+                         as "stop_reason" in its final progress event
         """
         raise NotImplementedError("Must implement generate()")
+
+    def generate_batch(
+        self,
+        images: Sequence[np.ndarray],
+        n_anchors: int,
+        n_strings: int,
+        line_thickness: int,
+        sample_pairs: int,
+        logger: Optional[logging.Logger] = None,
+        *,
+        vector_callback: Optional[Callable[[int, int, int], None]] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        deadline: Optional[float] = None,
+        time_budget: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        checkpoint_callback: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+        **options: Any
+    ) -> List[List[Dict[str, int]]]:
+        """
+        Run on several images at once, returning one vector list per image.
+        `vector_callback(image_index, from_idx, to_idx)` streams each image's
+        vectors as they're generated; `deadline` / `time_budget` bound the
+        whole batch. Algorithms with SUPPORTS_RESUME pass each image's end
+        state to `checkpoint_callback(image_index, state)`. This default runs
+        generate() on each image in turn.
+        """
+        budget = Deadline.coerce(deadline, time_budget)
+        results = []
+        for index, pixels in enumerate(images):
+            on_vector = on_checkpoint = None
+            if vector_callback is not None:
+                on_vector = lambda i, j, index=index: vector_callback(index, i, j)
+            if checkpoint_callback is not None and self.SUPPORTS_RESUME:
+                on_checkpoint = lambda state, index=index: checkpoint_callback(index, state)
+                options["checkpoint_callback"] = on_checkpoint
+            results.append(self.generate(
+                pixels, n_anchors, n_strings, line_thickness, sample_pairs, logger,
+                vector_callback=on_vector,
+                progress_callback=progress_callback,
+                deadline=budget.at,
+                cancel_token=cancel_token,
+                **options,
+            ))
+        return results
+
+    def start_metrics(
+        self,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        logger: Optional[logging.Logger] = None
+    ) -> RunMetrics:
+        """
+        Timers/counters/gauges for one generate() call. Kept per call rather
+        than on self, since registered instances are shared between jobs.
+        """
+        return RunMetrics(self.name or type(self).__name__, progress_callback, logger)
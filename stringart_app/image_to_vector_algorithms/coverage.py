@@ -1,14 +1,13 @@
 # stringart_app/image_to_vector_algorithms/coverage.py
 
 import numpy as np
-from typing import List, Dict, Optional, Callable
-from PIL import Image, ImageDraw
-
-from skimage.feature import canny
-from skimage.transform import probabilistic_hough_line
+from typing import Any, List, Dict, Optional, Callable, Sequence
 
 from .base import StringArtAlgorithm
-from ..renderer import generate_radial_anchors
+from ..candidates import HoughParams, hough_candidates
+from ..checkpoints import Checkpoint
+from ..chords import ChordTable, chord_table
+from ..control import CancellationToken, Deadline, StoppingCriteria
 import logging
 
 
@@ -20,13 +19,35 @@ class CoverageMulticoverAlgorithm(StringArtAlgorithm):
     """
 
     # Hough parameters
-    HOUGH_THRESHOLD   = 10
-    HOUGH_LINE_LENGTH = 30
-    HOUGH_LINE_GAP    = 5
+    HOUGH = HoughParams(sigma=1.0, threshold=10, line_length=30, line_gap=5)
+    # below this many Hough candidates, consider every chord instead
+    MIN_CANDIDATES = 100
 
     # length‐normalization exponent (0 = no normalization, 1 = full length penalty)
     ALPHA = 0.5
 
+    SUPPORTS_CONTINUOUS = True
+    SUPPORTS_BATCH = True
+    SUPPORTS_RESUME = True
+    PREFIX_RESULTS = True
+    SCORING_ENGINES = ("masks", "radon")
+    STOPPING = {"plateau_window": 50, "plateau_ratio": 0.002}
+
+    def _candidate_rows(self, pixels: np.ndarray, table: ChordTable, logger: logging.Logger) -> np.ndarray:
+        """
+        Table rows of the image's Hough candidates (from the shared, cached
+        stage), or of every chord when Hough finds too few.
+        """
+        # 3–4. Hough segments snapped to anchor pairs
+        found = hough_candidates(pixels, table.n_anchors, self.HOUGH)
+        logger.debug(
+            f"[coverage] Snapped {found.n_segments} Hough segments → {len(found)} unique anchor-pairs"
+        )
+        if len(found) < self.MIN_CANDIDATES:
+            logger.debug(f"[coverage] Fallback to full enumeration: {len(table)} pairs")
+            return np.arange(len(table))
+        return table.rows(found.pairs)
+
     def generate(
         self,
         pixels: np.ndarray,
@@ -36,95 +57,311 @@ class CoverageMulticoverAlgorithm(StringArtAlgorithm):
         sample_pairs: int = 1000,  # unused here
         logger: Optional[logging.Logger] = None,
         *,
-        vector_callback: Optional[Callable[[int, int], None]] = None
+        vector_callback: Optional[Callable[[int, int], None]] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        deadline: Optional[float] = None,
+        time_budget: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        continuous: bool = False,
+        start_nail: int = 0,
+        min_skip: int = 0,
+        no_repeat: bool = False,
+        resume: Optional[Checkpoint] = None,
+        checkpoint_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        scoring: str = "masks",
+        stopping: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, int]]:
+        """
+        With `continuous`, wind one thread from `start_nail` over every chord
+        rather than the Hough candidates; see GreedyAlgorithm.generate, also
+        for `resume` and `checkpoint_callback`. The state is the residual,
+        the candidate rows and the current nail.
+
+        `scoring="radon"` reads every chord's coverage from the residual's
+        Radon transform instead of the masks, patched after each pick.
+        """
         if logger is None:
             logger = logging.getLogger(__name__)
+        if scoring not in self.SCORING_ENGINES:
+            raise ValueError(f"Unknown scoring engine '{scoring}'. Valid options: {', '.join(self.SCORING_ENGINES)}")
+        metrics = self.start_metrics(progress_callback, logger)
+        budget = Deadline.coerce(deadline, time_budget)
+        cancel = CancellationToken.coerce(cancel_token)
+        converged = StoppingCriteria.coerce(stopping, self.STOPPING)
 
         height, width = pixels.shape
         logger.debug(f"[coverage] Starting generate — anchors={n_anchors}, strings={n_strings}")
 
-        # 1. Build darkness map: (0=white → 1=black)
-        target = (255.0 - pixels.astype(np.float32)) / 255.0
-        target_flat = target.ravel()
-        logger.debug("[coverage] Built darkness map")
-
-        # 2. Generate our anchor coordinates
-        anchors = generate_radial_anchors(n_anchors, width, height, logger=logger)
-        anchors_arr = np.array(anchors, dtype=float)
-        logger.debug(f"[coverage] Generated {len(anchors)} anchors")
-
-        # 3. Edge-detect + Hough to get a small set of segments
-        edges = canny(pixels / 255.0)
-        segments = probabilistic_hough_line(
-            edges,
-            threshold=self.HOUGH_THRESHOLD,
-            line_length=self.HOUGH_LINE_LENGTH,
-            line_gap=self.HOUGH_LINE_GAP
-        )
-        logger.debug(f"[coverage] Detected {len(segments)} Hough segments")
-
-        # 4. Snap each segment’s endpoints to nearest anchor index
-        pair_set = set()
-        for (p0, p1) in segments:
-            p0, p1 = np.array(p0), np.array(p1)
-            i = int(np.linalg.norm(anchors_arr - p0, axis=1).argmin())
-            j = int(np.linalg.norm(anchors_arr - p1, axis=1).argmin())
-            if i != j:
-                pair_set.add((min(i, j), max(i, j)))
-        all_pairs = list(pair_set)
-        logger.debug(f"[coverage] Snapped segments → {len(all_pairs)} unique anchor-pairs")
-
-        # If Hough gave too few candidates, fall back to full enumeration
-        if len(all_pairs) < 100:
-            all_pairs = [(i, j) for i in range(n_anchors) for j in range(i+1, n_anchors)]
-            logger.debug(f"[coverage] Fallback to full enumeration: {len(all_pairs)} pairs")
-
-        # 5. Precompute chord-lengths for normalization
-        lengths = np.array([
-            np.hypot(anchors[i][0] - anchors[j][0], anchors[i][1] - anchors[j][1])
-            for i, j in all_pairs
-        ], dtype=np.float32)
-        norm_factors = lengths ** self.ALPHA + 1e-6
-
-        # 6. Precompute binary masks only for this reduced set
-        masks_flat = []
-        for (i, j) in all_pairs:
-            img = Image.new('L', (width, height), color=0)
-            draw = ImageDraw.Draw(img)
-            draw.line([anchors[i], anchors[j]], fill=255, width=line_thickness)
-            masks_flat.append(np.array(img, dtype=bool).ravel())
-        logger.debug(f"[coverage] Precomputed {len(masks_flat)} masks")
-
-        # 7. Precompute raw coverage for subtraction
-        raw_cov = np.array([m.dot(target_flat) for m in masks_flat], dtype=np.float32)
+        with metrics.phase("setup"):
+            # 1. Build darkness map: (0=white → 1=black)
+            target = (255.0 - pixels.astype(np.float32)) / 255.0
+            target_flat = target.ravel()
+            logger.debug("[coverage] Built darkness map")
+
+            # 2. Anchors and chord masks, shared per canvas size
+            table = chord_table(n_anchors, width, height, line_thickness)
+            logger.debug(f"[coverage] Loaded chord table for {n_anchors} anchors")
+
+        if continuous:
+            # a continuous thread may need any chord from its current nail,
+            # so wind over the full table instead of the Hough subset
+            all_pairs = table.pairs
+            masks = table.masks
+            lengths = table.lengths
+        else:
+            if resume is not None:
+                rows = resume.state["rows"]
+            else:
+                with metrics.phase("candidates"):
+                    rows = self._candidate_rows(pixels, table, logger)
+
+            # 5–6. Chord lengths and masks for just this reduced set
+            all_pairs = [table.pairs[k] for k in rows]
+            masks = table.masks[rows]
+            lengths = table.lengths[rows]
+
+        with metrics.phase("setup"):
+            norm_factors = lengths ** self.ALPHA + 1e-6
+
+            # 7. Precompute raw coverage for subtraction
+            raw_cov = (masks @ target_flat).astype(np.float32)
 
         # 8. Iteratively pick the best line (normalized), subtract from residual
         vectors: List[Dict[str, int]] = []
         residual = target_flat.copy()
+        nail = start_nail
+        used = np.zeros(len(all_pairs), dtype=bool)
+        spent = np.zeros(len(all_pairs), dtype=bool)
+        if resume is not None:
+            vectors = list(resume.vectors)
+            residual = resume.state["residual"].copy()
+            nail = resume.state["nail"]
+            used[resume.state["used"]] = True
+            logger.debug(f"[coverage] Resuming after {len(vectors)} strings")
+        scorer = None
+        if scoring == "radon":
+            from ..radon import RadonScorer
+            with metrics.phase("setup"):
+                scorer = RadonScorer(table, residual)
+        metrics.gauge("error", residual.dot(residual))
+        converged.start(residual.dot(residual))
+        if resume is not None:
+            converged.set_state(resume.state.get("stopping"))
         logger.debug("[coverage] Beginning iterative picks")
 
-        for k in range(n_strings):
-            raw_scores = np.array([m.dot(residual) for m in masks_flat], dtype=np.float32)
-            scores = raw_scores / norm_factors
-            best_idx = int(np.argmax(scores))
-            if scores[best_idx] <= 0:
+        for k in range(len(vectors), n_strings):
+            cancel.raise_if_cancelled()
+            if budget.expired():
+                logger.info(f"[coverage] Time budget exhausted after {len(vectors)} strings")
+                metrics.stop("time_budget")
+                break
+
+            with metrics.phase("scoring"):
+                if continuous:
+                    # only the chords leaving the current nail
+                    candidates, _ = table.chords_from(nail, min_skip)
+                    if no_repeat:
+                        candidates = candidates[~used[candidates]]
+                    if not len(candidates):
+                        logger.debug(f"[coverage] No eligible chords from nail {nail}; stopping")
+                        metrics.stop("no_chords")
+                        break
+                    if scorer is None:
+                        raw_scores = (masks[candidates] @ residual).astype(np.float32)
+                    else:
+                        raw_scores = scorer.scores(candidates)
+                    scores = raw_scores / norm_factors[candidates]
+                else:
+                    candidates = np.arange(len(all_pairs))
+                    if scorer is None:
+                        raw_scores = (masks @ residual).astype(np.float32)
+                    else:
+                        raw_scores = scorer.scores(rows)
+                    scores = raw_scores / norm_factors
+                if scorer is not None:
+                    scores[spent[candidates]] = -np.inf
+                best = int(np.argmax(scores))
+                if scorer is not None:
+                    # the sinogram can credit a chord for darkness beside it;
+                    # one whose own pixels have none left never will again
+                    while scores[best] > 0 and not residual[masks.indices[
+                            masks.indptr[candidates[best]]:masks.indptr[candidates[best] + 1]]].any():
+                        spent[candidates[best]] = True
+                        scores[best] = -np.inf
+                        best = int(np.argmax(scores))
+                best_idx = int(candidates[best])
+            metrics.count("candidates_evaluated", len(candidates))
+            if scores[best] <= 0:
                 logger.debug(f"[coverage] No positive score at iteration {k}; stopping")
+                metrics.stop("no_improvement")
                 break
 
-            i, j = all_pairs[best_idx]
-            vectors.append({"from": i, "to": j})
-            logger.debug(f"[coverage] Pick {k+1}: chord ({i},{j}) score={scores[best_idx]:.4f}")
+            with metrics.phase("commit"):
+                i, j = all_pairs[best_idx]
+                if continuous and i != nail:
+                    i, j = j, i  # thread runs from the current nail
+                vectors.append({"from": i, "to": j})
+                logger.debug("[coverage] Pick %d: chord (%d,%d) score=%.4f", k + 1, i, j, scores[best])
 
-            # stream this vector if a callback was provided
-            if vector_callback:
-                vector_callback(i, j)
+                # stream this vector if a callback was provided
+                if vector_callback:
+                    vector_callback(i, j)
 
-            # subtract proportional to raw coverage
-            residual = np.maximum(
-                residual - masks_flat[best_idx] * (raw_scores[best_idx] / raw_cov[best_idx]),
-                0.0
-            )
+                # subtract proportional to raw coverage, on the chord's pixels only
+                px = masks.indices[masks.indptr[best_idx]:masks.indptr[best_idx + 1]]
+                if scorer is None:
+                    residual[px] = np.maximum(residual[px] - raw_scores[best] / raw_cov[best_idx], 0.0)
+                else:
+                    # the exact (mask) coverage sets the amount subtracted
+                    updated = np.maximum(residual[px] - residual[px].sum() / raw_cov[best_idx], 0.0)
+                    scorer.update(px, updated - residual[px])
+                    residual[px] = updated
+                used[best_idx] = True
+                nail = j
+                error = residual.dot(residual)
+                metrics.gauge("error", error)
+                metrics.commit()
+
+            reason = converged.check(error)
+            if reason:
+                logger.info(f"[coverage] Converged ({reason}) after {len(vectors)} strings")
+                metrics.stop(reason)
+                break
 
         logger.debug(f"[coverage] Completed with {len(vectors)} vectors")
+        if checkpoint_callback:
+            checkpoint_callback({
+                "residual": residual,
+                "rows": None if continuous else rows,
+                "used": np.flatnonzero(used),
+                "nail": nail,
+                "stopping": converged.get_state(),
+            })
+        metrics.finish()
         return vectors
+
+    def generate_batch(
+        self,
+        images: Sequence[np.ndarray],
+        n_anchors: int = 180,
+        n_strings: int = 200,
+        line_thickness: int = 1,
+        sample_pairs: int = 1000,  # unused here
+        logger: Optional[logging.Logger] = None,
+        *,
+        vector_callback: Optional[Callable[[int, int, int], None]] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        deadline: Optional[float] = None,
+        time_budget: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        checkpoint_callback: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+        **options: Any
+    ) -> List[List[Dict[str, int]]]:
+        """
+        Run every image in lockstep: their residuals are the columns of one
+        pixels × images matrix, scored against the union of their candidate
+        chords in a single sparse × dense product per iteration. Each image
+        still only picks from its own candidates, so the results match
+        running generate() on each. Continuous winding, Radon scoring and
+        images of mixed sizes fall back to one image at a time. Each image
+        has its own stopping criteria and drops out of the batch once they
+        fire; the batch's stop reason is that of the last image running.
+        Each image's checkpoint state is the one generate() would leave.
+        """
+        if logger is None:
+            logger = logging.getLogger(__name__)
+        if (options.get("continuous") or options.get("scoring", "masks") != "masks"
+                or len(images) < 2 or len({img.shape for img in images}) > 1):
+            return super().generate_batch(
+                images, n_anchors, n_strings, line_thickness, sample_pairs, logger,
+                vector_callback=vector_callback, progress_callback=progress_callback,
+                deadline=deadline, time_budget=time_budget, cancel_token=cancel_token,
+                checkpoint_callback=checkpoint_callback, **options,
+            )
+        metrics = self.start_metrics(progress_callback, logger)
+        budget = Deadline.coerce(deadline, time_budget)
+        cancel = CancellationToken.coerce(cancel_token)
+        converged = [StoppingCriteria.coerce(options.get("stopping"), self.STOPPING) for _ in images]
+
+        height, width = images[0].shape
+        n_images = len(images)
+        logger.debug(f"[coverage] Starting batch of {n_images} — anchors={n_anchors}, strings={n_strings}")
+
+        with metrics.phase("setup"):
+            # darkness maps as columns: (pixels × images)
+            targets = np.stack([(255.0 - img.astype(np.float32)).ravel() / 255.0 for img in images], axis=1)
+            table = chord_table(n_anchors, width, height, line_thickness)
+
+        with metrics.phase("candidates"):
+            per_image = [self._candidate_rows(img, table, logger) for img in images]
+            rows = np.unique(np.concatenate(per_image))
+            # allowed[r, b]: union row r is one of image b's candidates
+            allowed = np.stack([np.isin(rows, own) for own in per_image], axis=1)
+            logger.debug(f"[coverage] Batch scores {len(rows)} candidate chords (union)")
+
+        with metrics.phase("setup"):
+            all_pairs = [table.pairs[k] for k in rows]
+            masks = table.masks[rows]
+            norm_factors = (table.lengths[rows] ** self.ALPHA + 1e-6)[:, None]
+            raw_cov = (masks @ targets).astype(np.float32)
+
+        results: List[List[Dict[str, int]]] = [[] for _ in images]
+        used_rows: List[List[int]] = [[] for _ in images]
+        residual = targets.copy()
+        active = np.ones(n_images, dtype=bool)
+        errors = np.einsum("pb,pb->b", residual, residual)
+        for b, criteria in enumerate(converged):
+            criteria.start(errors[b])
+        metrics.gauge("error", errors.sum())
+
+        for k in range(n_strings):
+            cancel.raise_if_cancelled()
+            if budget.expired():
+                logger.info(f"[coverage] Time budget exhausted after {k} strings per image")
+                metrics.stop("time_budget")
+                break
+
+            with metrics.phase("scoring"):
+                raw_scores = (masks @ residual).astype(np.float32)
+                scores = np.where(allowed, raw_scores / norm_factors, -np.inf)
+                best = np.argmax(scores, axis=0)
+            metrics.count("candidates_evaluated", int(allowed[:, active].sum()))
+
+            with metrics.phase("commit"):
+                for b in np.flatnonzero(active):
+                    r = int(best[b])
+                    if scores[r, b] <= 0:
+                        logger.debug(f"[coverage] Image {b}: no positive score at iteration {k}; stopping")
+                        active[b] = False
+                        reason = "no_improvement"
+                        continue
+                    i, j = all_pairs[r]
+                    results[b].append({"from": i, "to": j})
+                    used_rows[b].append(rows[r])
+                    if vector_callback:
+                        vector_callback(int(b), i, j)
+                    px = masks.indices[masks.indptr[r]:masks.indptr[r + 1]]
+                    residual[px, b] = np.maximum(residual[px, b] - raw_scores[r, b] / raw_cov[r, b], 0.0)
+                    errors[b] = residual[:, b].dot(residual[:, b])
+                    reason = converged[b].check(errors[b])
+                    if reason:
+                        logger.debug(f"[coverage] Image {b}: converged ({reason}) after {k + 1} strings")
+                        active[b] = False
+                if not active.any():
+                    metrics.stop(reason)
+                    break
+                metrics.gauge("error", errors.sum())
+                metrics.commit()
+
+        logger.debug(f"[coverage] Batch completed with {[len(v) for v in results]} vectors")
+        if checkpoint_callback:
+            for b, own in enumerate(per_image):
+                checkpoint_callback(b, {
+                    "residual": np.ascontiguousarray(residual[:, b]),
+                    "rows": own,
+                    "used": np.flatnonzero(np.isin(own, used_rows[b])),
+                    "nail": results[b][-1]["to"] if results[b] else 0,
+                    "stopping": converged[b].get_state(),
+                })
+        metrics.finish()
+        return results
@@ -1,16 +1,72 @@
 # stringart_app/image_to_vector_algorithms/graph_optimisation.py
 
+import math
+import subprocess
 import numpy as np
-from typing import List, Dict, Optional, Callable
-from PIL import Image, ImageDraw
+from typing import Any, List, Dict, Optional, Callable
 
 from .base import StringArtAlgorithm
-from ..renderer import generate_radial_anchors
+from ..chords import chord_table
+from ..control import CancellationToken, Deadline, StoppingCriteria
 import logging
 
 # This algorithm requires PuLP: pip install pulp
 import pulp
 
+# Seconds between cancellation checks while CBC is solving
+CANCEL_POLL_INTERVAL = 0.05
+
+
+def solve_cancellable(
+    prob: "pulp.LpProblem",
+    cancel: CancellationToken,
+    time_limit: Optional[int] = None,
+    gap_rel: Optional[float] = None,
+) -> int:
+    """
+    Solve a MIP with PuLP's bundled CBC the way PULP_CBC_CMD does, but run
+    the solver as a child process that is killed (raising JobCancelled) as
+    soon as `cancel` is set, instead of blocking until CBC finishes.
+    Returns the PuLP status, with the variable values assigned.
+    """
+    solver = pulp.PULP_CBC_CMD(msg=False)
+    if not solver.executable(solver.path):
+        raise pulp.PulpSolverError(f"Pulp: cannot execute {solver.path}")
+    tmp_mps, tmp_sol = solver.create_tmp_files(prob.name, "mps", "sol")
+    try:
+        vs, variable_names, constraint_names, _ = prob.writeMPS(tmp_mps, rename=1)
+        args = [solver.path, tmp_mps]
+        if prob.sense == pulp.LpMaximize:
+            args.append("-max")
+        if time_limit is not None:
+            args += ["-sec", str(time_limit)]
+        if gap_rel is not None:
+            args += ["-ratio", str(gap_rel)]
+        args += ["-branch", "-printingOptions", "all", "-solution", tmp_sol]
+
+        cbc = subprocess.Popen(args, stdin=subprocess.DEVNULL,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        while True:
+            try:
+                returncode = cbc.wait(timeout=CANCEL_POLL_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                if cancel.cancelled:
+                    cbc.kill()
+                    cbc.wait()
+                    cancel.raise_if_cancelled()
+        if returncode != 0:
+            raise pulp.PulpSolverError(f"Pulp: CBC exited with status {returncode}")
+
+        status, values, _, _, _, sol_status = solver.readsol_MPS(
+            tmp_sol, prob, vs, variable_names, constraint_names
+        )
+        prob.assignVarsVals(values)
+        prob.assignStatus(status, sol_status)
+        return status
+    finally:
+        solver.delete_tmp_files(tmp_mps, tmp_sol)
+
 
 class GraphOptimisationAlgorithm(StringArtAlgorithm):
     """
@@ -30,69 +86,97 @@ class GraphOptimisationAlgorithm(StringArtAlgorithm):
         sample_pairs: int = 1000,  # unused, kept for signature compatibility
         logger: Optional[logging.Logger] = None,
         *,
-        vector_callback: Optional[Callable[[int, int], None]] = None
+        vector_callback: Optional[Callable[[int, int], None]] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        deadline: Optional[float] = None,
+        time_budget: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        stopping: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, int]]:
+        """
+        The solver has no steps to watch, so of the stopping criteria only a
+        plateau test applies: its `plateau_ratio` becomes CBC's relative
+        optimality gap, accepting an incumbent that close to the bound.
+        """
         if logger is None:
             logger = logging.getLogger(__name__)
+        metrics = self.start_metrics(progress_callback, logger)
+        budget = Deadline.coerce(deadline, time_budget)
+        cancel = CancellationToken.coerce(cancel_token)
+        converged = StoppingCriteria.coerce(stopping, self.STOPPING)
 
         height, width = pixels.shape
         logger.debug(f"[graph_optimisation] Starting generate — anchors={n_anchors}, strings={n_strings}")
 
-        # 1. Build darkness map: 0 (white) → 1 (black)
-        target = (255.0 - pixels.astype(np.float32)) / 255.0
-        logger.debug("[graph_optimisation] Built darkness map")
-
-        # 2. Generate anchors
-        anchors = generate_radial_anchors(n_anchors, width, height, logger=logger)
-        logger.debug(f"[graph_optimisation] Generated {len(anchors)} anchors")
-
-        # 3. Enumerate all possible anchor-pairs
-        all_pairs = [(i, j) for i in range(n_anchors) for j in range(i + 1, n_anchors)]
-        n_pairs = len(all_pairs)
-        logger.debug(f"[graph_optimisation] Enumerated {n_pairs} anchor-pairs")
-
-        # 4. Precompute coverage for each pair
-        masks = []
-        coverage = []
-        target_flat = target.ravel()
-        logger.debug("[graph_optimisation] Precomputing coverage for each pair")
-        for idx, (i, j) in enumerate(all_pairs, start=1):
-            img = Image.new('L', (width, height), color=0)
-            draw = ImageDraw.Draw(img)
-            draw.line([anchors[i], anchors[j]], fill=255, width=line_thickness)
-            mask = np.array(img, dtype=bool).ravel()
-            masks.append(mask)
-            cov = float(mask.dot(target_flat))
-            coverage.append(cov)
-            if idx % 5000 == 0:
-                logger.debug(f"[graph_optimisation] Processed {idx}/{n_pairs} pairs")
-
-        # 5. Set up the ILP
-        logger.debug("[graph_optimisation] Setting up integer linear program (ILP)")
-        prob = pulp.LpProblem("StringArt_MaxCoverage", pulp.LpMaximize)
-        x = [pulp.LpVariable(f"x_{k}", cat="Binary") for k in range(n_pairs)]
-
-        # Objective: maximize sum coverage[k] * x[k]
-        prob += pulp.lpSum(coverage[k] * x[k] for k in range(n_pairs)), "TotalCoverage"
-
-        # Constraint: pick exactly n_strings lines
-        prob += pulp.lpSum(x) == n_strings, "NumStrings"
-
-        # 6. Solve
-        logger.debug("[graph_optimisation] Solving ILP...")
-        solver = pulp.PULP_CBC_CMD(msg=False)  # silent CBC solver
-        prob.solve(solver)
-        logger.debug(f"[graph_optimisation] Solver status: {pulp.LpStatus[prob.status]}")
+        with metrics.phase("setup"):
+            # 1. Build darkness map: 0 (white) → 1 (black)
+            target = (255.0 - pixels.astype(np.float32)) / 255.0
+            logger.debug("[graph_optimisation] Built darkness map")
+
+            # 2. Anchors and chord masks, shared per canvas size
+            table = chord_table(n_anchors, width, height, line_thickness)
+            logger.debug(f"[graph_optimisation] Loaded chord table for {len(table.anchors)} anchors")
+
+        with metrics.phase("candidates"):
+            # 3. Enumerate all possible anchor-pairs
+            all_pairs = table.pairs
+            n_pairs = len(all_pairs)
+            logger.debug(f"[graph_optimisation] Enumerated {n_pairs} anchor-pairs")
+
+            # 4. Precompute coverage for each pair
+            target_flat = target.ravel()
+            coverage = (table.masks @ target_flat).tolist()
+        metrics.count("candidates_evaluated", n_pairs)
+
+        cancel.raise_if_cancelled()
+        with metrics.phase("scoring"):
+            if budget.expired():
+                # No time left for the solver; the objective is separable, so
+                # the top-n pairs by coverage are a valid (and optimal) pick.
+                logger.info("[graph_optimisation] Time budget exhausted before solving; taking top pairs")
+                metrics.stop("time_budget")
+                chosen = sorted(np.argsort(coverage)[::-1][:n_strings].tolist())
+            else:
+                # 5. Set up the ILP
+                logger.debug("[graph_optimisation] Setting up integer linear program (ILP)")
+                prob = pulp.LpProblem("StringArt_MaxCoverage", pulp.LpMaximize)
+                x = [pulp.LpVariable(f"x_{k}", cat="Binary") for k in range(n_pairs)]
+
+                # Objective: maximize sum coverage[k] * x[k]
+                prob += pulp.lpSum(coverage[k] * x[k] for k in range(n_pairs)), "TotalCoverage"
+
+                # Constraint: pick exactly n_strings lines
+                prob += pulp.lpSum(x) == n_strings, "NumStrings"
+
+                # 6. Solve, stopping CBC at the deadline with its best
+                # incumbent, or killing it as soon as the job is cancelled
+                logger.debug("[graph_optimisation] Solving ILP...")
+                remaining = budget.remaining()
+                solve_cancellable(
+                    prob,
+                    cancel,
+                    time_limit=None if remaining is None else max(1, math.ceil(remaining)),
+                    gap_rel=converged.plateau_ratio if converged.plateau_window else None,
+                )
+                logger.debug(f"[graph_optimisation] Solver status: {pulp.LpStatus[prob.status]}")
+                chosen = [k for k, var in enumerate(x) if (pulp.value(var) or 0) >= 0.5]
 
         # 7. Extract solution
         vectors: List[Dict[str, int]] = []
-        for k, var in enumerate(x):
-            val = pulp.value(var)
-            if val is not None and val >= 0.5:
+        with metrics.phase("commit"):
+            for k in chosen:
                 i, j = all_pairs[k]
                 vectors.append({"from": i, "to": j})
                 if vector_callback:
                     vector_callback(i, j)
-
+                metrics.commit()
+
+        # squared error of the rendered result: overlapping strings darken
+        # a pixel once, so the union of the masks, not their coverage sum
+        canvas_flat = np.full(target_flat.size, 255.0)
+        canvas_flat[table.masks[chosen].indices] = 0.0
+        residual = canvas_flat - pixels.astype(np.float64).ravel()
+        metrics.gauge("error", float(residual.dot(residual)))
         logger.debug(f"[graph_optimisation] Completed with {len(vectors)} vectors")
+        metrics.finish()
         return vectors
@@ -1,14 +1,15 @@
 # stringart_app/image_to_vector_algorithms/greedy.py
 
-import time
 import logging
-from typing import List, Dict, Optional, Callable
+from typing import Any, List, Dict, Optional, Callable, Sequence, Tuple
 
 import numpy as np
-from PIL import Image, ImageDraw
 
 from .base import StringArtAlgorithm
-from ..renderer import generate_radial_anchors
+from .. import kernels
+from ..checkpoints import Checkpoint
+from ..chords import chord_table
+from ..control import CancellationToken, Deadline, StoppingCriteria
 
 
 class GreedyAlgorithm(StringArtAlgorithm):
@@ -19,6 +20,13 @@ class GreedyAlgorithm(StringArtAlgorithm):
     # prune percentile (10th)
     PRUNE_PCT = 10
 
+    SUPPORTS_CONTINUOUS = True
+    SUPPORTS_CANDIDATES = True
+    SUPPORTS_RESUME = True
+    PREFIX_RESULTS = True
+    SCORING_ENGINES = ("masks", "radon")
+    STOPPING = {"plateau_window": 50, "plateau_ratio": 0.002}
+
     def generate(
         self,
         pixels: np.ndarray,
@@ -28,140 +36,251 @@ class GreedyAlgorithm(StringArtAlgorithm):
         sample_pairs: int = 1000,
         logger: Optional[logging.Logger] = None,
         *,
-        vector_callback: Optional[Callable[[int, int], None]] = None
+        vector_callback: Optional[Callable[[int, int], None]] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        deadline: Optional[float] = None,
+        time_budget: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        continuous: bool = False,
+        start_nail: int = 0,
+        min_skip: int = 0,
+        no_repeat: bool = False,
+        candidate_pairs: Optional[Sequence[Tuple[int, int]]] = None,
+        seed: Optional[int] = None,
+        resume: Optional[Checkpoint] = None,
+        checkpoint_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        scoring: str = "masks",
+        stopping: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, int]]:
+        """
+        With `continuous`, wind one thread from `start_nail`: every string
+        leaves the nail the previous one ended on, and each step scores only
+        that nail's chords. `min_skip` rules out chords to nails closer than
+        that many positions; `no_repeat` uses each chord at most once.
+
+        `candidate_pairs` restricts the search to those chords (ignored when
+        winding, which needs every chord from the current nail).
+
+        `seed` seeds the candidate sampling. `resume` continues a checkpoint
+        of an earlier run up to n_strings in total, streaming only the new
+        vectors; `checkpoint_callback` receives the state to resume from
+        (the drawn canvas, pruned candidate rows, current nail, RNG state).
+
+        `scoring="radon"` reads both the sampling weights and the gains from
+        Radon transforms (see radon.py) instead of the masks. Its gains are
+        the exact squared-error change, without the int16 wrap-around of
+        the mask scoring, so its picks differ.
+        """
         if logger is None:
             logger = logging.getLogger(__name__)
+        if scoring not in self.SCORING_ENGINES:
+            raise ValueError(f"Unknown scoring engine '{scoring}'. Valid options: {', '.join(self.SCORING_ENGINES)}")
+        metrics = self.start_metrics(progress_callback, logger)
+        budget = Deadline.coerce(deadline, time_budget)
+        cancel = CancellationToken.coerce(cancel_token)
+        converged = StoppingCriteria.coerce(stopping, self.STOPPING)
 
         logger.debug(
             f"[greedy] Starting: anchors={n_anchors}, strings={n_strings}, "
             f"thickness={line_thickness}, samples={sample_pairs}"
         )
-        start_time = time.time()
-
-        height, width = pixels.shape
-        # canvas initialized white (255)
-        canvas: np.ndarray = np.full_like(pixels, 255, dtype=np.int16)
-
-        # 1. Generate anchors
-        anchors = generate_radial_anchors(n_anchors, width, height, logger=logger)
-        logger.debug(f"[greedy] Generated {len(anchors)} anchors")
-
-        # 2. Precompute all anchor‐pairs and their chord lengths
-        all_pairs = [(i, j) for i in range(n_anchors) for j in range(i + 1, n_anchors)]
-        lengths = np.array([
-            np.hypot(anchors[i][0] - anchors[j][0], anchors[i][1] - anchors[j][1])
-            for i, j in all_pairs
-        ], dtype=np.float32)
-        norm_factors = lengths ** self.ALPHA + 1e-6
-        logger.debug(f"[greedy] Prepared {len(all_pairs)} candidate chords")
-
-        # 3. Precompute binary masks for each line
-        masks_flat = []
-        for (i, j) in all_pairs:
-            img = Image.new('L', (width, height), color=0)
-            draw = ImageDraw.Draw(img)
-            draw.line([anchors[i], anchors[j]], fill=255, width=line_thickness)
-            masks_flat.append(np.array(img, dtype=bool).ravel())
-        logger.debug(f"[greedy] Precomputed {len(masks_flat)} masks")
-
-        # 4. Precompute static coverage (for pruning)
-        target_flat = pixels.astype(np.float32).ravel()
-        static_cover = np.array([m.dot(target_flat) for m in masks_flat], dtype=np.float32)
-
-        before_error = np.sum((canvas - pixels) ** 2)
-        logger.debug(f"[greedy] Initial SSE error: {before_error:.1f}")
+
+        with metrics.phase("setup"):
+            height, width = pixels.shape
+            # canvas initialized white (255)
+            canvas: np.ndarray = np.full_like(pixels, 255, dtype=np.int16)
+
+            # 1–3. Candidate chords, their lengths and pixel masks,
+            # shared with other runs on the same canvas size
+            table = chord_table(n_anchors, width, height, line_thickness)
+            all_pairs = list(table.pairs)
+            pair_index = table.pair_index
+            pair_ends = np.array(all_pairs, dtype=np.intp).reshape(-1, 2)
+            norm_factors = table.lengths ** self.ALPHA + 1e-6
+            masks = table.masks
+            # table rows still in play, narrowed by candidates and pruning
+            rows = np.arange(len(table))
+            if resume is not None:
+                rows = resume.state["rows"]
+            elif candidate_pairs and not continuous:
+                rows = table.rows(candidate_pairs)
+            if len(rows) < len(table):
+                all_pairs = [all_pairs[k] for k in rows]
+                pair_index = {p: k for k, p in enumerate(all_pairs)}
+                pair_ends = pair_ends[rows]
+                norm_factors = norm_factors[rows]
+                masks = masks[rows]
+            logger.debug(f"[greedy] Prepared {len(all_pairs)} candidate chords")
+
+            # 4. Precompute static coverage (for pruning)
+            target_flat = pixels.astype(np.float32).ravel()
+            static_cover = (masks @ target_flat).astype(np.float32)
+
+            canvas_flat = canvas.ravel()
+            if resume is not None:
+                canvas_flat[np.unpackbits(resume.state["black"], count=canvas_flat.size).astype(bool)] = 0
+            pixels_flat = pixels.astype(np.int16).ravel()
+            # the error is summed in int64 for the gauge and the stopping
+            # tests alike; the int16 mask gains wrap, so they can't track it
+            error = np.sum((canvas - pixels).astype(np.int64) ** 2)
+            metrics.gauge("error", error)
+            logger.debug(f"[greedy] Initial SSE error: {error:.1f}")
+            converged.start(error)
+
+            darkness_scorer = gain_scorer = None
+            if scoring == "radon":
+                from ..radon import RadonScorer
+                # line integrals of the residual (for sampling) and of the
+                # gain of blackening each still-white pixel (for scoring)
+                white = canvas_flat == 255
+                target = pixels_flat.astype(np.float64)
+                darkness_scorer = RadonScorer(table, np.where(white, 255.0 - target, 0.0))
+                gain_scorer = RadonScorer(table, np.where(white, 255.0 * (255.0 - 2.0 * target), 0.0))
 
         vectors: List[Dict[str, int]] = []
+        nail = start_nail
+        used = np.zeros(len(all_pairs), dtype=bool)
+        rng = np.random.RandomState(seed)
+        if resume is not None:
+            vectors = list(resume.vectors)
+            nail = resume.state["nail"]
+            # checkpoints name used chords by table row, not pruned position
+            used[np.isin(rows, resume.state["used_rows"])] = True
+            rng.set_state(resume.state["rng"])
+            converged.set_state(resume.state.get("stopping"))
+            logger.debug(f"[greedy] Resuming after {len(vectors)} strings")
 
         # 5. Main greedy loop
-        for iteration in range(n_strings):
-            logger.debug(f"[greedy] Iteration {iteration+1}/{n_strings}")
-
-            # residual: where canvas is brighter than target
-            residual_flat = (canvas - pixels.astype(np.int16)).clip(min=0).ravel()
-
-            # smart sampling: endpoint darkness
-            anchor_darkness = np.zeros(n_anchors, dtype=np.float32)
-            for idx, (i, j) in enumerate(all_pairs):
-                d = masks_flat[idx].dot(residual_flat)
-                anchor_darkness[i] += d
-                anchor_darkness[j] += d
-
-            probs = anchor_darkness / (anchor_darkness.sum() + 1e-6)
-
-            a_choices = np.random.choice(n_anchors, sample_pairs, p=probs)
-            b_choices = np.random.choice(n_anchors, sample_pairs, p=probs)
-
-            candidate_idxs = []
-            seen = set()
-            for a, b in zip(a_choices, b_choices):
-                if a == b:
-                    continue
-                pair = (min(a, b), max(a, b))
-                try:
-                    k = all_pairs.index(pair)
-                except ValueError:
-                    continue
-                if k not in seen:
-                    seen.add(k)
-                    candidate_idxs.append(k)
-
-            if not candidate_idxs:
-                candidate_idxs = list(range(len(all_pairs)))
-
-            best_norm_score = 0.0
-            best_improvement = 0.0
-            best_pair = None
-            best_canvas = None  # type: ignore
-
-            # evaluate candidates
-            for k in candidate_idxs:
-                i_idx, j_idx = all_pairs[k]
-                temp = Image.fromarray(canvas.astype(np.uint8))
-                draw = ImageDraw.Draw(temp)
-                draw.line([anchors[i_idx], anchors[j_idx]], fill=0, width=line_thickness)
-                temp_canvas = np.array(temp, dtype=np.int16)
-
-                after_error = np.sum((temp_canvas - pixels) ** 2)
-                imp = before_error - after_error
-                if imp <= 0:
-                    continue
-
-                norm_score = imp / norm_factors[k]
-                if norm_score > best_norm_score:
-                    best_norm_score = norm_score
-                    best_improvement = imp
-                    best_pair = (i_idx, j_idx)
-                    best_canvas = temp_canvas
+        for iteration in range(len(vectors), n_strings):
+            cancel.raise_if_cancelled()
+            if budget.expired():
+                logger.info(f"[greedy] Time budget exhausted after {len(vectors)} strings")
+                metrics.stop("time_budget")
+                break
+
+            if continuous:
+                with metrics.phase("candidates"):
+                    candidate_idxs, _ = table.chords_from(nail, min_skip)
+                    if no_repeat:
+                        candidate_idxs = candidate_idxs[~used[candidate_idxs]]
+                    candidate_idxs = candidate_idxs.tolist()
+                if not candidate_idxs:
+                    logger.debug(f"[greedy] No eligible chords from nail {nail}; stopping")
+                    metrics.stop("no_chords")
+                    break
+            else:
+                with metrics.phase("candidates"):
+                    if darkness_scorer is None:
+                        # residual: where canvas is brighter than target
+                        residual_flat = (canvas - pixels.astype(np.int16)).clip(min=0).ravel()
+                        d = masks @ residual_flat
+                    else:
+                        d = np.maximum(darkness_scorer.scores(rows), 0.0)
+
+                    # smart sampling: endpoint darkness
+                    anchor_darkness = np.zeros(n_anchors, dtype=np.float32)
+                    np.add.at(anchor_darkness, pair_ends[:, 0], d)
+                    np.add.at(anchor_darkness, pair_ends[:, 1], d)
+
+                    probs = anchor_darkness / (anchor_darkness.sum() + 1e-6)
+
+                    a_choices = rng.choice(n_anchors, sample_pairs, p=probs)
+                    b_choices = rng.choice(n_anchors, sample_pairs, p=probs)
+
+                    candidate_idxs = []
+                    seen = set()
+                    for a, b in zip(a_choices, b_choices):
+                        if a == b:
+                            continue
+                        pair = (min(a, b), max(a, b))
+                        k = pair_index.get(pair)
+                        if k is None:
+                            continue
+                        if k not in seen:
+                            seen.add(k)
+                            candidate_idxs.append(k)
+
+                    if not candidate_idxs:
+                        candidate_idxs = list(range(len(all_pairs)))
+
+            # evaluate candidates: only a chord's own pixels change when it
+            # is drawn in black, so score each over its pixels alone
+            with metrics.phase("scoring"):
+                candidates = np.asarray(candidate_idxs, dtype=np.int64)
+                if gain_scorer is None:
+                    gains = kernels.chord_gains(canvas_flat, pixels_flat, masks.indptr, masks.indices, candidates)
+                else:
+                    gains = gain_scorer.scores(rows[candidates])
+                norm_scores = np.where(gains > 0, gains / norm_factors[candidates], 0.0)
+                best = int(np.argmax(norm_scores))
+                best_pair = None
+                if norm_scores[best] > 0:
+                    best_k = int(candidates[best])
+                    best_norm_score = norm_scores[best]
+                    best_improvement = gains[best]
+                    best_pair = all_pairs[best_k]
+                    if continuous and best_pair[0] != nail:
+                        best_pair = best_pair[::-1]  # thread runs from the current nail
+            metrics.count("candidates_evaluated", len(candidates))
 
             if best_pair is None:
                 logger.debug(f"[greedy] No further improvement; stopping at iteration {iteration+1}")
+                metrics.stop("no_improvement")
+                break
+
+            with metrics.phase("commit"):
+                # commit best pick
+                px = masks.indices[masks.indptr[best_k]:masks.indptr[best_k + 1]]
+                if gain_scorer is not None:
+                    fresh = px[canvas_flat[px] == 255]
+                    target = pixels_flat[fresh].astype(np.float64)
+                    darkness_scorer.update(fresh, target - 255.0)
+                    gain_scorer.update(fresh, -255.0 * (255.0 - 2.0 * target))
+                canvas_flat[px] = 0
+                vectors.append({"from": best_pair[0], "to": best_pair[1]})
+                logger.debug(
+                    "[greedy] Picked chord %s ΔSSE=%.1f norm_score=%.4f",
+                    best_pair, best_improvement, best_norm_score
+                )
+
+                # stream this vector if callback provided
+                if vector_callback:
+                    vector_callback(best_pair[0], best_pair[1])
+
+                used[best_k] = True
+                nail = best_pair[1]
+                error = np.sum((canvas - pixels).astype(np.int64) ** 2)
+                metrics.gauge("error", error)
+                metrics.commit()
+
+                # pruning (not when winding: the per-nail index addresses the full table)
+                if not continuous and len(vectors) % self.PRUNE_K == 0:
+                    thresh = np.percentile(static_cover, self.PRUNE_PCT)
+                    keep = static_cover >= thresh
+                    all_pairs = [p for p, k in zip(all_pairs, keep) if k]
+                    rows = rows[keep]
+                    used = used[keep]
+                    pair_index = {p: k for k, p in enumerate(all_pairs)}
+                    pair_ends = pair_ends[keep]
+                    masks = masks[keep]
+                    norm_factors = norm_factors[keep]
+                    static_cover = static_cover[keep]
+                    logger.debug("[greedy] Pruned to %d candidates (threshold=%.2f)", len(all_pairs), thresh)
+
+            reason = converged.check(error)
+            if reason:
+                logger.info(f"[greedy] Converged ({reason}) after {len(vectors)} strings")
+                metrics.stop(reason)
                 break
 
-            # commit best pick
-            canvas = best_canvas  # type: ignore
-            vectors.append({"from": best_pair[0], "to": best_pair[1]})
-            logger.debug(
-                f"[greedy] Picked chord {best_pair} ΔSSE={best_improvement:.1f} norm_score={best_norm_score:.4f}"
-            )
-
-            # stream this vector if callback provided
-            if vector_callback:
-                vector_callback(best_pair[0], best_pair[1])
-
-            before_error -= best_improvement
-
-            # pruning
-            if len(vectors) % self.PRUNE_K == 0:
-                thresh = np.percentile(static_cover, self.PRUNE_PCT)
-                keep = static_cover >= thresh
-                all_pairs = [p for p, k in zip(all_pairs, keep) if k]
-                masks_flat = [m for m, k in zip(masks_flat, keep) if k]
-                norm_factors = norm_factors[keep]
-                static_cover = static_cover[keep]
-                logger.debug(f"[greedy] Pruned to {len(all_pairs)} candidates (threshold={thresh:.2f})")
-
-        elapsed = time.time() - start_time
-        logger.debug(f"[greedy] Done in {elapsed:.2f}s; total picks={len(vectors)}")
+        if checkpoint_callback:
+            checkpoint_callback({
+                "black": np.packbits(canvas_flat == 0),
+                "rows": rows,
+                "used_rows": rows[used],
+                "nail": nail,
+                "rng": rng.get_state(),
+                "stopping": converged.get_state(),
+            })
+        metrics.finish()
         return vectors
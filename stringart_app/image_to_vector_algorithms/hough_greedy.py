@@ -1,18 +1,14 @@
 # stringart_app/image_to_vector_algorithms/hough_greedy.py
 
 import logging
-from typing import List, Dict, Tuple, Optional, Callable
+from typing import Any, List, Dict, Optional, Callable
 
 import numpy as np
-from PIL import Image, ImageDraw
-
-# you need scikit-image on your PYTHONPATH for these:
-# pip install scikit-image
-from skimage.feature import canny
-from skimage.transform import probabilistic_hough_line
 
 from .base import StringArtAlgorithm
-from ..renderer import generate_radial_anchors
+from ..candidates import HoughParams, hough_candidates
+from ..chords import chord_table
+from ..control import CancellationToken, Deadline, StoppingCriteria
 
 
 class HoughGreedyAlgorithm(StringArtAlgorithm):
@@ -20,6 +16,10 @@ class HoughGreedyAlgorithm(StringArtAlgorithm):
     1) Use a probabilistic Hough transform to select a small candidate set of lines.
     2) Greedily pick the line that most reduces squared‐error at each step.
     """
+    HOUGH = HoughParams(sigma=2.0, threshold=10, line_length=30, line_gap=5)
+
+    PREFIX_RESULTS = True
+    STOPPING = {"plateau_window": 50, "plateau_ratio": 0.002}
 
     def generate(
         self,
@@ -30,102 +30,94 @@ class HoughGreedyAlgorithm(StringArtAlgorithm):
         sample_pairs: int = 1000,  # unused here
         logger: Optional[logging.Logger] = None,
         *,
-        vector_callback: Optional[Callable[[int, int], None]] = None
+        vector_callback: Optional[Callable[[int, int], None]] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        deadline: Optional[float] = None,
+        time_budget: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        stopping: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, int]]:
         if logger is None:
             logger = logging.getLogger(__name__)
+        metrics = self.start_metrics(progress_callback, logger)
+        budget = Deadline.coerce(deadline, time_budget)
+        cancel = CancellationToken.coerce(cancel_token)
+        converged = StoppingCriteria.coerce(stopping, self.STOPPING)
 
         height, width = pixels.shape
         logger.debug(f"[hough_greedy] Starting with {n_anchors} anchors and {n_strings} strings")
 
-        # 1) Edge‐detect
-        edges: np.ndarray = canny(pixels / 255.0, sigma=2.0)
-        logger.debug(f"[hough_greedy] Detected edges")
-
-        # 2) Hough → list of ((x0,y0),(x1,y1)) segments
-        lines: List[Tuple[Tuple[float, float], Tuple[float, float]]] = \
-            probabilistic_hough_line(edges,
-                                     threshold=10,
-                                     line_length=30,
-                                     line_gap=5)
-        logger.debug(f"[hough_greedy] Found {len(lines)} Hough line segments")
-
-        # 3) Anchor positions, as an (n_anchors × 2) array
-        anchors_list = generate_radial_anchors(n_anchors, width, height, logger=logger)
-        anchors_arr: np.ndarray = np.array(anchors_list, dtype=float)
-
-        # 4) Map each Hough segment to the nearest anchor‐pair
-        pairs: set[Tuple[int, int]] = set()
-        for (pt0, pt1) in lines:
-            p0 = np.array(pt0, dtype=float)
-            p1 = np.array(pt1, dtype=float)
-
-            d0 = np.linalg.norm(anchors_arr - p0, axis=1)
-            d1 = np.linalg.norm(anchors_arr - p1, axis=1)
-
-            i = int(d0.argmin())
-            j = int(d1.argmin())
-            if i != j:
-                pairs.add((min(i, j), max(i, j)))
-
-        candidates: List[Tuple[int, int]] = list(pairs)
-        logger.debug(f"[hough_greedy] Reduced to {len(candidates)} candidate anchor pairs")
+        with metrics.phase("candidates"):
+            # 1–2) Edge-detect, Hough segments snapped to anchor pairs
+            # (shared, cached stage)
+            found = hough_candidates(pixels, n_anchors, self.HOUGH)
+            candidates = found.pairs
+            logger.debug(f"[hough_greedy] Found {found.n_segments} Hough line segments")
+            logger.debug(f"[hough_greedy] Reduced to {len(candidates)} candidate anchor pairs")
 
         if not candidates:
             logger.warning("[hough_greedy] No candidates found; returning empty vector list")
+            metrics.stop("no_chords")
+            metrics.finish()
             return []
 
-        # 5) Precompute binary masks for all candidate pairs
-        masks_flat = []
-        for (i, j) in candidates:
-            img = Image.new('L', (width, height), color=0)
-            draw = ImageDraw.Draw(img)
-            draw.line([anchors_list[i], anchors_list[j]], fill=255, width=line_thickness)
-            masks_flat.append(np.array(img, dtype=bool).ravel())
-
-        logger.debug(f"[hough_greedy] Precomputed {len(masks_flat)} masks")
+        with metrics.phase("setup"):
+            # 3) Masks for the candidate pairs, from the shared chord table
+            table = chord_table(n_anchors, width, height, line_thickness)
+            masks = table.masks[table.rows(candidates)]
+            logger.debug(f"[hough_greedy] Loaded {len(candidates)} masks")
 
-        # 6) Prepare mutable canvas and residual
-        canvas = np.full_like(pixels, 255, dtype=np.int16)
-        residual = (canvas - pixels).astype(np.float32).ravel()
+            # 4) Residual of a white canvas: how much darker the target is
+            residual = (255.0 - pixels.astype(np.float32)).ravel()
+            metrics.gauge("error", residual.dot(residual))
+            converged.start(residual.dot(residual))
 
         vectors: List[Dict[str, int]] = []
 
         for iteration in range(n_strings):
-            logger.debug(f"[hough_greedy] Iteration {iteration+1}/{n_strings}")
+            cancel.raise_if_cancelled()
+            if budget.expired():
+                logger.info(f"[hough_greedy] Time budget exhausted after {len(vectors)} strings")
+                metrics.stop("time_budget")
+                break
 
-            # Compute scores for all candidates
-            scores = np.array([mask.dot(residual) for mask in masks_flat], dtype=np.float32)
+            with metrics.phase("scoring"):
+                # Compute scores for all candidates
+                scores = (masks @ residual).astype(np.float32)
 
-            best_idx = int(np.argmax(scores))
-            best_score = scores[best_idx]
+                best_idx = int(np.argmax(scores))
+                best_score = scores[best_idx]
+            metrics.count("candidates_evaluated", len(candidates))
 
             if best_score <= 0:
                 logger.debug(f"[hough_greedy] No positive score at iteration {iteration+1}; stopping")
+                metrics.stop("no_improvement")
                 break
 
-            i, j = candidates[best_idx]
-            logger.debug(
-                f"[hough_greedy] Pick {iteration+1}: chord ({i},{j}) score={best_score:.2f}"
-            )
-
-            # Append and callback
-            vectors.append({"from": i, "to": j})
-            if vector_callback:
-                vector_callback(i, j)
-
-            # Draw the selected line onto the canvas
-            tmp_img = Image.fromarray(canvas.astype(np.uint8), mode='L')
-            draw = ImageDraw.Draw(tmp_img)
-            draw.line(
-                [tuple(anchors_list[i]), tuple(anchors_list[j])],
-                fill=0,
-                width=line_thickness
-            )
-            canvas = np.array(tmp_img, dtype=np.int16)
-
-            # Update residual
-            residual = (canvas - pixels).astype(np.float32).clip(min=0).ravel()
+            with metrics.phase("commit"):
+                i, j = candidates[best_idx]
+                logger.debug(
+                    "[hough_greedy] Pick %d: chord (%d,%d) score=%.2f", iteration + 1, i, j, best_score
+                )
+
+                # Append and callback
+                vectors.append({"from": i, "to": j})
+                if vector_callback:
+                    vector_callback(i, j)
+
+                # Draw the selected line: its pixels go black, so the
+                # canvas is no longer brighter than the target there
+                residual[masks.indices[masks.indptr[best_idx]:masks.indptr[best_idx + 1]]] = 0.0
+                error = residual.dot(residual)
+                metrics.gauge("error", error)
+                metrics.commit()
+
+            reason = converged.check(error)
+            if reason:
+                logger.info(f"[hough_greedy] Converged ({reason}) after {len(vectors)} strings")
+                metrics.stop(reason)
+                break
 
         logger.debug(f"[hough_greedy] Completed with {len(vectors)} vectors")
+        metrics.finish()
         return vectors
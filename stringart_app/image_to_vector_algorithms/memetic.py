@@ -2,12 +2,12 @@
 
 import random
 import logging
-from typing import List, Dict, Optional, Callable
+from typing import Any, List, Dict, Optional, Callable, Sequence, Tuple
 import numpy as np
-from PIL import Image, ImageDraw
 
 from .base import StringArtAlgorithm
-from ..renderer import generate_radial_anchors
+from ..chords import chord_table
+from ..control import CancellationToken, Deadline, StoppingCriteria
 
 
 class MemeticAlgorithm(StringArtAlgorithm):
@@ -20,6 +20,11 @@ class MemeticAlgorithm(StringArtAlgorithm):
     MUTATION_RATE = 0.1
     ELITE_FRACTION = 0.3  # fraction of population preserved without change
 
+    SUPPORTS_CANDIDATES = True
+    # generations without a better genome before giving up
+    STOPPING = {"max_stale": 15}
+    TUNABLES = {"pop_size": POP_SIZE, "generations": GENERATIONS}
+
     def generate(
         self,
         pixels: np.ndarray,
@@ -29,91 +34,138 @@ class MemeticAlgorithm(StringArtAlgorithm):
         sample_pairs: int = 1000,
         logger: Optional[logging.Logger] = None,
         *,
-        vector_callback: Optional[Callable[[int, int], None]] = None
+        vector_callback: Optional[Callable[[int, int], None]] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        deadline: Optional[float] = None,
+        time_budget: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        candidate_pairs: Optional[Sequence[Tuple[int, int]]] = None,
+        stopping: Optional[Dict[str, Any]] = None,
+        pop_size: Optional[int] = None,
+        generations: Optional[int] = None
     ) -> List[Dict[str, int]]:
+        """
+        `candidate_pairs` restricts genes to those chords, when there are at
+        least n_strings of them. `pop_size` and `generations` override
+        POP_SIZE and GENERATIONS.
+        """
+        pop_size = pop_size or self.POP_SIZE
+        generations = generations or self.GENERATIONS
         if logger is None:
             logger = logging.getLogger(__name__)
+        metrics = self.start_metrics(progress_callback, logger)
+        budget = Deadline.coerce(deadline, time_budget)
+        cancel = CancellationToken.coerce(cancel_token)
+        converged = StoppingCriteria.coerce(stopping, self.STOPPING)
 
         height, width = pixels.shape
         logger.debug(f"[memetic] Starting with anchors={n_anchors}, strings={n_strings}")
 
-        # Precompute anchors and all possible pairs
-        anchors = generate_radial_anchors(n_anchors, width, height, logger=logger)
-        all_pairs: List[tuple[int, int]] = [
-            (i, j) for i in range(n_anchors) for j in range(i + 1, n_anchors)
-        ]
-        genome_length = len(all_pairs)
-        logger.debug(f"[memetic] Total candidate pairs: {genome_length}")
-
-        # Precompute binary masks for all pairs
-        masks_flat = []
-        for (i, j) in all_pairs:
-            img = Image.new('L', (width, height), color=0)
-            draw = ImageDraw.Draw(img)
-            draw.line([anchors[i], anchors[j]], fill=255, width=line_thickness)
-            masks_flat.append(np.array(img, dtype=bool).ravel())
-        logger.debug(f"[memetic] Precomputed {len(masks_flat)} masks")
-
-        # Convert target to float array for SSE computation
-        target_flat = pixels.astype(np.float32).ravel()
+        with metrics.phase("setup"):
+            # All possible pairs and their pixel masks, shared per canvas size
+            table = chord_table(n_anchors, width, height, line_thickness)
+            all_pairs: List[tuple[int, int]] = table.pairs
+            # gene → chord index in the table
+            rows = np.arange(len(all_pairs))
+            if candidate_pairs and len(candidate_pairs) >= n_strings:
+                rows = table.rows(candidate_pairs)
+                all_pairs = [all_pairs[k] for k in rows]
+            elif candidate_pairs:
+                logger.debug(f"[memetic] Only {len(candidate_pairs)} candidates; using every pair")
+            genome_length = len(all_pairs)
+            logger.debug(f"[memetic] Total candidate pairs: {genome_length}")
+
+            # Convert target to float array for SSE computation
+            target_flat = pixels.astype(np.float32).ravel()
 
         def render_score(chrom: List[int]) -> float:
             """
             Draws each selected line onto a blank canvas and computes
             squared-error against the target image. Returns SSE as Python float.
             """
+            metrics.count("candidates_evaluated")
             canvas_flat = np.full_like(target_flat, 255.0, dtype=np.float32)
             for gene in chrom:
-                canvas_flat[masks_flat[gene]] = 0.0  # draw black lines
+                canvas_flat[table.pixels(rows[gene])] = 0.0  # draw black lines
             residual = canvas_flat - target_flat
             return float(np.sum(residual ** 2))
 
-        # Initialize population: each individual is a random set of unique genes
-        population: List[List[int]] = [
-            random.sample(range(genome_length), n_strings)
-            for _ in range(self.POP_SIZE)
-        ]
-        logger.debug(f"[memetic] Initialized population of size {self.POP_SIZE}")
-
-        # Evolutionary loop
-        for gen in range(self.GENERATIONS):
-            population.sort(key=render_score)
-            best_sse = render_score(population[0])
-            logger.debug(f"[memetic] Generation {gen+1}: best SSE={best_sse:.2f}")
-
-            elite_size = max(1, int(self.POP_SIZE * self.ELITE_FRACTION))
-            next_gen = population[:elite_size]
-
-            while len(next_gen) < self.POP_SIZE:
-                parent1, parent2 = random.sample(population[:10], 2)
-                crossover_point = random.randint(1, n_strings - 1)
-                child = parent1[:crossover_point] + [
-                    gene for gene in parent2 if gene not in parent1[:crossover_point]
-                ]
-                for idx in range(n_strings):
-                    if random.random() < self.MUTATION_RATE:
-                        child[idx] = random.randrange(genome_length)
-                seen: set[int] = set()
-                for idx in range(len(child)):
-                    if child[idx] in seen:
-                        replacement = random.randrange(genome_length)
-                        while replacement in seen:
+        with metrics.phase("candidates"):
+            # Initialize population: each individual is a random set of unique genes
+            population: List[List[int]] = [
+                random.sample(range(genome_length), n_strings)
+                for _ in range(pop_size)
+            ]
+        logger.debug(f"[memetic] Initialized population of size {pop_size}")
+
+        # Evolutionary loop; the elite are carried over sorted, so
+        # population[0] is always the best genome seen so far
+        out_of_time = False
+        for gen in range(generations):
+            cancel.raise_if_cancelled()
+            if budget.expired():
+                logger.info(f"[memetic] Time budget exhausted after {gen} generations")
+                metrics.stop("time_budget")
+                out_of_time = True
+                break
+
+            with metrics.phase("scoring"):
+                population.sort(key=render_score)
+                best_sse = render_score(population[0])
+            metrics.gauge("error", best_sse)
+            logger.debug("[memetic] Generation %d: best SSE=%.2f", gen + 1, best_sse)
+            reason = converged.check(best_sse)
+            if reason:
+                logger.info(f"[memetic] Converged ({reason}) after {gen + 1} generations")
+                metrics.stop(reason)
+                break
+
+            with metrics.phase("candidates"):
+                elite_size = max(1, int(pop_size * self.ELITE_FRACTION))
+                next_gen = population[:elite_size]
+
+                while len(next_gen) < pop_size:
+                    cancel.raise_if_cancelled()
+                    parent1, parent2 = random.sample(population[:10], 2)
+                    crossover_point = random.randint(1, n_strings - 1)
+                    child = parent1[:crossover_point] + [
+                        gene for gene in parent2 if gene not in parent1[:crossover_point]
+                    ]
+                    for idx in range(n_strings):
+                        if random.random() < self.MUTATION_RATE:
+                            child[idx] = random.randrange(genome_length)
+                    seen: set[int] = set()
+                    for idx in range(len(child)):
+                        if child[idx] in seen:
                             replacement = random.randrange(genome_length)
-                        child[idx] = replacement
-                    seen.add(child[idx])
-                next_gen.append(child)
+                            while replacement in seen:
+                                replacement = random.randrange(genome_length)
+                            child[idx] = replacement
+                        seen.add(child[idx])
+                    next_gen.append(child)
 
-            population = next_gen
+                population = next_gen
+            metrics.step("generations")
 
         best_genome = population[0]
-        logger.debug(f"[memetic] Finished; best SSE={render_score(best_genome):.2f}")
+        if out_of_time:
+            # offspring can outgrow n_strings; a run cut short returns at
+            # most the strings it was asked for
+            best_genome = best_genome[:n_strings]
+        with metrics.phase("scoring"):
+            best_sse = render_score(best_genome)
+        metrics.gauge("error", best_sse)
+        logger.debug(f"[memetic] Finished; best SSE={best_sse:.2f}")
 
         # Convert gene indices back to vectors, streaming via callback if provided
         vectors: List[Dict[str, int]] = []
-        for gene in best_genome:
-            i, j = all_pairs[gene]
-            vectors.append({"from": i, "to": j})
-            if vector_callback:
-                vector_callback(i, j)
-
+        with metrics.phase("commit"):
+            for gene in best_genome:
+                i, j = all_pairs[gene]
+                vectors.append({"from": i, "to": j})
+                if vector_callback:
+                    vector_callback(i, j)
+                metrics.commit()
+
+        metrics.finish()
         return vectors
@@ -1,11 +1,13 @@
 import math
 import random
-from typing import List, Dict, Optional, Callable, Tuple
+from typing import Any, List, Dict, Optional, Callable, Tuple
 
 import numpy as np
 from PIL import Image, ImageDraw
 
 from .base import StringArtAlgorithm
+from .. import kernels
+from ..control import CancellationToken, Deadline, StoppingCriteria
 from ..renderer import generate_radial_anchors
 import logging
 
@@ -16,12 +18,17 @@ class CrumGreedyAlgorithm(StringArtAlgorithm):
     Key ideas:
     - Downscale input to simulate blur & speed up computation.
     - Keep an “original” and a “current” canvas; measure per-line error via only
-      the pixels that line touches (Bresenham).
+      the pixels that line touches (Bresenham), scored by the kernels layer.
     - “Fearless” scoring: penalize darkening errors lightly, reward correct darkening fully.
     - Support multiple colored threads by picking (thread, next-nail) that gives
       best improvement over all.
     """
 
+    PREFIX_RESULTS = True
+    # on the running total of the fearless scores, which turn positive
+    # once the best move no longer improves the picture
+    STOPPING = {"plateau_window": 50, "plateau_ratio": 0.002}
+
     def generate(
         self,
         pixels: np.ndarray,
@@ -34,41 +41,42 @@ class CrumGreedyAlgorithm(StringArtAlgorithm):
         downscale: int = 4,
         thread_colors: List[Tuple[int,int,int]] = [(0,0,0)],
         vector_callback: Optional[Callable[[int,int],None]] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        deadline: Optional[float] = None,
+        time_budget: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        stopping: Optional[Dict[str, Any]] = None,
     ) -> List[Dict[str,int]]:
-        # 1) Build small “blurred” canvas
-        h, w = pixels.shape
-        small = (
-            Image.fromarray(pixels)
-            .resize((w//downscale, h//downscale), Image.Resampling.LANCZOS)
-            .convert("RGB")
-        )
-        small_w, small_h = small.size
-        orig = np.array(small, dtype=np.float32) / 255.0      # (H, W, 3)
-        current = np.ones_like(orig)                         # start blank white
-
-        # 2) Precompute anchors
-        anchors = generate_radial_anchors(n_anchors, small_w, small_h)
-
-        # 3) Enumerate all nail-pairs & precompute Bresenham masks
-        all_pairs = [(i,j) for i in range(n_anchors) for j in range(i+1,n_anchors)]
-
-        def bresenham(a, b):
-            x0,y0 = map(int,a); x1,y1 = map(int,b)
-            dx, dy = abs(x1-x0), abs(y1-y0)
-            sx, sy = (1 if x0<x1 else -1), (1 if y0<y1 else -1)
-            err = dx - dy
-            pts = []
-            while True:
-                pts.append((x0,y0))
-                if x0==x1 and y0==y1: break
-                e2 = 2*err
-                if e2 > -dy:
-                    err -= dy; x0 += sx
-                if e2 < dx:
-                    err += dx; y0 += sy
-            return pts
-
-        line_masks = [bresenham(anchors[i], anchors[j]) for i,j in all_pairs]
+        metrics = self.start_metrics(progress_callback, logger)
+        budget = Deadline.coerce(deadline, time_budget)
+        cancel = CancellationToken.coerce(cancel_token)
+        converged = StoppingCriteria.coerce(stopping, self.STOPPING)
+
+        with metrics.phase("setup"):
+            # 1) Build small “blurred” canvas
+            h, w = pixels.shape
+            small = (
+                Image.fromarray(pixels)
+                .resize((w//downscale, h//downscale), Image.Resampling.LANCZOS)
+                .convert("RGB")
+            )
+            small_w, small_h = small.size
+            orig = np.array(small, dtype=np.float32) / 255.0      # (H, W, 3)
+            current = np.ones_like(orig)                         # start blank white
+
+            # 2) Precompute anchors
+            anchors = generate_radial_anchors(n_anchors, small_w, small_h)
+
+            # 3) Enumerate all nail-pairs & precompute Bresenham lines:
+            # chord k's pixels are xs/ys[line_ptr[k]:line_ptr[k+1]]
+            all_pairs = [(i,j) for i in range(n_anchors) for j in range(i+1,n_anchors)]
+            nails = np.array([(int(x), int(y)) for x, y in anchors], dtype=np.int64)
+            ends = np.array(all_pairs, dtype=np.intp).reshape(-1, 2)
+            line_ptr, line_xs, line_ys = kernels.bresenham_lines(nails[ends[:, 0]], nails[ends[:, 1]])
+            # chords touching each nail, in pair order
+            nail_chords = [
+                np.flatnonzero((ends[:, 0] == nail) | (ends[:, 1] == nail)) for nail in range(n_anchors)
+            ]
 
         # 4) Thread state
         class ThreadState:
@@ -77,65 +85,77 @@ class CrumGreedyAlgorithm(StringArtAlgorithm):
                 self.color = np.array(color, dtype=np.float32)/255.0
                 self.prev = set()   # forbid immediate repeats
             def best_move(self):
-                best = None
-                best_score = math.inf
-                best_line = None
-                for idx,(i,j) in enumerate(all_pairs):
-                    if i!=self.current_nail and j!=self.current_nail: continue
-                    if (self.current_nail, idx) in self.prev: continue
-                    mask = line_masks[idx]
-                    # compute “fearless” diff: negative improvements count fully,
-                    # positive errors are damped (here by 1/5)
-                    tot = 0.0
-                    for x,y in mask:
-                        orig_px = orig[y,x]
-                        cur_px  = current[y,x]
-                        # blended = alpha*thread_color + (1-alpha)*cur_px
-                        alpha = 1.0/downscale
-                        new_px = alpha*self.color + (1-alpha)*cur_px
-                        delta = np.linalg.norm(orig_px - new_px)**2 - np.linalg.norm(orig_px - cur_px)**2
-                        if delta<0:
-                            tot += delta
-                        else:
-                            tot += delta*0.2
-                    if tot < best_score:
-                        best_score,best=tot,idx
-                return best, best_score
+                cancel.raise_if_cancelled()
+                chords = nail_chords[self.current_nail]
+                chords = chords[[(self.current_nail, idx) not in self.prev for idx in chords.tolist()]]
+                if not len(chords):
+                    return None, math.inf
+                metrics.count("candidates_evaluated", len(chords))
+                # compute “fearless” diff: negative improvements count fully,
+                # positive errors are damped (here by 1/5)
+                scores = kernels.fearless_scores(
+                    orig, current, self.color, 1.0/downscale, line_ptr, line_xs, line_ys, chords, 0.2
+                )
+                best = int(np.argmin(scores))
+                return int(chords[best]), float(scores[best])
 
         threads = [ThreadState(0, c) for c in thread_colors]
         vectors: List[Dict[str,int]] = []
+        objective = 0.0
+        converged.start(objective)
 
         # 5) Main loop
         for _ in range(n_strings):
+            cancel.raise_if_cancelled()
+            if budget.expired():
+                if logger:
+                    logger.info(f"[crum-greedy] Time budget exhausted after {len(vectors)} strings")
+                metrics.stop("time_budget")
+                break
+
             # 5a) pick best thread + move
             choice = None
             best_val = math.inf
-            for t in threads:
-                idx,score = t.best_move()
-                if idx is not None and score<best_val:
-                    choice = (t, idx, score)
-                    best_val = score
+            with metrics.phase("scoring"):
+                for t in threads:
+                    idx,score = t.best_move()
+                    if idx is not None and score<best_val:
+                        choice = (t, idx, score)
+                        best_val = score
 
             if choice is None:
+                metrics.stop("no_chords")
                 break
 
-            t, idx, _ = choice
-            i,j = all_pairs[idx]
-            # record
-            vectors.append({"from":i,"to":j})
-            if vector_callback:
-                vector_callback(i,j)
-
-            # 5b) draw into current
-            mask = line_masks[idx]
-            alpha = 1.0/downscale
-            for x,y in mask:
-                current[y,x] = alpha*t.color + (1-alpha)*current[y,x]
-
-            # 5c) forbid immediate repeat & update nail
-            t.prev.add((t.current_nail, idx))
-            t.current_nail = j if t.current_nail==i else i
+            with metrics.phase("commit"):
+                t, idx, _ = choice
+                i,j = all_pairs[idx]
+                # record
+                vectors.append({"from":i,"to":j})
+                if vector_callback:
+                    vector_callback(i,j)
+
+                # 5b) draw into current
+                xs = line_xs[line_ptr[idx]:line_ptr[idx+1]]
+                ys = line_ys[line_ptr[idx]:line_ptr[idx+1]]
+                alpha = 1.0/downscale
+                current[ys,xs] = alpha*t.color + (1-alpha)*current[ys,xs]
+
+                # 5c) forbid immediate repeat & update nail
+                t.prev.add((t.current_nail, idx))
+                t.current_nail = j if t.current_nail==i else i
+                metrics.gauge("error", np.sum((orig - current) ** 2))
+                metrics.commit()
+
+            objective += best_val
+            reason = converged.check(objective)
+            if reason:
+                if logger:
+                    logger.info(f"[crum-greedy] Converged ({reason}) after {len(vectors)} strings")
+                metrics.stop(reason)
+                break
 
         if logger:
             logger.debug(f"[crum-greedy] placed {len(vectors)} strings")
+        metrics.finish()
         return vectors
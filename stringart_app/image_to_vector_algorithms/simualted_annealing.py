@@ -4,11 +4,11 @@ import numpy as np
 import random
 import math
 import logging
-from typing import List, Dict, Optional, Callable, Tuple
-from PIL import Image, ImageDraw
+from typing import Any, List, Dict, Optional, Callable, Sequence, Tuple
 
 from .base import StringArtAlgorithm
-from ..renderer import generate_radial_anchors
+from ..chords import chord_table
+from ..control import CancellationToken, Deadline, StoppingCriteria
 
 
 class SimulatedAnnealingAlgorithm(StringArtAlgorithm):
@@ -16,6 +16,15 @@ class SimulatedAnnealingAlgorithm(StringArtAlgorithm):
     Start from a random set of N strings, then swap in/out
     edges probabilistically to escape local minima.
     """
+    # emit a progress event every this many iterations
+    PROGRESS_EVERY = 500
+    # swaps tried, unless converged earlier
+    ITERATIONS = 10000
+
+    SUPPORTS_CANDIDATES = True
+    # iterations without a new best before giving up
+    STOPPING = {"max_stale": 1500}
+    TUNABLES = {"iterations": ITERATIONS}
 
     def generate(
         self,
@@ -26,30 +35,47 @@ class SimulatedAnnealingAlgorithm(StringArtAlgorithm):
         sample_pairs: int = 1000,  # unused
         logger: Optional[logging.Logger] = None,
         *,
-        vector_callback: Optional[Callable[[int, int], None]] = None
+        vector_callback: Optional[Callable[[int, int], None]] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        deadline: Optional[float] = None,
+        time_budget: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        candidate_pairs: Optional[Sequence[Tuple[int, int]]] = None,
+        stopping: Optional[Dict[str, Any]] = None,
+        iterations: Optional[int] = None
     ) -> List[Dict[str, int]]:
+        """
+        `candidate_pairs` restricts swaps to those chords, when there are at
+        least n_strings of them. `iterations` overrides ITERATIONS.
+        """
         if logger is None:
             logger = logging.getLogger(__name__)
+        metrics = self.start_metrics(progress_callback, logger)
+        budget = Deadline.coerce(deadline, time_budget)
+        cancel = CancellationToken.coerce(cancel_token)
+        converged = StoppingCriteria.coerce(stopping, self.STOPPING)
 
         h, w = pixels.shape
         logger.debug(f"[annealing] Starting with anchors={n_anchors}, strings={n_strings}")
 
-        anchors = generate_radial_anchors(n_anchors, w, h, logger=logger)
-
-        # Precompute all pair coverage and masks
-        all_pairs = [(i, j) for i in range(n_anchors) for j in range(i + 1, n_anchors)]
-        coverage: Dict[Tuple[int, int], float] = {}
-        target_flat = pixels.astype(np.float32).ravel()
-        masks_flat: Dict[Tuple[int, int], np.ndarray] = {}
-
-        for (i, j) in all_pairs:
-            img = Image.new('L', (w, h), color=255)
-            draw = ImageDraw.Draw(img)
-            draw.line([anchors[i], anchors[j]], fill=0, width=line_thickness)
-            mask_flat = np.array(img, dtype=bool).ravel()
-            masks_flat[(i, j)] = mask_flat
-            diff = np.where(mask_flat, 0.0, 255.0) - target_flat
-            coverage[(i, j)] = float(np.sum(diff ** 2))
+        with metrics.phase("setup"):
+            table = chord_table(n_anchors, w, h, line_thickness)
+
+            # Precompute each pair's coverage: SSE of a canvas that is white
+            # along the chord and black elsewhere, i.e. Σt² plus the chord's
+            # Σ((255 - t)² - t²), scored for every pair in one sparse product
+            all_pairs = table.pairs
+            masks = table.masks
+            if candidate_pairs and len(candidate_pairs) >= n_strings:
+                rows = table.rows(candidate_pairs)
+                all_pairs = [all_pairs[k] for k in rows]
+                masks = masks[rows]
+            elif candidate_pairs:
+                logger.debug(f"[annealing] Only {len(candidate_pairs)} candidates; using every pair")
+            target_flat = pixels.astype(np.float64).ravel()
+            chord_delta = (255.0 - target_flat) ** 2 - target_flat ** 2
+            pair_sse = float(np.sum(target_flat ** 2)) + masks @ chord_delta
+            coverage: Dict[Tuple[int, int], float] = dict(zip(all_pairs, pair_sse.tolist()))
 
         logger.debug(f"[annealing] Precomputed coverage for {len(all_pairs)} pairs")
 
@@ -66,43 +92,65 @@ class SimulatedAnnealingAlgorithm(StringArtAlgorithm):
 
         current_score = score(current)
         best_score = current_score
+        metrics.gauge("error", best_score)
+        converged.start(best_score)
         logger.debug(f"[annealing] Initial SSE={current_score:.2f}")
 
-        for it in range(10000):
-            out = random.choice(list(current))
-            inp = random.choice(all_pairs)
+        for it in range(iterations or self.ITERATIONS):
+            cancel.raise_if_cancelled()
+            if budget.expired():
+                logger.info(f"[annealing] Time budget exhausted after {it} iterations")
+                metrics.stop("time_budget")
+                break
+            reason = converged.check(best_score) if it else None
+            if reason:
+                logger.info(f"[annealing] Converged ({reason}) after {it} iterations")
+                metrics.stop(reason)
+                break
+            metrics.step("iterations", every=self.PROGRESS_EVERY)
+            with metrics.phase("candidates"):
+                out = random.choice(list(current))
+                inp = random.choice(all_pairs)
             if inp in current:
                 continue
 
-            new = set(current)
-            new.remove(out)
-            new.add(inp)
+            with metrics.phase("scoring"):
+                new = set(current)
+                new.remove(out)
+                new.add(inp)
 
-            new_score = current_score - coverage[out] + coverage[inp]
-            Δ = new_score - current_score
+                new_score = current_score - coverage[out] + coverage[inp]
+                Δ = new_score - current_score
+            metrics.count("candidates_evaluated")
 
             if Δ < 0 or random.random() < math.exp(-Δ / T):
-                current, current_score = new, new_score
-                if current_score < best_score:
-                    best, best_score = set(current), current_score
-                    logger.debug(f"[annealing] Iter {it}: New best SSE={best_score:.2f}")
+                with metrics.phase("commit"):
+                    current, current_score = new, new_score
+                    if current_score < best_score:
+                        best, best_score = set(current), current_score
+                        metrics.gauge("error", best_score)
+                        logger.debug("[annealing] Iter %d: New best SSE=%.2f", it, best_score)
 
             T *= alpha
             if T < 1e-3:
                 restarts += 1
                 if restarts > 2:
                     logger.debug("[annealing] Temperature frozen, stopping")
+                    metrics.stop("frozen")
                     break
-                logger.debug(f"[annealing] Restarting temperature (restart #{restarts})")
+                logger.debug("[annealing] Restarting temperature (restart #%d)", restarts)
                 T = T0 * (0.5 ** restarts)
 
         logger.debug(f"[annealing] Finished with SSE={best_score:.2f}")
 
         # Convert best set to vector list, invoking callback as we go
         vectors: List[Dict[str, int]] = []
-        for i, j in best:
-            vectors.append({"from": i, "to": j})
-            if vector_callback:
-                vector_callback(i, j)
-
+        with metrics.phase("commit"):
+            for i, j in best:
+                vectors.append({"from": i, "to": j})
+                if vector_callback:
+                    vector_callback(i, j)
+                metrics.commit()
+
+        metrics.finish()
         return vectors
@@ -0,0 +1,224 @@
+# stringart_app/instrumentation.py
+#
+# Lightweight per-run timers, counters and gauges for the string-art
+# algorithms, plus a process-wide registry that aggregates finished runs
+# and renders them in Prometheus text format for the /metrics endpoint.
+#
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+# Emit a progress event every this many committed strings
+PROGRESS_EVERY = 10
+
+
+class RunMetrics:
+    """
+    Timers, counters and gauges for a single algorithm run.
+
+    Algorithms wrap their setup / candidates / scoring / commit work in
+    `phase()`, bump counters such as "candidates_evaluated", set gauges such
+    as "error", call `commit()` per string placed and `stop()` with the
+    reason when ending early. Progress snapshots go to `progress_callback`
+    as plain dicts; `finish()` sends a final snapshot and folds the run into
+    the process-wide registry.
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        logger: Optional[logging.Logger] = None,
+        registry: Optional["MetricsRegistry"] = None,
+    ):
+        self.algorithm = algorithm
+        self.progress_callback = progress_callback
+        self.logger = logger or logging.getLogger(__name__)
+        self.registry = registry if registry is not None else PROCESS_METRICS
+        self.timers: Dict[str, float] = defaultdict(float)
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.gauges: Dict[str, float] = {}
+        self.started = time.perf_counter()
+        self.finished = False
+        self.stop_reason: Optional[str] = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Accumulate the wall time spent inside the block under `name`."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timers[name] += time.perf_counter() - t0
+
+    def count(self, name: str, n: float = 1) -> None:
+        self.counters[name] += n
+
+    def gauge(self, name: str, value: float) -> None:
+        self.gauges[name] = float(value)
+
+    def commit(self, n: int = 1) -> None:
+        """Record `n` placed strings, emitting progress every PROGRESS_EVERY."""
+        self.step("strings", n)
+
+    def stop(self, reason: str) -> None:
+        """
+        Record why the run ended before its full length: "time_budget",
+        "no_improvement", a StoppingCriteria test, ... Runs that never call
+        this finish as "completed".
+        """
+        if self.stop_reason is None:
+            self.stop_reason = reason
+
+    def step(self, name: str, n: int = 1, every: int = PROGRESS_EVERY) -> None:
+        """
+        Advance loop counter `name` by `n`, emitting progress each time it
+        crosses a multiple of `every`. Used for loops that refine a solution
+        rather than place strings (generations, annealing iterations).
+        """
+        before = int(self.counters[name])
+        self.counters[name] += n
+        if before // every != int(self.counters[name]) // every:
+            self.emit(**{name: int(self.counters[name])})
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def snapshot(self) -> Dict[str, Any]:
+        elapsed = self.elapsed
+        strings = int(self.counters["strings"])
+        return {
+            "strings": strings,
+            "strings_per_sec": strings / elapsed if elapsed > 0 else 0.0,
+            "candidates_evaluated": int(self.counters["candidates_evaluated"]),
+            "error": self.gauges.get("error"),
+            "elapsed": elapsed,
+            "stop_reason": self.stop_reason,
+        }
+
+    def emit(self, **extra: Any) -> None:
+        """Send a progress snapshot to the callback, if any."""
+        if self.progress_callback is not None:
+            self.progress_callback({**self.snapshot(), **extra})
+
+    def finish(self) -> Dict[str, Any]:
+        """
+        Close the run: log a one-line summary, send a final progress event
+        including per-phase timings and counters, and record the run
+        process-wide.
+        """
+        if self.stop_reason is None:
+            self.stop_reason = "completed"
+        summary = {
+            **self.snapshot(),
+            "phases": dict(self.timers),
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+        }
+        if self.finished:
+            return summary
+        self.finished = True
+
+        self.logger.debug(
+            f"[{self.algorithm}] Done in {summary['elapsed']:.2f}s; "
+            f"picks={summary['strings']}, "
+            f"candidates={summary['candidates_evaluated']}, "
+            f"stop={self.stop_reason}, "
+            f"phases=" + ", ".join(f"{k}={v:.2f}s" for k, v in self.timers.items())
+        )
+        self.emit(final=True, phases=summary["phases"], counters=summary["counters"])
+        self.registry.record_run(self.algorithm, summary)
+        return summary
+
+
+class MetricsRegistry:
+    """
+    Thread-safe process-wide aggregate of finished runs, keyed by algorithm.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self.runs: Dict[str, int] = defaultdict(int)
+        self.failures: Dict[str, int] = defaultdict(int)
+        self.stops: Dict[tuple[str, str], int] = defaultdict(int)
+        self.run_seconds: Dict[str, float] = defaultdict(float)
+        self.phase_seconds: Dict[tuple[str, str], float] = defaultdict(float)
+        self.counters: Dict[tuple[str, str], float] = defaultdict(float)
+        self.gauges: Dict[tuple[str, str], float] = {}
+
+    def record_run(self, algorithm: str, summary: Dict[str, Any]) -> None:
+        with self._lock:
+            self.runs[algorithm] += 1
+            self.stops[(algorithm, summary.get("stop_reason") or "completed")] += 1
+            self.run_seconds[algorithm] += summary["elapsed"]
+            for phase, seconds in summary["phases"].items():
+                self.phase_seconds[(algorithm, phase)] += seconds
+            for name, value in summary["counters"].items():
+                self.counters[(algorithm, name)] += value
+            for name, value in summary["gauges"].items():
+                self.gauges[(algorithm, f"last_{name}")] = value
+            self.gauges[(algorithm, "last_run_seconds")] = summary["elapsed"]
+            self.gauges[(algorithm, "last_strings_per_second")] = summary["strings_per_sec"]
+
+    def record_failure(self, algorithm: str) -> None:
+        with self._lock:
+            self.failures[algorithm] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def render_prometheus(self) -> str:
+        """
+        Render every aggregate in the Prometheus text exposition format.
+        """
+        lines: list[str] = []
+
+        def family(name: str, kind: str, help_text: str, samples: list[tuple[dict, float]]) -> None:
+            if not samples:
+                return
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_str = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_str}}} {_format(value)}")
+
+        with self._lock:
+            family("stringart_runs_total", "counter", "Completed algorithm runs.",
+                   [({"algorithm": a}, v) for a, v in sorted(self.runs.items())])
+            family("stringart_run_failures_total", "counter", "Algorithm runs that raised.",
+                   [({"algorithm": a}, v) for a, v in sorted(self.failures.items())])
+            family("stringart_run_stops_total", "counter", "Completed runs by why they stopped.",
+                   [({"algorithm": a, "reason": r}, v) for (a, r), v in sorted(self.stops.items())])
+            family("stringart_run_seconds_total", "counter", "Wall time spent in completed runs.",
+                   [({"algorithm": a}, v) for a, v in sorted(self.run_seconds.items())])
+            family("stringart_phase_seconds_total", "counter", "Wall time per algorithm phase.",
+                   [({"algorithm": a, "phase": p}, v) for (a, p), v in sorted(self.phase_seconds.items())])
+
+            for counter in sorted({n for _, n in self.counters}):
+                family(f"stringart_{counter}_total", "counter", f"Total {counter.replace('_', ' ')}.",
+                       [({"algorithm": a}, v) for (a, n), v in sorted(self.counters.items()) if n == counter])
+            for gauge in sorted({n for _, n in self.gauges}):
+                family(f"stringart_{gauge}", "gauge", f"{gauge.replace('_', ' ').capitalize()} of the latest run.",
+                       [({"algorithm": a}, v) for (a, n), v in sorted(self.gauges.items()) if n == gauge])
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(value: float) -> str:
+    return repr(float(value)) if value == value else "NaN"
+
+
+PROCESS_METRICS = MetricsRegistry()
@@ -0,0 +1,72 @@
+# stringart_app/kernels/__init__.py
+#
+# Hot loops that don't map cleanly onto NumPy broadcasting, behind one
+# interface with two implementations: a pure-NumPy reference
+# (numpy_backend) and a Numba-compiled one (numba_backend), used
+# automatically when Numba is importable. Set STRINGART_KERNELS=numpy to
+# force the reference backend.
+#
+
+import os
+import time
+from types import ModuleType
+from typing import Dict, Optional
+
+import numpy as np
+
+from . import numpy_backend
+
+BACKENDS: Dict[str, ModuleType] = {"numpy": numpy_backend}
+try:
+    from . import numba_backend
+except ImportError:
+    pass
+else:
+    BACKENDS["numba"] = numba_backend
+
+
+def get_backend(name: Optional[str] = None) -> ModuleType:
+    """
+    The named backend, or by default STRINGART_KERNELS if set, else the
+    fastest available.
+    """
+    name = name or os.environ.get("STRINGART_KERNELS") or ("numba" if "numba" in BACKENDS else "numpy")
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown or unavailable kernel backend '{name}'. Available: {', '.join(BACKENDS)}")
+
+
+BACKEND = get_backend()
+
+
+def bresenham_lines(starts, ends):
+    """See numpy_backend.bresenham_lines."""
+    return BACKEND.bresenham_lines(starts, ends)
+
+
+def fearless_scores(orig, current, color, alpha, indptr, xs, ys, chords, penalty):
+    """See numpy_backend.fearless_scores."""
+    return BACKEND.fearless_scores(orig, current, color, alpha, indptr, xs, ys, chords, penalty)
+
+
+def chord_gains(canvas_flat, pixels_flat, indptr, indices, chords):
+    """See numpy_backend.chord_gains."""
+    return BACKEND.chord_gains(canvas_flat, pixels_flat, indptr, indices, chords)
+
+
+def warm_up(backend: Optional[ModuleType] = None) -> float:
+    """
+    Run every kernel once on tiny inputs, so a compiled backend is compiled
+    (or loaded from its disk cache) now rather than inside the first job.
+    Returns the seconds taken.
+    """
+    backend = backend or BACKEND
+    t0 = time.perf_counter()
+    indptr, xs, ys = backend.bresenham_lines(np.array([[0, 0]]), np.array([[2, 1]]))
+    canvas = np.ones((2, 3, 3), dtype=np.float32)
+    chords = np.array([0], dtype=np.int64)
+    backend.fearless_scores(canvas, canvas, np.zeros(3, dtype=np.float32), 0.25, indptr, xs, ys, chords, 0.2)
+    flat = np.zeros(6, dtype=np.int16)
+    backend.chord_gains(flat, flat, indptr, (ys * 3 + xs).astype(np.int32), chords)
+    return time.perf_counter() - t0
@@ -0,0 +1,102 @@
+# stringart_app/kernels/numba_backend.py
+#
+# Numba-compiled kernels, equivalent to numpy_backend but as plain loops:
+# no temporaries, and each chord's pixels are visited once. Importing this
+# module raises ImportError when Numba is not installed. Compiled code is
+# cached on disk (cache=True; NUMBA_CACHE_DIR relocates it), so only the
+# first process after an install or code change pays for compilation.
+#
+
+from typing import Tuple
+
+import numpy as np
+from numba import njit
+
+NAME = "numba"
+
+
+@njit(cache=True)
+def _fill_lines(starts, ends, indptr, xs, ys):
+    for k in range(len(starts)):
+        x, y = starts[k, 0], starts[k, 1]
+        x1, y1 = ends[k, 0], ends[k, 1]
+        dx, dy = abs(x1 - x), abs(y1 - y)
+        sx = 1 if x < x1 else -1
+        sy = 1 if y < y1 else -1
+        err = dx - dy
+        for pos in range(indptr[k], indptr[k + 1]):
+            xs[pos], ys[pos] = x, y
+            e2 = 2 * err
+            if e2 > -dy:
+                err -= dy
+                x += sx
+            if e2 < dx:
+                err += dx
+                y += sy
+
+
+def bresenham_lines(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    starts = np.ascontiguousarray(starts, dtype=np.int64)
+    ends = np.ascontiguousarray(ends, dtype=np.int64)
+    counts = np.maximum(np.abs(ends[:, 0] - starts[:, 0]), np.abs(ends[:, 1] - starts[:, 1])) + 1
+    indptr = np.zeros(len(starts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    xs = np.empty(indptr[-1], dtype=np.int32)
+    ys = np.empty(indptr[-1], dtype=np.int32)
+    _fill_lines(starts, ends, indptr, xs, ys)
+    return indptr, xs, ys
+
+
+@njit(cache=True)
+def _fearless(orig, current, color, alpha, indptr, xs, ys, chords, penalty):
+    scores = np.zeros(len(chords), dtype=np.float64)
+    keep = np.float32(1) - alpha
+    for n in range(len(chords)):
+        k = chords[n]
+        total = 0.0
+        for pos in range(indptr[k], indptr[k + 1]):
+            x, y = xs[pos], ys[pos]
+            before = np.float32(0)
+            after = np.float32(0)
+            for ch in range(3):
+                o = orig[y, x, ch]
+                c = current[y, x, ch]
+                new = alpha * color[ch] + keep * c
+                after += (o - new) * (o - new)
+                before += (o - c) * (o - c)
+            delta = after - before
+            total += delta if delta < 0 else delta * penalty
+        scores[n] = total
+    return scores
+
+
+def fearless_scores(orig, current, color, alpha, indptr, xs, ys, chords, penalty) -> np.ndarray:
+    return _fearless(
+        orig, current, color.astype(np.float32), np.float32(alpha),
+        indptr, xs, ys, np.asarray(chords, dtype=np.int64), np.float32(penalty),
+    )
+
+
+@njit(cache=True)
+def _wrap16(v):
+    return ((v + 32768) & 0xFFFF) - 32768
+
+
+@njit(cache=True)
+def _chord_gains(canvas_flat, pixels_flat, indptr, indices, chords):
+    gains = np.zeros(len(chords), dtype=np.int64)
+    for n in range(len(chords)):
+        k = chords[n]
+        total = 0
+        for pos in range(indptr[k], indptr[k + 1]):
+            p = indices[pos]
+            target = np.int64(pixels_flat[p])
+            before = np.int64(canvas_flat[p]) - target
+            # the greedy scoring squares in int16, which wraps
+            total += _wrap16(before * before) - _wrap16(target * target)
+        gains[n] = total
+    return gains
+
+
+def chord_gains(canvas_flat, pixels_flat, indptr, indices, chords) -> np.ndarray:
+    return _chord_gains(canvas_flat, pixels_flat, indptr, indices, np.asarray(chords, dtype=np.int64))
@@ -0,0 +1,110 @@
+# stringart_app/kernels/numpy_backend.py
+#
+# Pure-NumPy reference kernels. Always available; the compiled backend must
+# match these (see tests/test_kernels.py).
+#
+
+from typing import Tuple
+
+import numpy as np
+
+NAME = "numpy"
+
+
+def _ranges(indptr: np.ndarray, chords: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Positions of every chord's entries, concatenated in chord order, and the
+    offset of each chord's first entry in that concatenation.
+    """
+    starts = indptr[chords]
+    lengths = indptr[chords + 1] - starts
+    offsets = np.zeros(len(chords), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=offsets[1:])
+    positions = np.arange(int(lengths.sum()), dtype=np.int64) + np.repeat(starts - offsets, lengths)
+    return positions, offsets
+
+
+def bresenham_lines(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Integer Bresenham lines from starts[k] to ends[k] (n × 2 arrays of x, y).
+    Returns (indptr, xs, ys): line k's points, in drawing order, are
+    xs[indptr[k]:indptr[k+1]], ys[...]. Every line is stepped in lockstep,
+    one vectorised error-term update per pixel of the longest line.
+    """
+    x = starts[:, 0].astype(np.int64)
+    y = starts[:, 1].astype(np.int64)
+    x1 = ends[:, 0].astype(np.int64)
+    y1 = ends[:, 1].astype(np.int64)
+    dx, dy = np.abs(x1 - x), np.abs(y1 - y)
+    sx = np.where(x < x1, 1, -1)
+    sy = np.where(y < y1, 1, -1)
+    err = dx - dy
+
+    counts = np.maximum(dx, dy) + 1
+    indptr = np.zeros(len(x) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    steps = int(counts.max()) if len(counts) else 0
+
+    xs = np.empty((steps, len(x)), dtype=np.int32)
+    ys = np.empty((steps, len(x)), dtype=np.int32)
+    for step in range(steps):
+        xs[step], ys[step] = x, y
+        e2 = 2 * err
+        step_x, step_y = e2 > -dy, e2 < dx
+        err += dx * step_y - dy * step_x
+        x += sx * step_x
+        y += sy * step_y
+
+    # finished lines keep stepping; keep only each line's own points
+    valid = (np.arange(steps)[:, None] < counts[None, :]).T
+    return indptr, xs.T[valid], ys.T[valid]
+
+
+def fearless_scores(
+    orig: np.ndarray,
+    current: np.ndarray,
+    color: np.ndarray,
+    alpha: float,
+    indptr: np.ndarray,
+    xs: np.ndarray,
+    ys: np.ndarray,
+    chords: np.ndarray,
+    penalty: float,
+) -> np.ndarray:
+    """
+    Change in squared colour error from blending `color` at `alpha` over
+    the (H, W, 3) `current` canvas along each of `chords`, summed per chord
+    with increases damped by `penalty`.
+    """
+    if not len(chords):
+        return np.zeros(0, dtype=np.float64)
+    positions, offsets = _ranges(indptr, chords)
+    flat = ys[positions].astype(np.int64) * orig.shape[1] + xs[positions]
+    o = orig.reshape(-1, 3)[flat]
+    c = current.reshape(-1, 3)[flat]
+    new = alpha * color + (1 - alpha) * c
+    delta = np.sum((o - new) ** 2, axis=1) - np.sum((o - c) ** 2, axis=1)
+    delta = np.where(delta < 0, delta, delta * penalty).astype(np.float64)
+    return np.add.reduceat(delta, offsets)
+
+
+def chord_gains(
+    canvas_flat: np.ndarray,
+    pixels_flat: np.ndarray,
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    chords: np.ndarray,
+) -> np.ndarray:
+    """
+    Per-chord reduction in squared error from drawing each chord black, for
+    the int16 canvas and target of the greedy algorithm. Squares are taken
+    in int16 (and wrap) exactly as its scoring always has.
+    """
+    if not len(chords):
+        return np.zeros(0, dtype=np.int64)
+    positions, offsets = _ranges(indptr, chords)
+    px = indices[positions]
+    before = canvas_flat[px] - pixels_flat[px]
+    after = -pixels_flat[px]
+    gain = (before ** 2).astype(np.int64) - (after ** 2).astype(np.int64)
+    return np.add.reduceat(gain, offsets)
@@ -0,0 +1,117 @@
+# stringart_app/management/commands/stringart_batch.py
+
+import os
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...batch import BatchTask, find_inputs, run_batch
+from ...planner import ALGORITHMS
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate string art for every image matching the given globs, across a "
+        "process pool, writing vectors and rendered previews to an output directory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("inputs", nargs="+",
+                            help="Input image globs, e.g. 'catalogue/**/*.jpg'")
+        parser.add_argument("--output-dir", type=Path, default=Path("stringart_output"),
+                            help="Results go to <output-dir>/<algorithm>/<image>.{sart,png}")
+        parser.add_argument("--algorithms", nargs="+", default=["greedy"],
+                            help="Algorithms to run on each image (default: greedy)")
+        parser.add_argument("--n-anchors", type=int, default=180)
+        parser.add_argument("--n-strings", type=int, default=200)
+        parser.add_argument("--levels", type=int, default=8, help="Shades of grey")
+        parser.add_argument("--size", type=int, default=200,
+                            help="Square size images are processed at (default: 200)")
+        parser.add_argument("--time-budget", type=float, default=None,
+                            help="Seconds per image and algorithm before taking the best so far")
+        parser.add_argument("--continuous", action="store_true",
+                            help="Wind one continuous thread (greedy and coverage)")
+        parser.add_argument("--min-skip", type=int, default=0,
+                            help="With --continuous, skip chords to nails closer than this")
+        parser.add_argument("--no-repeat", action="store_true",
+                            help="With --continuous, use each chord at most once")
+        parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                            help="Worker processes (default: one per CPU)")
+        parser.add_argument("--overwrite", action="store_true",
+                            help="Reprocess images whose outputs already exist")
+
+    def handle(self, *args, **opts):
+        unknown = [a for a in opts["algorithms"] if a not in ALGORITHMS]
+        if unknown:
+            raise CommandError(f"Unknown algorithm(s): {', '.join(unknown)}")
+
+        sources = find_inputs(opts["inputs"])
+        if not sources:
+            raise CommandError("No images match the given inputs")
+        clashes = [stem for stem, n in Counter(p.stem for p in sources).items() if n > 1]
+        if clashes:
+            raise CommandError(f"Input names must be unique; duplicated: {', '.join(sorted(clashes))}")
+
+        tasks = [
+            BatchTask(
+                source=source,
+                algorithm=algorithm,
+                output_dir=opts["output_dir"],
+                n_anchors=opts["n_anchors"],
+                n_strings=opts["n_strings"],
+                levels=opts["levels"],
+                size=opts["size"],
+                time_budget=opts["time_budget"],
+                continuous=opts["continuous"],
+                min_skip=opts["min_skip"],
+                no_repeat=opts["no_repeat"],
+            )
+            for algorithm in opts["algorithms"]
+            for source in sources
+        ]
+        pending = tasks if opts["overwrite"] else [t for t in tasks if not t.is_done()]
+        skipped = len(tasks) - len(pending)
+        self.stdout.write(
+            f"{len(sources)} images × {len(opts['algorithms'])} algorithms: "
+            f"{len(pending)} to run, {skipped} already done"
+        )
+        if not pending:
+            return
+
+        started = time.monotonic()
+        finished = []
+        failures = []
+
+        def on_result(record):
+            finished.append(record)
+            if record["error"]:
+                failures.append(record)
+            self._progress(len(finished), len(pending), started)
+
+        try:
+            run_batch(pending, workers=opts["workers"], on_result=on_result)
+        except KeyboardInterrupt:
+            self.stdout.write("")
+            raise CommandError("Interrupted; finished outputs were kept and will be skipped on rerun")
+        self.stdout.write("")
+
+        for record in failures:
+            self.stdout.write(self.style.ERROR(f"  {record['algorithm']} {record['source']}: {record['error']}"))
+        summary = f"{len(pending) - len(failures)} done, {len(failures)} failed, {skipped} skipped"
+        if failures:
+            raise CommandError(summary)
+        self.stdout.write(self.style.SUCCESS(summary))
+
+    def _progress(self, done: int, total: int, started: float, width: int = 30) -> None:
+        elapsed = time.monotonic() - started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = (total - done) / rate if rate > 0 else 0.0
+        filled = int(width * done / total)
+        self.stdout.write(
+            f"\r[{'#' * filled}{'.' * (width - filled)}] {done}/{total} "
+            f"{rate:.2f}/s eta {eta:.0f}s",
+            ending="",
+        )
+        self.stdout.flush()
@@ -0,0 +1,129 @@
+# stringart_app/management/commands/stringart_benchmark.py
+
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...benchmarks import (
+    BASELINE_PATH,
+    PROFILES,
+    Thresholds,
+    build_cases,
+    compare_to_baseline,
+    load_report,
+    run_kernel_benchmarks,
+    run_scoring_benchmarks,
+    run_suite,
+    write_report,
+)
+from ...benchmarks.corpus import DEFAULT_SEED
+from ...planner import ALGORITHMS
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the registered string-art algorithms on a fixed corpus, "
+        "writing a JSON report and comparing it against a stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--profile", choices=sorted(PROFILES), default="quick",
+                            help="Corpus profile to run (default: quick)")
+        parser.add_argument("--algorithms", nargs="+", default=None,
+                            help="Algorithms to benchmark (default: all registered)")
+        parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+        parser.add_argument("--output", type=Path, default=Path("bench_output.json"),
+                            help="Where to write the JSON report")
+        parser.add_argument("--baseline", type=Path, default=BASELINE_PATH,
+                            help="Baseline report to compare against")
+        parser.add_argument("--save-baseline", action="store_true",
+                            help="Overwrite the baseline with this run instead of comparing")
+        parser.add_argument("--repeat", type=int, default=3,
+                            help="Runs per case; the fastest is reported (default: 3)")
+        parser.add_argument("--tracemalloc", action="store_true",
+                            help="Also record tracemalloc peak (runs each case twice)")
+        parser.add_argument("--no-isolate", action="store_true",
+                            help="Run every case in this process (peak RSS becomes suite-wide)")
+        parser.add_argument("--kernels", action="store_true",
+                            help="Time each scoring kernel on every available backend side by side, then exit")
+        parser.add_argument("--scoring", action="store_true",
+                            help="Compare the mask and Radon chord-scoring engines across anchor counts, then exit")
+        parser.add_argument("--max-time-regression", type=float, default=Thresholds.time)
+        parser.add_argument("--max-memory-regression", type=float, default=Thresholds.memory)
+        parser.add_argument("--max-error-regression", type=float, default=Thresholds.error)
+
+    def handle(self, *args, **opts):
+        if opts["kernels"]:
+            self._kernels(opts["repeat"])
+            return
+        if opts["scoring"]:
+            self._scoring()
+            return
+
+        algorithms = opts["algorithms"] or list(ALGORITHMS.keys())
+        unknown = [a for a in algorithms if a not in ALGORITHMS]
+        if unknown:
+            raise CommandError(f"Unknown algorithm(s): {', '.join(unknown)}")
+
+        cases = build_cases(opts["profile"], algorithms, seed=opts["seed"])
+        self.stdout.write(f"Running {len(cases)} cases ({opts['profile']} profile)")
+
+        def on_result(r):
+            status = r["error"] or f"{r['n_vectors']} vectors, SSE={r['sse']:.3g}"
+            self.stdout.write(f"  {r['key']}: {r['wall_seconds']:.3f}s, rss={r['peak_rss_kb']}KiB — {status}")
+
+        report = run_suite(
+            cases,
+            trace_memory=opts["tracemalloc"],
+            isolate=not opts["no_isolate"],
+            repeat=opts["repeat"],
+            on_result=on_result,
+        )
+        report["meta"]["profile"] = opts["profile"]
+        report["meta"]["seed"] = opts["seed"]
+
+        write_report(report, opts["output"])
+        self.stdout.write(f"Wrote report to {opts['output']}")
+
+        if opts["save_baseline"]:
+            write_report(report, opts["baseline"])
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline to {opts['baseline']}"))
+            return
+
+        if not opts["baseline"].exists():
+            self.stdout.write(self.style.WARNING(f"No baseline at {opts['baseline']}; skipping comparison"))
+            return
+
+        thresholds = Thresholds(
+            time=opts["max_time_regression"],
+            memory=opts["max_memory_regression"],
+            error=opts["max_error_regression"],
+        )
+        regressions = compare_to_baseline(report, load_report(opts["baseline"]), thresholds)
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline"))
+            return
+
+        for reg in regressions:
+            self.stdout.write(self.style.ERROR(
+                f"  {reg['key']} {reg['metric']}: {reg['baseline']} → {reg['current']}"
+            ))
+        raise CommandError(f"{len(regressions)} regression(s) against baseline")
+
+    def _kernels(self, repeat: int) -> None:
+        results = run_kernel_benchmarks(repeat=repeat)
+        backends = list(dict.fromkeys(r["backend"] for r in results))
+        seconds = {(r["kernel"], r["backend"]): r["seconds"] for r in results}
+        self.stdout.write(f"{'kernel':<18}" + "".join(f"{b:>12}" for b in backends))
+        for kernel in dict.fromkeys(r["kernel"] for r in results):
+            self.stdout.write(
+                f"{kernel:<18}" + "".join(f"{seconds[(kernel, b)] * 1000:>10.2f}ms" for b in backends)
+            )
+
+    def _scoring(self) -> None:
+        self.stdout.write(f"{'anchors':>8} {'engine':<7}{'setup':>10}{'per pick':>12}{'top-50 agree':>14}")
+        for r in run_scoring_benchmarks():
+            self.stdout.write(
+                f"{r['n_anchors']:>8} {r['engine']:<7}{r['setup'] * 1000:>8.1f}ms"
+                f"{r['per_pick'] * 1000:>10.2f}ms{r['top50_agreement']:>14}"
+            )
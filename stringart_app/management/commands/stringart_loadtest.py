@@ -0,0 +1,102 @@
+# stringart_app/management/commands/stringart_loadtest.py
+
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...benchmarks.corpus import IMAGES, DEFAULT_SEED
+from ...benchmarks.loadtest import DEFAULT_SERVER_CMD, LoadProfile, local_server, run_load_test
+from ...planner import ALGORITHMS
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the web tier: start the app locally (or target --url) and have "
+        "simulated users upload previews, run jobs, follow both event streams and "
+        "cancel some jobs, reporting latency percentiles, errors and server CPU/RSS."
+    )
+
+    def add_arguments(self, parser):
+        defaults = LoadProfile()
+        parser.add_argument("--clients", type=int, default=defaults.clients,
+                            help=f"Concurrent simulated users (default: {defaults.clients})")
+        parser.add_argument("--jobs-per-client", type=int, default=defaults.jobs_per_client)
+        parser.add_argument("--cancel-fraction", type=float, default=defaults.cancel_fraction,
+                            help="Share of jobs cancelled after their first vector arrives")
+        parser.add_argument("--algorithms", nargs="+", default=list(defaults.algorithms))
+        parser.add_argument("--images", nargs="+", default=list(defaults.images),
+                            help=f"Corpus images uploaded with every job ({', '.join(IMAGES)})")
+        parser.add_argument("--n-anchors", type=int, default=defaults.n_anchors)
+        parser.add_argument("--n-strings", type=int, default=defaults.n_strings)
+        parser.add_argument("--ramp", type=float, default=defaults.ramp,
+                            help="Seconds over which client start times are spread")
+        parser.add_argument("--job-timeout", type=float, default=defaults.job_timeout)
+        parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+        parser.add_argument("--server-cmd", default=DEFAULT_SERVER_CMD,
+                            help="Command that serves the app on {port} (default: the Dockerfile's Gunicorn)")
+        parser.add_argument("--url", default=None,
+                            help="Test an already running server instead (no CPU/RSS figures)")
+        parser.add_argument("--output", type=Path, default=None, help="Also write the JSON report here")
+
+    def handle(self, *args, **opts):
+        unknown = [a for a in opts["algorithms"] if a not in ALGORITHMS]
+        if unknown:
+            raise CommandError(f"Unknown algorithm(s): {', '.join(unknown)}")
+        unknown = [i for i in opts["images"] if i not in IMAGES]
+        if unknown:
+            raise CommandError(f"Unknown corpus image(s): {', '.join(unknown)}")
+
+        profile = LoadProfile(
+            clients=opts["clients"],
+            jobs_per_client=opts["jobs_per_client"],
+            cancel_fraction=opts["cancel_fraction"],
+            algorithms=tuple(opts["algorithms"]),
+            images=tuple(opts["images"]),
+            n_anchors=opts["n_anchors"],
+            n_strings=opts["n_strings"],
+            ramp=opts["ramp"],
+            job_timeout=opts["job_timeout"],
+            seed=opts["seed"],
+        )
+
+        def on_job(r):
+            ttfv = f"{r.first_vector:.2f}s" if r.first_vector is not None else "-"
+            self.stdout.write(f"  client {r.client}: {r.outcome}, first vector {ttfv}"
+                              + (f" — {r.error}" if r.error else ""))
+
+        if opts["url"]:
+            report = run_load_test(opts["url"], profile, on_job=on_job)
+        else:
+            self.stdout.write(f"Starting: {opts['server_cmd']}")
+            try:
+                with local_server(opts["server_cmd"]) as (base_url, proc):
+                    report = run_load_test(base_url, profile, server_pid=proc.pid, on_job=on_job)
+            except RuntimeError as e:
+                raise CommandError(str(e))
+            report["server_cmd"] = opts["server_cmd"]
+
+        self._print(report)
+        if opts["output"]:
+            opts["output"].write_text(json.dumps(report, indent=2))
+            self.stdout.write(f"Wrote {opts['output']}")
+
+    def _print(self, report):
+        self.stdout.write(
+            f"\n{report['jobs']} jobs in {report['wall_seconds']:.1f}s: "
+            + ", ".join(f"{n} {k}" for k, n in sorted(report["outcomes"].items()))
+            + f"; error rate {report['error_rate']:.1%}, rejected {report['rejection_rate']:.1%}"
+        )
+        self.stdout.write(f"{'':<22}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}{'n':>5}")
+        for key, label in (("preview_seconds", "preview upload"), ("time_to_first_vector", "time to first vector"),
+                           ("job_latency", "job latency"), ("cancel_latency", "cancel to close")):
+            p = report[key]
+            if p:
+                self.stdout.write(f"{label:<22}{p['p50']:>7.2f}s{p['p95']:>7.2f}s{p['p99']:>7.2f}s"
+                                  f"{p['max']:>7.2f}s{p['n']:>5}")
+        server = report["server"]
+        if server:
+            self.stdout.write(f"server: {server['cpu_seconds']:.1f} CPU-s ({server['cpu_percent']:.0f}% mean), "
+                              f"RSS {server['start_rss_mb']:.0f} → {server['peak_rss_mb']:.0f} MiB peak")
+        for error in report["errors"]:
+            self.stdout.write(self.style.WARNING(f"error: {error}"))
@@ -1,11 +1,24 @@
 # stringart_app/planner.py
 
-from typing import List, Dict, Optional, Callable
+from typing import Any, List, Dict, Optional, Callable, Sequence
 import numpy as np
 import logging
 
 # pull in your registry
 from .image_to_vector_algorithms import ALGORITHMS
+from .checkpoints import Checkpoint, input_key
+from .control import CancellationToken, JobCancelled
+from .instrumentation import PROCESS_METRICS
+
+
+def _lookup(algorithm: str, logger: logging.Logger):
+    algo = ALGORITHMS.get(algorithm)
+    if algo is None:
+        valid = ", ".join(ALGORITHMS.keys())
+        logger.error(f"Unknown algorithm '{algorithm}'. Valid options: {valid}")
+        raise ValueError(f"Unknown algorithm '{algorithm}'. Valid options: {valid}")
+    return algo
+
 
 def generate_string_vectors(
     pixels: np.ndarray,
@@ -16,7 +29,19 @@ def generate_string_vectors(
     algorithm: str = "greedy",
     logger: Optional[logging.Logger] = None,
     *,
-    vector_callback: Optional[Callable[[int, int], None]] = None
+    vector_callback: Optional[Callable[[int, int], None]] = None,
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    deadline: Optional[float] = None,
+    time_budget: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    hough_candidates: bool = False,
+    scoring: Optional[str] = None,
+    stopping: Optional[Dict[str, Any]] = None,
+    resume: Optional[Checkpoint] = None,
+    checkpoint_callback: Optional[Callable[[Checkpoint], None]] = None,
+    refine_time: Optional[float] = None,
+    replace_callback: Optional[Callable[[int, int, int], None]] = None,
+    **options: Any
 ) -> List[Dict[str, int]]:
     """
     Dispatch to whichever StringArtAlgorithm you've registered, passing along
@@ -32,24 +57,265 @@ def generate_string_vectors(
     :param logger: optional Logger to receive debug/info messages
     :param vector_callback: optional callable that will be called for each
                             generated vector as vector_callback(from_idx, to_idx)
-    :returns: list of {"from": i, "to": j} dicts
+    :param progress_callback: optional callable receiving structured progress
+                              dicts (strings/sec, candidates evaluated, error)
+    :param deadline: optional absolute time.monotonic() by which to return
+    :param time_budget: optional seconds from now by which to return; the
+                        algorithm then returns its best valid result so far
+    :param cancel_token: optional CancellationToken or Event; setting it makes
+                         the algorithm raise JobCancelled within an iteration
+    :param hough_candidates: restrict algorithms with SUPPORTS_CANDIDATES to
+                             the image's (cached) Hough candidate chords
+    :param scoring: optional chord-scoring engine ("masks" or "radon") for
+                    algorithms listing it in SCORING_ENGINES; others use
+                    their default
+    :param stopping: optional overrides of the algorithm's convergence
+                     tests (see control.StoppingCriteria), or False to run
+                     the full length
+    :param resume: optional Checkpoint of an earlier run; algorithms with
+                   SUPPORTS_RESUME continue it up to n_strings, computing
+                   only the new vectors, if it was made by the same
+                   algorithm on the same inputs (otherwise it is ignored).
+                   Its vectors are replayed to vector_callback first, so
+                   the stream always adds up to the returned result
+    :param checkpoint_callback: optional callable receiving a Checkpoint of
+                                the finished run, for algorithms with
+                                SUPPORTS_RESUME
+    :param refine_time: optional seconds for a local-search pass after the
+                        algorithm (see refine.refine_vectors), swapping
+                        strings while that lowers the error; skipped for
+                        continuous threads. Checkpoints hold the unrefined run
+    :param replace_callback: optional callable called for each swap the
+                             refinement makes, as
+                             replace_callback(index, from_idx, to_idx)
+    :param options: algorithm-specific keyword arguments, e.g. continuous=True
+                    for algorithms with SUPPORTS_CONTINUOUS
+    :returns: list of {"from": i, "to": j} dicts, including any resumed ones
     """
     if logger is None:
         logger = logging.getLogger(__name__)
 
-    algo = ALGORITHMS.get(algorithm)
-    if algo is None:
-        valid = ", ".join(ALGORITHMS.keys())
-        logger.error(f"Unknown algorithm '{algorithm}'. Valid options: {valid}")
-        raise ValueError(f"Unknown algorithm '{algorithm}'. Valid options: {valid}")
+    algo = _lookup(algorithm, logger)
+
+    # shared candidate stage, computed once per image and reused across runs
+    if hough_candidates:
+        if algo.SUPPORTS_CANDIDATES:
+            from .candidates import hough_candidates as find_candidates  # imports scikit-image
+            found = find_candidates(pixels, n_anchors)
+            logger.debug(f"[{algorithm}] Restricted to {len(found)} Hough candidate chords")
+            options["candidate_pairs"] = found.pairs
+        else:
+            logger.info(f"[{algorithm}] Hough candidates not supported; searching every chord")
+
+    if scoring:
+        if scoring in algo.SCORING_ENGINES:
+            options["scoring"] = scoring
+        else:
+            logger.info(f"[{algorithm}] {scoring} scoring not supported; using {algo.SCORING_ENGINES[0]}")
+
+    if stopping is not None:
+        options["stopping"] = stopping
+
+    # checkpoints, only valid for the exact inputs they were made from
+    states: List[Dict[str, Any]] = []
+    if algo.SUPPORTS_RESUME and (resume is not None or checkpoint_callback is not None):
+        key = input_key(pixels, n_anchors, line_thickness, options)
+        if resume is not None and (resume.algorithm != algorithm or resume.key != key):
+            logger.info(f"[{algorithm}] Checkpoint is for different inputs; starting from scratch")
+            resume = None
+        if resume is not None:
+            logger.info(f"[{algorithm}] Resuming from {len(resume.vectors)} checkpointed strings")
+            if vector_callback:
+                for v in resume.vectors[:n_strings]:
+                    vector_callback(v["from"], v["to"])
+            if len(resume.vectors) >= n_strings:
+                return resume.vectors[:n_strings]
+            options["resume"] = resume
+        if checkpoint_callback is not None:
+            options["checkpoint_callback"] = states.append
+    elif resume is not None:
+        logger.info(f"[{algorithm}] Resuming not supported; starting from scratch")
+
+    # delegate to the selected strategy, providing the logger and callbacks
+    try:
+        vectors = algo.generate(
+            pixels,
+            n_anchors=n_anchors,
+            n_strings=n_strings,
+            line_thickness=line_thickness,
+            sample_pairs=sample_pairs,
+            logger=logger,
+            vector_callback=vector_callback,
+            progress_callback=progress_callback,
+            deadline=deadline,
+            time_budget=time_budget,
+            cancel_token=cancel_token,
+            **options,
+        )
+    except JobCancelled:
+        raise
+    except Exception:
+        PROCESS_METRICS.record_failure(algorithm)
+        raise
+    if states:
+        checkpoint_callback(Checkpoint(algorithm, key, vectors, states[-1]))
+
+    if refine_time:
+        if options.get("continuous"):
+            logger.info(f"[{algorithm}] Refinement would break the continuous thread; skipped")
+        else:
+            from .refine import refine_vectors  # imports the chord tables and scipy.sparse
+            vectors = refine_vectors(
+                pixels, vectors, n_anchors, line_thickness, logger,
+                replace_callback=replace_callback,
+                time_budget=refine_time,
+                cancel_token=cancel_token,
+            )
+    return vectors
+
+
+def generate_string_vectors_at(
+    pixels: np.ndarray,
+    string_counts: Sequence[int],
+    n_anchors: int = 180,
+    line_thickness: int = 1,
+    sample_pairs: int = 1000,
+    algorithm: str = "greedy",
+    logger: Optional[logging.Logger] = None,
+    *,
+    vector_callback: Optional[Callable[[int, int], None]] = None,
+    result_callback: Optional[Callable[[int, List[Dict[str, int]]], None]] = None,
+    **kwargs: Any
+) -> Dict[int, List[Dict[str, int]]]:
+    """
+    Results for several string counts of the same image. Algorithms with
+    PREFIX_RESULTS run once, to the largest count, and each smaller result
+    is a prefix of it; the rest run once per count.
+
+    :param string_counts: the n_strings values wanted, e.g. (100, 200, 400)
+    :param vector_callback: streams the vectors of the largest result only
+    :param result_callback: optional callable called as
+                            result_callback(n_strings, vectors) as soon as
+                            each result is complete
+    :param kwargs: anything else generate_string_vectors accepts; a
+                   refinement pass (refine_time) applies to the largest
+                   result only
+    :returns: {n_strings: vectors}; runs that stop early (no improvement,
+              time budget) give every larger count the same shorter result
+    """
+    if logger is None:
+        logger = logging.getLogger(__name__)
+
+    counts = sorted({int(n) for n in string_counts})
+    if not counts or counts[0] < 1:
+        raise ValueError(f"String counts must be positive, got {list(string_counts)}")
+    algo = _lookup(algorithm, logger)
+
+    def run(n: int, on_vector: Optional[Callable[[int, int], None]]) -> List[Dict[str, int]]:
+        return generate_string_vectors(
+            pixels, n_anchors, n, line_thickness, sample_pairs, algorithm, logger,
+            vector_callback=on_vector, **kwargs,
+        )
+
+    results: Dict[int, List[Dict[str, int]]] = {}
+    if not algo.PREFIX_RESULTS:
+        if len(counts) > 1:
+            logger.info(f"[{algorithm}] Results are not prefixes of each other; one run per string count")
+        for n in counts:
+            results[n] = run(n, vector_callback if n == counts[-1] else None)
+            if result_callback:
+                result_callback(n, results[n])
+        return results
+
+    vectors: List[Dict[str, int]] = []
+    pending = list(counts)
+
+    def on_vector(i: int, j: int) -> None:
+        vectors.append({"from": i, "to": j})
+        if vector_callback:
+            vector_callback(i, j)
+        if len(pending) > 1 and len(vectors) == pending[0]:
+            n = pending.pop(0)
+            results[n] = vectors[:n]
+            if result_callback:
+                result_callback(n, results[n])
+
+    full = run(counts[-1], on_vector)
+    # the largest count (refined, if asked) and any the run stopped short of
+    for n in pending:
+        results[n] = full
+        if result_callback:
+            result_callback(n, full)
+    return results
+
+
+def generate_string_vectors_batch(
+    images: Sequence[np.ndarray],
+    n_anchors: int = 180,
+    n_strings: int = 200,
+    line_thickness: int = 1,
+    sample_pairs: int = 1000,
+    algorithm: str = "coverage",
+    logger: Optional[logging.Logger] = None,
+    *,
+    vector_callback: Optional[Callable[[int, int, int], None]] = None,
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    deadline: Optional[float] = None,
+    time_budget: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    stopping: Optional[Dict[str, Any]] = None,
+    checkpoint_callback: Optional[Callable[[int, Checkpoint], None]] = None,
+    **options: Any
+) -> List[List[Dict[str, int]]]:
+    """
+    Like generate_string_vectors, for several images with the same
+    parameters at once. Algorithms with SUPPORTS_BATCH score every image
+    in one pass per iteration; the rest run the images one after another.
+
+    :param images: grayscale pixel arrays
+    :param vector_callback: optional callable called for each generated
+                            vector as vector_callback(image_index, from_idx, to_idx)
+    :param deadline: optional absolute time.monotonic() by which the whole
+                     batch must return
+    :param time_budget: optional seconds from now for the whole batch
+    :param stopping: convergence test overrides, as for generate_string_vectors
+    :param checkpoint_callback: optional callable called as
+                                checkpoint_callback(image_index, checkpoint)
+                                with each image's end-of-run state, keyed as
+                                generate_string_vectors keys that image's run
+    :returns: one list of {"from": i, "to": j} dicts per image, in order
+    """
+    if logger is None:
+        logger = logging.getLogger(__name__)
 
-    # delegate to the selected strategy, providing the logger and callback
-    return algo.generate(
-        pixels,
-        n_anchors=n_anchors,
-        n_strings=n_strings,
-        line_thickness=line_thickness,
-        sample_pairs=sample_pairs,
-        logger=logger,
-        vector_callback=vector_callback,
-    )
+    algo = _lookup(algorithm, logger)
+    if stopping is not None:
+        options["stopping"] = stopping
+    states: Dict[int, Dict[str, Any]] = {}
+    keys: List[str] = []
+    if algo.SUPPORTS_RESUME and checkpoint_callback is not None:
+        keys = [input_key(pixels, n_anchors, line_thickness, options) for pixels in images]
+        options["checkpoint_callback"] = states.__setitem__
+    try:
+        results = algo.generate_batch(
+            images,
+            n_anchors=n_anchors,
+            n_strings=n_strings,
+            line_thickness=line_thickness,
+            sample_pairs=sample_pairs,
+            logger=logger,
+            vector_callback=vector_callback,
+            progress_callback=progress_callback,
+            deadline=deadline,
+            time_budget=time_budget,
+            cancel_token=cancel_token,
+            **options,
+        )
+    except JobCancelled:
+        raise
+    except Exception:
+        PROCESS_METRICS.record_failure(algorithm)
+        raise
+    for index, state in sorted(states.items()):
+        checkpoint_callback(index, Checkpoint(algorithm, keys[index], results[index], state))
+    return results
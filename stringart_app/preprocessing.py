@@ -3,6 +3,7 @@
 from PIL import Image, ImageOps
 import numpy as np
 import logging
+from io import BytesIO
 from typing import Optional, Tuple, Union, BinaryIO
 import os
 
@@ -11,6 +12,14 @@ import os
 # Increase or decrease this to control the number of overlapping string layers.
 DEFAULT_LEVELS = 8
 
+# Decoding JPEGs at reduced scale: ask for at least this many times the
+# target size, so the final LANCZOS pass still has detail to work from.
+DRAFT_GAP = 2
+
+# Most pixels a preview may decode (after any reduced-scale JPEG decoding);
+# bigger images are refused as likely decompression bombs.
+DEFAULT_MAX_PIXELS = 50_000_000
+
 
 def load_image_to_pixels(
     path: Union[str, bytes, os.PathLike, BinaryIO],  # Accept file-like objects
@@ -60,3 +69,40 @@ def load_image_to_pixels(
     result = quantized.astype(np.uint8)
     logger.debug("Finished preprocessing image")
     return result
+
+
+def load_thumbnail(
+    data: bytes,
+    size: Tuple[int, int] = (200, 200),
+    max_pixels: int = DEFAULT_MAX_PIXELS,
+) -> Image.Image:
+    """
+    Decode `data` into an RGB thumbnail no larger than `size`, with any
+    transparency composited over white.
+
+    JPEGs are decoded at a reduced scale (1/2 to 1/8) close to the
+    thumbnail, so a 12 MP photo costs about as much as a small one; other
+    formats are box-reduced before the LANCZOS pass. Raises
+    PIL.Image.DecompressionBombError when more than `max_pixels` would
+    have to be decoded.
+    """
+    img = Image.open(BytesIO(data))
+    img.draft('RGB', (size[0] * DRAFT_GAP, size[1] * DRAFT_GAP))
+    width, height = img.size
+    if width * height > max_pixels:
+        raise Image.DecompressionBombError(
+            f"image of {width}x{height} pixels exceeds the {max_pixels} pixel limit"
+        )
+
+    alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    if alpha:
+        img = img.convert("RGBA")
+    elif img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    img.thumbnail(size, Image.Resampling.LANCZOS, reducing_gap=DRAFT_GAP)
+
+    # Composite transparency over white, at thumbnail size
+    if alpha:
+        bg = Image.new("RGBA", img.size, (255, 255, 255, 255))
+        img = Image.alpha_composite(bg, img)
+    return img.convert("RGB")
@@ -0,0 +1,137 @@
+# stringart_app/refine.py
+#
+# Local-search refinement, run after any algorithm: repeatedly take out the
+# least useful string and put in the best replacement, for as long as that
+# lowers the error and time allows. Greedy picks can't otherwise be undone,
+# and the metaheuristics start from random solutions, so a few hundred
+# cheap swaps usually beat the same time spent running them longer.
+#
+# Error is the squared difference between the target darkness and the
+# result as the renderer draws it: a pixel is black if any string covers
+# it. A live per-pixel coverage count then decides every swap. Removing a
+# string only changes the pixels it alone covers, and adding one only
+# changes the uncovered pixels it crosses. Each chord's ΔSSE for both moves
+# is kept up to date through the pixels a swap actually changed (via
+# ChordTable.by_pixel) rather than rescoring every chord.
+#
+
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .chords import chord_table
+from .control import CancellationToken, Deadline
+from .instrumentation import RunMetrics
+
+# Smallest error reduction worth a swap
+MIN_GAIN = 1e-6
+# Least useful strings tried per swap before settling for a local optimum
+MAX_TRIES = 8
+
+
+def refine_vectors(
+    pixels: np.ndarray,
+    vectors: List[Dict[str, int]],
+    n_anchors: int = 180,
+    line_thickness: int = 1,
+    logger: Optional[logging.Logger] = None,
+    *,
+    replace_callback: Optional[Callable[[int, int, int], None]] = None,
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    deadline: Optional[float] = None,
+    time_budget: Optional[float] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    max_swaps: Optional[int] = None,
+) -> List[Dict[str, int]]:
+    """
+    Improve `vectors` by swapping strings until no swap helps, the time is
+    up or `max_swaps` is reached. The replacement takes the removed string's
+    position, so the result has the same length; each swap is reported as
+    replace_callback(index, from_idx, to_idx). Returns a new list.
+    """
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    metrics = RunMetrics("refine", progress_callback, logger)
+    budget = Deadline.coerce(deadline, time_budget)
+    cancel = CancellationToken.coerce(cancel_token)
+
+    with metrics.phase("setup"):
+        height, width = pixels.shape
+        table = chord_table(n_anchors, width, height, line_thickness)
+        masks, by_pixel = table.masks, table.by_pixel
+        darkness = (255.0 - pixels.astype(np.float64)).ravel() / 255.0
+        add_weight = 1.0 - 2.0 * darkness  # ΔSSE of covering a bare pixel
+
+        vectors = [dict(v) for v in vectors]
+        rows = table.rows((v["from"], v["to"]) for v in vectors)
+        count = np.bincount(
+            np.concatenate([table.pixels(k) for k in rows]) if len(rows) else np.zeros(0, dtype=np.intp),
+            minlength=width * height,
+        )
+        # ΔSSE of adding each chord, and of removing it if drawn
+        gain_add = masks @ np.where(count == 0, add_weight, 0.0)
+        gain_remove = masks @ np.where(count == 1, -add_weight, 0.0)
+        error = float(np.sum((darkness - (count > 0)) ** 2))
+        metrics.gauge("error", error)
+
+    def update(px: np.ndarray, step: int) -> None:
+        # move the strings on `px` by `step` and patch the chord sums
+        # through the pixels whose bare / solely-covered state changed
+        before = count[px]
+        count[px] = before + step
+        after = count[px]
+        d_add = np.where(after == 0, add_weight[px], 0.0) - np.where(before == 0, add_weight[px], 0.0)
+        d_remove = np.where(after == 1, -add_weight[px], 0.0) - np.where(before == 1, -add_weight[px], 0.0)
+        changed = (d_add != 0) | (d_remove != 0)
+        if changed.any():
+            touching = by_pixel[px[changed]]
+            gain_add[:] += touching.T @ d_add[changed]
+            gain_remove[:] += touching.T @ d_remove[changed]
+
+    swaps = 0
+    while max_swaps is None or swaps < max_swaps:
+        cancel.raise_if_cancelled()
+        if budget.expired():
+            logger.info(f"[refine] Time budget exhausted after {swaps} swaps")
+            break
+
+        swapped = False
+        with metrics.phase("scoring"):
+            order = np.argsort(gain_remove[rows], kind="stable")[:MAX_TRIES]
+        for pos in order:
+            out = int(rows[pos])
+            removal = gain_remove[out]
+            with metrics.phase("scoring"):
+                update(table.pixels(out), -1)
+                kept = gain_add[out]
+                gain_add[out] = np.inf  # not straight back in
+                into = int(np.argmin(gain_add))
+                gain_add[out] = kept
+            metrics.count("candidates_evaluated", len(table))
+            delta = removal + gain_add[into]
+            if delta >= -MIN_GAIN:
+                update(table.pixels(out), +1)
+                continue
+
+            with metrics.phase("commit"):
+                update(table.pixels(into), +1)
+                rows[pos] = into
+                i, j = table.pairs[into]
+                vectors[pos] = {"from": i, "to": j}
+                error += delta
+                logger.debug("[refine] Swap %d: string %d (%d,%d) ΔSSE=%.3f", swaps + 1, pos, i, j, delta)
+                if replace_callback:
+                    replace_callback(int(pos), i, j)
+                swaps += 1
+                swapped = True
+                metrics.gauge("error", error)
+                metrics.step("swaps")
+            break
+        if not swapped:
+            logger.debug(f"[refine] No improving swap; local optimum after {swaps} swaps")
+            break
+
+    logger.info(f"[refine] {swaps} swaps, SSE {metrics.gauges['error']:.1f}")
+    metrics.finish()
+    return vectors
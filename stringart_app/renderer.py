@@ -2,7 +2,9 @@
 
 import math
 import logging
-from typing import Optional
+from io import BytesIO
+from typing import Iterator, Optional
+import numpy as np
 from PIL import Image, ImageDraw
 
 
@@ -68,7 +70,7 @@ def render_vector_list(
             width=line_width
         )
         if idx % 50 == 0:
-            logger.debug(f"Drew {idx}/{len(vectors)} lines")
+            logger.debug("Drew %d/%d lines", idx, len(vectors))
 
     logger.debug("Completed render_vector_list")
     return img
@@ -107,7 +109,142 @@ def render_overlay(
             width=line_width
         )
         if idx % 50 == 0:
-            logger.debug(f"Overlayed {idx}/{len(vectors)} lines")
+            logger.debug("Overlayed %d/%d lines", idx, len(vectors))
 
     logger.debug("Completed render_overlay")
     return overlay
+
+
+def preview_error(preview: Image.Image, pixels: np.ndarray) -> float:
+    """
+    Root-mean-square difference (0–255) between a rendered preview and the
+    grayscale target it approximates; comparable across algorithms, unlike
+    their internal error measures.
+    """
+    diff = np.asarray(preview.convert('L'), dtype=np.float64) - pixels.astype(np.float64)
+    return float(np.sqrt(np.mean(diff * diff)))
+
+
+class IncrementalRenderer:
+    """
+    Keeps a single canvas alive between frames so a build-up animation costs
+    one line draw per string instead of a full re-render per frame.
+
+    Also tracks the bounding box touched since the last `delta()` call, so
+    callers can ship only the changed region of each frame.
+    """
+
+    def __init__(
+        self,
+        size: tuple[int, int],
+        n_anchors: int = 180,
+        line_width: int = 1,
+        logger: Optional[logging.Logger] = None
+    ):
+        if logger is None:
+            logger = logging.getLogger(__name__)
+        self.logger = logger
+        self.size = size
+        self.line_width = line_width
+        self.image = Image.new('L', size, color=255)
+        self.draw = ImageDraw.Draw(self.image)
+        self.anchors = generate_radial_anchors(n_anchors, size[0], size[1], logger=logger)
+        self.count = 0
+        self._dirty: Optional[list[float]] = None
+
+    def add(self, vector: dict[str, int]) -> None:
+        """
+        Draw one more string onto the persistent canvas.
+        """
+        a = self.anchors[vector['from']]
+        b = self.anchors[vector['to']]
+        self.draw.line([a, b], fill=0, width=self.line_width)
+        self.count += 1
+
+        pad = self.line_width
+        box = [min(a[0], b[0]) - pad, min(a[1], b[1]) - pad,
+               max(a[0], b[0]) + pad, max(a[1], b[1]) + pad]
+        if self._dirty is None:
+            self._dirty = box
+        else:
+            self._dirty = [min(self._dirty[0], box[0]), min(self._dirty[1], box[1]),
+                           max(self._dirty[2], box[2]), max(self._dirty[3], box[3])]
+
+    def snapshot(self) -> Image.Image:
+        """
+        Return a copy of the canvas as it stands now.
+        """
+        return self.image.copy()
+
+    def delta(self) -> Optional[tuple[Image.Image, tuple[int, int, int, int]]]:
+        """
+        Return the region changed since the previous call as (patch, box),
+        where box is (left, top, right, bottom) in canvas pixels, or None if
+        nothing has been drawn since.
+        """
+        if self._dirty is None:
+            return None
+        w, h = self.size
+        box = (
+            max(0, math.floor(self._dirty[0])),
+            max(0, math.floor(self._dirty[1])),
+            min(w, math.ceil(self._dirty[2]) + 1),
+            min(h, math.ceil(self._dirty[3]) + 1),
+        )
+        self._dirty = None
+        return self.image.crop(box), box
+
+
+def render_progressive_frames(
+    vectors: list[dict[str, int]],
+    size: tuple[int, int],
+    n_anchors: int = 180,
+    every: int = 10,
+    line_width: int = 1,
+    logger: Optional[logging.Logger] = None
+) -> Iterator[tuple[int, IncrementalRenderer]]:
+    """
+    Single pass over `vectors`, yielding (strings_drawn, renderer) after every
+    `every` strings and once more for the final string. The renderer is shared
+    between yields, so take a snapshot()/delta() before advancing.
+    """
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    every = max(1, every)
+    logger.debug(
+        f"render_progressive_frames called with "
+        f"{len(vectors)} vectors, size={size}, every={every}"
+    )
+
+    renderer = IncrementalRenderer(size, n_anchors=n_anchors, line_width=line_width, logger=logger)
+    for v in vectors:
+        renderer.add(v)
+        if renderer.count % every == 0:
+            yield renderer.count, renderer
+    if renderer.count % every != 0:
+        yield renderer.count, renderer
+
+
+def encode_animation(
+    frames: list[Image.Image],
+    fmt: str = 'GIF',
+    frame_ms: int = 80,
+    hold_ms: int = 1500
+) -> bytes:
+    """
+    Encode a list of frames as an animated GIF or WebP, holding the final
+    frame for `hold_ms` so the finished piece is visible before looping.
+    """
+    if not frames:
+        raise ValueError("encode_animation needs at least one frame")
+    durations = [frame_ms] * (len(frames) - 1) + [hold_ms]
+    buf = BytesIO()
+    frames[0].save(
+        buf,
+        format=fmt,
+        save_all=True,
+        append_images=frames[1:],
+        duration=durations,
+        loop=0,
+    )
+    return buf.getvalue()
@@ -0,0 +1,244 @@
+# stringart_app/scheduler.py
+#
+# Memory-aware admission control for web jobs. Each job's peak memory is
+# estimated before it starts (see costs.py) and reserved against a fixed
+# budget: jobs run while their reservations fit, wait in FIFO order while
+# they don't fit yet, and are rejected outright when they never could (or
+# the queue is full). The measured peak and CPU time of every finished job
+# are kept next to its estimate for calibrating the cost model.
+#
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from .costs import CostEstimate
+
+ADMITTED = "admitted"
+QUEUED = "queued"
+REJECTED = "rejected"
+
+# Finished jobs kept for calibration
+HISTORY_SIZE = 200
+
+
+def current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes, or None where unavailable."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+@dataclass
+class JobRecord:
+    """
+    A submitted job's estimate, admission status and, once finished, its
+    measurements. `measured_peak_bytes` is the process RSS high-water mark
+    above its level at start, so it is only comparable to the estimate when
+    the job ran alone (`concurrent` is False).
+    """
+    job_id: str
+    estimate: CostEstimate
+    status: str
+    reason: str = ""
+    submitted: float = field(default_factory=time.monotonic)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    measured_peak_bytes: Optional[int] = None
+    measured_cpu_seconds: Optional[float] = None
+    concurrent: bool = False
+    logger: Optional[logging.Logger] = field(default=None, repr=False)
+
+    @property
+    def queued_seconds(self) -> Optional[float]:
+        return None if self.started is None else self.started - self.submitted
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "reason": self.reason,
+            "estimated_peak_bytes": self.estimate.peak_bytes,
+            "estimated_cpu_seconds": self.estimate.cpu_seconds,
+            "measured_peak_bytes": self.measured_peak_bytes,
+            "measured_cpu_seconds": self.measured_cpu_seconds,
+            "queued_seconds": self.queued_seconds,
+            "concurrent": self.concurrent,
+        }
+
+
+class JobScheduler:
+    """
+    Admit, queue or reject jobs against `memory_budget` bytes of estimated
+    peak memory. Admitted jobs run on their own daemon thread.
+    """
+
+    def __init__(
+        self,
+        memory_budget: int,
+        max_queued: int = 8,
+        sample_interval: float = 0.05,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.memory_budget = memory_budget
+        self.max_queued = max_queued
+        self.sample_interval = sample_interval
+        self.logger = logger or logging.getLogger(__name__)
+        self.reserved = 0
+        self.running: Dict[str, JobRecord] = {}
+        self.queue: Deque[Tuple[JobRecord, Callable[[], None]]] = deque()
+        self.history: Deque[JobRecord] = deque(maxlen=HISTORY_SIZE)
+        self.totals: Dict[str, int] = {ADMITTED: 0, QUEUED: 0, REJECTED: 0}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        job_id: str,
+        estimate: CostEstimate,
+        target: Callable[[], None],
+        logger: Optional[logging.Logger] = None,
+    ) -> JobRecord:
+        """
+        Start `target` now if the estimate fits the free budget, queue it if
+        it will fit once running jobs finish, otherwise reject it. Jobs never
+        overtake the queue, so a large job can't be starved by small ones.
+        `logger` (e.g. the job's SSE logger) receives the measured peak and
+        CPU time next to the estimate when the job finishes.
+        """
+        record = JobRecord(job_id, estimate, ADMITTED, logger=logger)
+        with self._lock:
+            if estimate.peak_bytes > self.memory_budget:
+                record.status = REJECTED
+                record.reason = (
+                    f"estimated peak {estimate.peak_mb:.0f} MB exceeds the "
+                    f"{self.memory_budget / 2 ** 20:.0f} MB job memory budget"
+                )
+            elif not self.queue and self.reserved + estimate.peak_bytes <= self.memory_budget:
+                self._start(record, target)
+            elif len(self.queue) < self.max_queued:
+                record.status = QUEUED
+                record.reason = f"waiting for {estimate.peak_mb:.0f} MB behind {len(self.queue)} queued job(s)"
+                self.queue.append((record, target))
+            else:
+                record.status = REJECTED
+                record.reason = "job queue is full"
+            self.totals[record.status] += 1
+            if record.status == REJECTED:
+                self.history.append(record)
+        return record
+
+    def _start(self, record: JobRecord, target: Callable[[], None]) -> None:
+        # called with the lock held
+        record.started = time.monotonic()
+        if record.status == QUEUED and record.logger is not None:
+            record.logger.info(f"Job admitted after {record.queued_seconds:.1f}s in the queue")
+        record.status = ADMITTED
+        record.concurrent = bool(self.running)
+        for other in self.running.values():
+            other.concurrent = True
+        self.reserved += record.estimate.peak_bytes
+        self.running[record.job_id] = record
+        threading.Thread(target=self._run, args=(record, target), daemon=True).start()
+
+    def _run(self, record: JobRecord, target: Callable[[], None]) -> None:
+        rss_start = current_rss()
+        peak = [rss_start or 0]
+        done = threading.Event()
+
+        def sample() -> None:
+            while not done.wait(self.sample_interval):
+                rss = current_rss()
+                if rss is not None and rss > peak[0]:
+                    peak[0] = rss
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        if rss_start is not None:
+            sampler.start()
+        cpu_start = time.thread_time()
+        try:
+            target()
+        except Exception:
+            self.logger.exception(f"Job {record.job_id} failed")
+        finally:
+            record.measured_cpu_seconds = time.thread_time() - cpu_start
+            done.set()
+            if rss_start is not None:
+                sampler.join()
+                record.measured_peak_bytes = max(0, max(peak[0], current_rss() or 0) - rss_start)
+            if record.logger is not None:
+                measured = "n/a" if record.measured_peak_bytes is None else f"{record.measured_peak_bytes / 2 ** 20:.0f} MB"
+                record.logger.info(
+                    f"Estimated peak {record.estimate.peak_mb:.0f} MB, measured {measured}"
+                    f"{' (concurrent)' if record.concurrent else ''}; estimated "
+                    f"{record.estimate.cpu_seconds:.1f} CPU-s, measured {record.measured_cpu_seconds:.1f}"
+                )
+            self._finish(record)
+
+    def _finish(self, record: JobRecord) -> None:
+        with self._lock:
+            record.finished = time.monotonic()
+            self.running.pop(record.job_id, None)
+            self.reserved -= record.estimate.peak_bytes
+            self.history.append(record)
+            # admit from the head of the queue while it fits
+            while self.queue and self.reserved + self.queue[0][0].estimate.peak_bytes <= self.memory_budget:
+                queued, target = self.queue.popleft()
+                self._start(queued, target)
+
+    def status(self, job_id: str) -> Optional[str]:
+        with self._lock:
+            if job_id in self.running:
+                return ADMITTED
+            if any(r.job_id == job_id for r, _ in self.queue):
+                return QUEUED
+        return None
+
+    def calibration(self) -> List[Dict[str, object]]:
+        """Estimate vs. measurement of recently finished jobs, oldest first."""
+        with self._lock:
+            return [r.as_dict() for r in self.history if r.finished is not None]
+
+    def render_prometheus(self) -> str:
+        """Scheduler state in Prometheus text format."""
+        with self._lock:
+            finished = [r for r in self.history if r.finished is not None]
+            solo = [r for r in finished if not r.concurrent and r.measured_peak_bytes is not None]
+            samples = [
+                ("stringart_scheduler_memory_budget_bytes", "gauge", "Job memory budget.", {}, self.memory_budget),
+                ("stringart_scheduler_reserved_bytes", "gauge", "Estimated peak memory of running jobs.", {}, self.reserved),
+                ("stringart_scheduler_running_jobs", "gauge", "Jobs running.", {}, len(self.running)),
+                ("stringart_scheduler_queued_jobs", "gauge", "Jobs waiting for memory.", {}, len(self.queue)),
+            ]
+            samples += [
+                ("stringart_scheduler_jobs_total", "counter", "Jobs by admission decision.", {"decision": d}, n)
+                for d, n in sorted(self.totals.items())
+            ]
+            if solo:
+                samples += [
+                    ("stringart_job_peak_estimate_ratio", "gauge",
+                     "Measured over estimated peak memory of the latest solo job.", {},
+                     solo[-1].measured_peak_bytes / max(1, solo[-1].estimate.peak_bytes)),
+                ]
+            if finished:
+                samples += [
+                    ("stringart_job_cpu_estimate_ratio", "gauge",
+                     "Measured over estimated CPU time of the latest job.", {},
+                     finished[-1].measured_cpu_seconds / max(1e-9, finished[-1].estimate.cpu_seconds)),
+                ]
+
+        lines: List[str] = []
+        seen = set()
+        for name, kind, help_text, labels, value in samples:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+            label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+            lines.append(f"{name}{{{label_str}}} {float(value)!r}" if label_str else f"{name} {float(value)!r}")
+        return "\n".join(lines) + "\n"
@@ -1,6 +1,116 @@
 # stringart_app/sse_logging.py
 
+import asyncio
 import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# Forward at most one progress update per this many seconds per stream
+PROGRESS_INTERVAL = 0.25
+
+class EventLog(list):
+    """
+    Append-only list of a job's log lines or results that wakes the streams
+    following it whenever something is appended or it is closed. Appends
+    come from job threads; streams wait either by blocking (wait(), for WSGI)
+    or on their event loop (wait_async(), for ASGI), so an idle stream holds
+    no thread and polls nothing.
+    """
+    def __init__(self, items=()):
+        super().__init__(items)
+        self.closed = False
+        self._cond = threading.Condition()
+        self._waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = set()
+
+    def append(self, item) -> None:
+        super().append(item)
+        self.notify()
+
+    def extend(self, items) -> None:
+        super().extend(items)
+        self.notify()
+
+    def close(self) -> None:
+        """Mark the log finished, waking every stream so it can end."""
+        self.closed = True
+        self.notify()
+
+    def wait(self, index: int, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the log holds more than `index` items or is closed;
+        False if `timeout` passed first.
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self) > index or self.closed, timeout)
+
+    async def wait_async(self, index: int) -> None:
+        """Await more than `index` items, or the log being closed."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._cond:
+            if len(self) > index or self.closed:
+                return
+            waiter = (loop, future)
+            self._waiters.add(waiter)
+        try:
+            await future
+        finally:
+            with self._cond:
+                self._waiters.discard(waiter)
+
+    def notify(self) -> None:
+        """Wake every reader, e.g. so it re-checks its own cancellation."""
+        with self._cond:
+            self._cond.notify_all()
+            waiters, self._waiters = self._waiters, set()
+        # each waiter is woken once per wait, however many appends land first
+        for loop, future in waiters:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(_wake, future)
+
+
+class ResultLog(EventLog):
+    """
+    EventLog of a job's result events that also indexes them as they are
+    appended, per (algorithm, image): the vectors so far with refinement
+    swaps applied, the nail count and the latest progress snapshot. Status
+    polls and downloads read the index instead of rescanning every event.
+    """
+    def __init__(self, items=()):
+        self.vectors: Dict[tuple, list] = {}
+        self.node_counts: Dict[tuple, int] = {}
+        self.progress: Dict[tuple, dict] = {}
+        super().__init__()
+        self.extend(items)
+
+    def append(self, item) -> None:
+        self._index(item)
+        super().append(item)
+
+    def extend(self, items) -> None:
+        items = list(items)
+        for item in items:
+            self._index(item)
+        super().extend(items)
+
+    def _index(self, event: dict) -> None:
+        key = (event.get("algorithm"), event.get("name"))
+        if "node_count" in event:
+            self.node_counts.setdefault(key, event["node_count"])
+        phase = event.get("phase")
+        if phase == "algorithm" and "vector" in event:
+            self.vectors.setdefault(key, []).append(event["vector"])
+        elif phase == "replace" and "vector" in event:
+            self.vectors[key][event["index"]] = event["vector"]
+        elif phase == "progress":
+            self.progress[key] = event["progress"]
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
 
 class SSELogHandler(logging.Handler):
     """
@@ -17,10 +127,13 @@ class SSELogHandler(logging.Handler):
 
 def create_sse_logger(job_id: str,
                       job_logs: dict[str, list[str]],
-                      level: int = logging.DEBUG,
+                      level: int = logging.INFO,
                       fmt: str = "%(message)s") -> logging.Logger:
     """
     Returns a logger configured with an SSELogHandler writing into job_logs[job_id].
+
+    Defaults to INFO so per-iteration algorithm debug output is never
+    formatted or stored; pass level=logging.DEBUG to opt a job into it.
     """
     logger = logging.getLogger(f"sse.{job_id}")
     logger.setLevel(level)
@@ -29,3 +142,26 @@ def create_sse_logger(job_id: str,
     handler.setFormatter(logging.Formatter(fmt))
     logger.addHandler(handler)
     return logger
+
+class ProgressThrottle:
+    """
+    Coalesces a stream of progress snapshots to at most one every `interval`
+    seconds before handing them to `sink`. Snapshots arriving in between are
+    dropped in favour of the next one; final snapshots always go through.
+    """
+    def __init__(self,
+                 sink: Callable[[Dict[str, Any]], None],
+                 interval: float = PROGRESS_INTERVAL):
+        self.sink = sink
+        self.interval = interval
+        self._last: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def __call__(self, progress: Dict[str, Any]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            due = self._last is None or now - self._last >= self.interval
+            if not (due or progress.get("final")):
+                return
+            self._last = now
+        self.sink(progress)
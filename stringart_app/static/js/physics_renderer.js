@@ -37,6 +37,10 @@ export class StringArtStreamer {
     // Coverage counts per pixel
     this.counts = new Uint32Array(this.W * this.H);
 
+    // Lines drawn so far, as [from, to], and a pending full redraw
+    this.lines = [];
+    this._redrawQueued = false;
+
     // Draw optional anchor dots
     this._drawAnchors();
 
@@ -98,6 +102,7 @@ export class StringArtStreamer {
   addLine(from, to) {
     const A = this.coords[from];
     const B = this.coords[to];
+    this.lines.push([from, to]);
 
     // 1) Update coverage counts
     this._plotLineToCounts(
@@ -116,4 +121,46 @@ export class StringArtStreamer {
     this.ctx.lineTo(B.x, B.y);
     this.ctx.stroke();
   }
+
+  /**
+   * Replace line `index` with `from` → `to` (a refinement swap). Swaps
+   * arrive in bursts, so the full redraw is coalesced to one per frame.
+   */
+  replaceLine(index, from, to) {
+    this.lines[index] = [from, to];
+    if (this._redrawQueued) return;
+    this._redrawQueued = true;
+    requestAnimationFrame(() => {
+      this._redrawQueued = false;
+      this._redraw();
+    });
+  }
+
+  /**
+   * Rebuild the coverage counts and repaint every line at the final alpha.
+   */
+  _redraw() {
+    this.counts.fill(0);
+    for (const [from, to] of this.lines) {
+      const A = this.coords[from];
+      const B = this.coords[to];
+      this._plotLineToCounts(
+        Math.round(A.x), Math.round(A.y),
+        Math.round(B.x), Math.round(B.y)
+      );
+    }
+
+    this.ctx.clearRect(0, 0, this.W, this.H);
+    this.ctx.strokeStyle = `rgba(0,0,0,${1 / this._computeKMax()})`;
+    this.ctx.lineWidth = 1;
+    // one stroke per line, so overlaps darken as they do in addLine
+    for (const [from, to] of this.lines) {
+      const A = this.coords[from];
+      const B = this.coords[to];
+      this.ctx.beginPath();
+      this.ctx.moveTo(A.x, A.y);
+      this.ctx.lineTo(B.x, B.y);
+      this.ctx.stroke();
+    }
+  }
 }
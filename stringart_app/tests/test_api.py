@@ -0,0 +1,130 @@
+# stringart_app/tests/test_api.py
+
+import base64
+import time
+from io import BytesIO
+
+import numpy as np
+import pytest
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from stringart_app import vector_format
+from stringart_app.api import API_JOBS, evict_expired_jobs
+from stringart_app.views import JOB_META, JOB_RESULTS
+
+
+def _png(shade=0):
+    img = np.full((64, 64), 255, dtype=np.uint8)
+    img[10:54, 28:36] = shade
+    buf = BytesIO()
+    Image.fromarray(img).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def _spec(**extra):
+    return {
+        "images": [{"name": "bar.png", "data": base64.b64encode(_png()).decode("ascii")}],
+        "algorithms": ["coverage"],
+        "n_anchors": 32,
+        "n_strings": 20,
+        **extra,
+    }
+
+
+def _wait(client, job_id, timeout=30.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        status = client.get(f"/api/v1/jobs/{job_id}").json()
+        if status["state"] not in ("queued", "running"):
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} still {status['state']}")
+
+
+def test_submit_poll_and_fetch_results(client):
+    response = client.post("/api/v1/jobs", _spec(), content_type="application/json")
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    status = _wait(client, job_id)
+    assert status["state"] == "done"
+    [result] = status["results"]
+    assert result == {**result, "algorithm": "coverage", "name": "bar", "strings": 20, "finished": True}
+
+    body = client.get(f"/api/v1/jobs/{job_id}/results").json()
+    vectors = body["results"][0]["vectors"]
+    assert len(vectors) == 20
+
+    binary = client.get(f"/api/v1/jobs/{job_id}/results",
+                        {"format": "binary", "algorithm": "coverage", "name": "bar"})
+    assert binary.status_code == 200
+    assert vector_format.to_dicts(vector_format.loads(binary.content)[1]) == vectors
+
+    # no preview images in API jobs
+    assert not any("processed_image" in r or "preview" in r for r in JOB_RESULTS[job_id])
+
+    assert client.delete(f"/api/v1/jobs/{job_id}").status_code == 204
+    assert job_id not in JOB_META
+    assert client.get(f"/api/v1/jobs/{job_id}").status_code == 404
+
+
+def test_multipart_bulk_submits_one_job_per_image(client):
+    response = client.post("/api/v1/jobs/bulk", {
+        "images": [SimpleUploadedFile(f"img{i}.png", _png(shade=40 * i)) for i in range(3)],
+        "spec": '{"algorithms": "coverage", "n_anchors": 32, "n_strings": 10}',
+    })
+
+    jobs = response.json()["jobs"]
+    assert [j["http_status"] for j in jobs] == [202, 202, 202]
+    names = [_wait(client, j["job_id"])["results"][0]["name"] for j in jobs]
+    assert names == ["img0", "img1", "img2"]
+
+
+def test_bulk_reports_each_spec_on_its_own(client):
+    response = client.post("/api/v1/jobs/bulk", {
+        "defaults": {"algorithms": ["coverage"], "n_anchors": 32, "n_strings": 10},
+        "jobs": [_spec(n_strings=5), {"images": []}],
+    }, content_type="application/json")
+
+    ok, bad = response.json()["jobs"]
+    assert ok["http_status"] == 202 and bad["http_status"] == 400
+    _wait(client, ok["job_id"])
+
+
+@pytest.mark.parametrize("spec, message", [
+    (_spec(algorithms=["nope"]), "Unknown algorithm"),
+    (_spec(n_anchors="many"), "n_anchors"),
+    (_spec(tier="gold"), "Unknown tier"),
+    (_spec(stopping={"patience": 3}), "Unknown stopping"),
+    ({"algorithms": ["coverage"]}, "images"),
+])
+def test_invalid_specs_are_rejected(client, spec, message):
+    response = client.post("/api/v1/jobs", spec, content_type="application/json")
+
+    assert response.status_code == 400
+    assert message in response.json()["error"]
+
+
+def test_delete_cancels_a_running_job(client):
+    job_id = client.post("/api/v1/jobs", _spec(n_strings=100000, n_anchors=120),
+                         content_type="application/json").json()["job_id"]
+
+    assert client.delete(f"/api/v1/jobs/{job_id}").status_code == 204
+    assert _wait(client, job_id)["state"] == "cancelled"
+    unfinished = client.get(f"/api/v1/jobs/{job_id}/results",
+                            {"format": "binary", "algorithm": "coverage", "name": "bar"})
+    assert unfinished.status_code == 409
+
+
+def test_finished_jobs_are_forgotten_after_the_ttl(client):
+    job_id = client.post("/api/v1/jobs", _spec(), content_type="application/json").json()["job_id"]
+    assert _wait(client, job_id)["state"] == "done"
+
+    evict_expired_jobs()
+    assert job_id in JOB_META and job_id in API_JOBS
+
+    evict_expired_jobs(now=time.monotonic() + settings.STRINGART_API_JOB_TTL_SECONDS + 1)
+    assert job_id not in JOB_RESULTS and job_id not in API_JOBS
+    assert client.get(f"/api/v1/jobs/{job_id}").status_code == 404
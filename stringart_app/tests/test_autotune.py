@@ -0,0 +1,137 @@
+# stringart_app/tests/test_autotune.py
+
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from stringart_app.autotune import CostModel, calibrate_from_report, knob_defaults, tune
+from stringart_app.planner import generate_string_vectors
+
+
+def _image():
+    img = np.full((64, 64), 255, dtype=np.uint8)
+    img[10:54, 28:36] = 0
+    return img
+
+
+def test_tuned_settings_fit_the_target_and_grow_with_it():
+    model = CostModel()
+    algorithms = ["coverage", "greedy"]
+
+    tight = tune(algorithms, 2.0, model=model)
+    loose = tune(algorithms, 60.0, model=model)
+
+    assert tight.fits and tight.predicted_seconds <= 2.0
+    assert loose.predicted_seconds <= 60.0
+    assert loose.n_anchors * loose.n_strings > tight.n_anchors * tight.n_strings
+
+
+def test_knobs_drop_below_their_defaults_only_when_needed():
+    model = CostModel()
+
+    tight = tune(["memetic"], 1.0, model=model, max_anchors=120, max_strings=100)
+    loose = tune(["memetic"], 600.0, model=model, max_anchors=120, max_strings=100)
+
+    defaults = knob_defaults("memetic")
+    assert loose.options["memetic"] == defaults
+    assert all(tight.options["memetic"][k] <= defaults[k] for k in defaults)
+    assert tight.options["memetic"] != defaults
+
+
+def test_caps_and_impossible_targets():
+    model = CostModel()
+
+    capped = tune(["coverage"], 600.0, model=model, max_anchors=100, max_strings=300)
+    assert capped.n_anchors <= 100 and capped.n_strings <= 300
+
+    hopeless = tune(["graph-optimisation"], 1e-4, model=model)
+    assert not hopeless.fits
+    assert hopeless.predicted_seconds > 1e-4
+
+
+def test_refit_follows_recorded_timings():
+    model, reference = CostModel(), CostModel()
+    run = {"n_anchors": 120, "n_strings": 200, "size": 200}
+    prior = model.predict("coverage", run)
+
+    for n_strings in (100, 200, 400):
+        slow = {**run, "n_strings": n_strings}
+        model.record("coverage", slow, 10 * reference.predict("coverage", slow))
+
+    assert model.samples("coverage") == 3
+    assert 5 * prior < model.predict("coverage", run) < 10 * prior
+    assert tune(["coverage"], 5.0, model=model).n_strings < tune(["coverage"], 5.0, model=CostModel()).n_strings
+
+
+def test_samples_count_the_work_actually_done():
+    model, reference = CostModel(), CostModel()
+    run = {"n_anchors": 90, "n_strings": 100, "size": 200, "generations": 100}
+    # converged after 10 of 100 generations
+    model.record_progress("memetic", run, {"strings": 100, "elapsed": 1.0, "counters": {"generations": 10}})
+    reference.record("memetic", {**run, "generations": 10}, 1.0)
+
+    assert model.predict("memetic", run) == pytest.approx(reference.predict("memetic", run))
+
+
+def test_calibration_from_a_benchmark_report():
+    report = {"results": [
+        {"algorithm": "coverage", "n_anchors": 90, "n_strings": 100, "n_vectors": 100, "size": 200,
+         "wall_seconds": 0.2, "error": None},
+        {"algorithm": "coverage", "n_anchors": 90, "n_strings": 100, "n_vectors": 0, "size": 200,
+         "wall_seconds": 0.0, "error": "ValueError: boom"},
+    ]}
+    model = CostModel()
+
+    assert calibrate_from_report(report, model) == 1
+    assert model.samples("coverage") == 1
+
+
+@pytest.mark.parametrize("algorithm, knobs, counter, expected", [
+    ("memetic", {"pop_size": 4, "generations": 3}, "generations", 3),
+    ("simualted-annealing", {"iterations": 50}, "iterations", 50),
+])
+def test_algorithms_take_their_knobs(algorithm, knobs, counter, expected):
+    final = {}
+    generate_string_vectors(_image(), n_anchors=24, n_strings=10, algorithm=algorithm, stopping=False,
+                            progress_callback=lambda p: final.update(p) if p.get("final") else None, **knobs)
+
+    assert final["counters"][counter] == expected
+
+
+def test_api_job_with_a_target_latency(client):
+    from stringart_app.tests.test_api import _spec, _wait
+
+    response = client.post("/api/v1/jobs", _spec(target_seconds=5, n_anchors=64, n_strings=50),
+                           content_type="application/json")
+    job_id = response.json()["job_id"]
+    status = _wait(client, job_id)
+
+    tuned = status["autotune"]
+    assert tuned["target_seconds"] == 5 and tuned["n_anchors"] <= 64 and tuned["n_strings"] <= 50
+    assert status["n_anchors"] == tuned["n_anchors"]
+    assert status["results"][0]["strings"] <= tuned["n_strings"]
+
+    bad = client.post("/api/v1/jobs", _spec(target_seconds=-1), content_type="application/json")
+    assert bad.status_code == 400 and "target_seconds" in bad.json()["error"]
+
+
+def test_calibration_waits_for_the_first_tuned_job():
+    """Importing the views reads no report and imports no algorithm module."""
+    code = (
+        "import os, sys, django\n"
+        "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'stringart_project.settings')\n"
+        "django.setup()\n"
+        "from stringart_app.views import AUTOTUNE_MODEL\n"
+        "heavy = [m for m in ('skimage', 'pulp', 'scipy.optimize') if m in sys.modules]\n"
+        "assert not heavy, heavy\n"
+        "assert AUTOTUNE_MODEL.samples('coverage') == 0\n"
+        "from stringart_app.autotune import tune\n"
+        "tune(['coverage'], 5.0)\n"
+        "assert AUTOTUNE_MODEL.samples('coverage') > 0\n"
+    )
+    root = Path(__file__).resolve().parents[2]
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
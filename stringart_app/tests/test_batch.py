@@ -0,0 +1,34 @@
+# stringart_app/tests/test_batch.py
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from stringart_app.batch import BatchTask, find_inputs, load_vectors, run_batch
+from stringart_app.chords import chord_table
+
+
+def test_chord_table_matches_pil_lines():
+    table = chord_table(12, 40, 30, 2)
+    k = table.pair_index[(2, 9)]
+    img = Image.new('L', (40, 30), color=0)
+    ImageDraw.Draw(img).line([table.anchors[2], table.anchors[9]], fill=255, width=2)
+    assert np.array_equal(table.dense(k), np.array(img, dtype=bool).ravel())
+    assert chord_table(12, 40, 30, 2) is table
+
+
+def test_run_batch_writes_outputs_and_marks_tasks_done(tmp_path):
+    pixels = np.full((48, 48), 255, dtype=np.uint8)
+    pixels[10:38, 20:28] = 0
+    for name in ("a", "b"):
+        Image.fromarray(pixels).save(tmp_path / f"{name}.png")
+
+    sources = find_inputs([str(tmp_path / "*.png")])
+    tasks = [BatchTask(source=s, algorithm="greedy", output_dir=tmp_path / "out",
+                       n_anchors=16, n_strings=5, size=48) for s in sources]
+    records = run_batch(tasks, workers=2)
+
+    assert [r["error"] for r in records] == [None, None]
+    assert all(t.is_done() for t in tasks)
+    vectors = load_vectors(tasks[0].vectors_path)
+    assert 0 < len(vectors) <= 5
+    assert Image.open(tasks[0].preview_path).size == (48, 48)
@@ -0,0 +1,47 @@
+# stringart_app/tests/test_benchmarks.py
+#
+# Deselected by default; run with `pytest -m benchmark`.
+# Thresholds can be loosened on noisy machines via STRINGART_BENCH_MAX_TIME etc.
+
+import os
+from pathlib import Path
+
+import pytest
+
+from stringart_app.benchmarks import (
+    BASELINE_PATH,
+    Thresholds,
+    build_cases,
+    compare_to_baseline,
+    load_report,
+    run_suite,
+    write_report,
+)
+from stringart_app.planner import ALGORITHMS
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.fixture(scope="module")
+def quick_report():
+    cases = build_cases("quick", list(ALGORITHMS.keys()))
+    report = run_suite(cases, trace_memory=True, isolate=False, repeat=3)
+    write_report(report, Path(os.environ.get("STRINGART_BENCH_OUTPUT", "bench_output.json")))
+    return report
+
+
+def test_every_algorithm_completes(quick_report):
+    failures = [r["key"] for r in quick_report["results"] if r["error"]]
+    assert not failures
+
+
+def test_no_regression_against_baseline(quick_report):
+    if not BASELINE_PATH.exists():
+        pytest.skip("no stored baseline")
+    thresholds = Thresholds(
+        time=float(os.environ.get("STRINGART_BENCH_MAX_TIME", Thresholds.time)),
+        memory=float(os.environ.get("STRINGART_BENCH_MAX_MEMORY", Thresholds.memory)),
+        error=float(os.environ.get("STRINGART_BENCH_MAX_ERROR", Thresholds.error)),
+    )
+    regressions = compare_to_baseline(quick_report, load_report(BASELINE_PATH), thresholds)
+    assert not regressions, regressions
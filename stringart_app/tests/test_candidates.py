@@ -0,0 +1,49 @@
+# stringart_app/tests/test_candidates.py
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from stringart_app.candidates import HoughParams, hough_candidates, snap_to_anchors
+from stringart_app.planner import generate_string_vectors
+from stringart_app.renderer import generate_radial_anchors
+
+
+def _lines_image(size=96, n_anchors=36):
+    anchors = generate_radial_anchors(n_anchors, size, size)
+    img = Image.new('L', (size, size), color=255)
+    draw = ImageDraw.Draw(img)
+    for i, j in [(0, 18), (9, 27), (4, 22), (13, 31)]:
+        draw.line([anchors[i], anchors[j]], fill=0, width=3)
+    return np.array(img)
+
+
+def test_snap_to_anchors_matches_nearest_anchor():
+    anchors = np.array(generate_radial_anchors(50, 120, 80))
+    rng = np.random.default_rng(0)
+    points = anchors[rng.integers(0, 50, 200)] + rng.uniform(-2, 2, (200, 2))
+    nearest = np.linalg.norm(points[:, None] - anchors[None], axis=2).argmin(axis=1)
+    assert np.array_equal(snap_to_anchors(points, 50, 120, 80), nearest)
+
+
+def test_hough_candidates_are_cached_per_image_and_params():
+    pixels = _lines_image()
+    found = hough_candidates(pixels, 36)
+    assert found.pairs and all(i < j for i, j in found.pairs)
+    assert hough_candidates(pixels.copy(), 36) is found
+    assert hough_candidates(pixels, 36, HoughParams(sigma=2.0)) is not found
+
+
+@pytest.mark.parametrize("algorithm", ["greedy", "simualted-annealing", "memetic"])
+def test_algorithms_can_restrict_to_hough_candidates(algorithm, monkeypatch):
+    pixels = _lines_image()
+    allowed = set(hough_candidates(pixels, 36).pairs)
+    n_strings = min(4, len(allowed))
+    monkeypatch.setattr("stringart_app.image_to_vector_algorithms.memetic.MemeticAlgorithm.GENERATIONS", 2)
+
+    vectors = generate_string_vectors(
+        pixels, n_anchors=36, n_strings=n_strings, sample_pairs=200,
+        algorithm=algorithm, hough_candidates=True,
+    )
+    assert vectors
+    assert {(min(v["from"], v["to"]), max(v["from"], v["to"])) for v in vectors} <= allowed
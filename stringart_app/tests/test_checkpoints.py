@@ -0,0 +1,83 @@
+# stringart_app/tests/test_checkpoints.py
+
+import numpy as np
+import pytest
+
+from stringart_app.checkpoints import Checkpoint, CheckpointStore
+from stringart_app.planner import generate_string_vectors
+
+
+def _image():
+    img = np.full((64, 64), 255, dtype=np.uint8)
+    img[10:54, 28:36] = 0
+    img[30:36, 6:58] = 80
+    return img
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_store_expires_entries_after_ttl_and_caps_size():
+    clock = FakeClock()
+    store = CheckpointStore(ttl=10, max_entries=2, clock=clock)
+    cp = Checkpoint("greedy", "k", [{"from": 0, "to": 1}], {"residual": np.zeros(1000, dtype=np.float32)})
+
+    assert store.put("a", cp) < 1000 * 4
+    clock.now = 5
+    store.put("b", cp)
+    assert store.get("a").vectors == cp.vectors
+    clock.now = 11
+    assert store.get("a") is None and store.get("b") is not None
+
+    store.put("c", cp)
+    store.put("d", cp)
+    assert len(store) == 2 and store.get("b") is None
+
+
+@pytest.mark.parametrize("algorithm, options, n_first, n_total", [
+    ("greedy", {"seed": 3, "sample_pairs": 200}, 40, 80),
+    ("coverage", {}, 40, 80),
+    ("greedy", {"continuous": True, "min_skip": 3, "no_repeat": True}, 40, 80),
+    # past greedy's first candidate pruning (every PRUNE_K strings)
+    ("greedy", {"seed": 3, "sample_pairs": 200, "stopping": False}, 120, 200),
+])
+def test_extending_a_checkpoint_matches_one_longer_run(algorithm, options, n_first, n_total):
+    """
+    Resuming n_first strings up to n_total gives exactly the n_total-string
+    run, computes only the new ones and streams the checkpointed ones first.
+    """
+    img = _image()
+    checkpoints = []
+    first = generate_string_vectors(img, n_anchors=32, n_strings=n_first, algorithm=algorithm,
+                                    checkpoint_callback=checkpoints.append, **options)
+    assert checkpoints[-1].vectors == first
+
+    streamed = []
+    progress = []
+    extended = generate_string_vectors(img, n_anchors=32, n_strings=n_total, algorithm=algorithm,
+                                       resume=checkpoints[-1], checkpoint_callback=checkpoints.append,
+                                       vector_callback=lambda i, j: streamed.append({"from": i, "to": j}),
+                                       progress_callback=progress.append, **options)
+
+    assert len(first) == n_first
+    assert extended == generate_string_vectors(img, n_anchors=32, n_strings=n_total, algorithm=algorithm, **options)
+    assert streamed == extended
+    assert progress[-1]["strings"] == len(extended) - len(first)
+    assert checkpoints[-1].vectors == extended
+
+
+def test_checkpoint_for_other_inputs_is_ignored():
+    img = _image()
+    checkpoints = []
+    generate_string_vectors(img, n_anchors=32, n_strings=10, algorithm="coverage",
+                            checkpoint_callback=checkpoints.append)
+
+    fresh = generate_string_vectors(img, n_anchors=24, n_strings=10, algorithm="coverage",
+                                    resume=checkpoints[-1])
+
+    assert fresh == generate_string_vectors(img, n_anchors=24, n_strings=10, algorithm="coverage")
@@ -0,0 +1,149 @@
+# stringart_app/tests/test_control.py
+
+import subprocess
+import time
+
+import numpy as np
+import pytest
+
+from stringart_app.chords import chord_table
+from stringart_app.control import CancellationToken, Deadline, JobCancelled, StoppingCriteria
+from stringart_app.planner import generate_string_vectors
+
+
+def test_deadline_coerce_keeps_the_sooner_bound():
+    now = time.monotonic()
+    assert not Deadline.coerce()
+    assert Deadline.coerce(deadline=now + 100, time_budget=1).at < now + 2
+    assert Deadline.coerce(deadline=now - 1, time_budget=100).expired()
+    assert Deadline.coerce().remaining() is None
+    assert Deadline.after(0).remaining() == 0.0
+
+
+@pytest.mark.parametrize("algorithm", ["greedy", "memetic", "michael-crum"])
+def test_cancel_token_stops_a_running_algorithm_promptly(algorithm):
+    """Setting the token mid-run raises JobCancelled within an iteration."""
+    pixels = np.random.default_rng(0).integers(0, 256, (96, 96), dtype=np.uint8)
+    token = CancellationToken()
+    vectors = []
+    at_cancel = {}
+
+    def on_progress(progress):
+        # cancel at the first progress event, however fast the algorithm is
+        if not token.cancelled:
+            at_cancel["vectors"] = len(vectors)
+            at_cancel["time"] = time.monotonic()
+            token.cancel()
+
+    with pytest.raises(JobCancelled):
+        generate_string_vectors(pixels, n_anchors=48, n_strings=500, algorithm=algorithm,
+                                vector_callback=lambda i, j: vectors.append((i, j)),
+                                progress_callback=on_progress, cancel_token=token)
+
+    assert time.monotonic() - at_cancel["time"] < 0.5
+    assert len(vectors) <= at_cancel["vectors"] + 1
+
+
+def test_cancel_token_kills_the_ilp_solver_mid_solve(monkeypatch):
+    """Graph optimisation stops CBC itself rather than waiting out the solve."""
+    pixels = np.random.default_rng(0).integers(0, 256, (200, 200), dtype=np.uint8)
+    token = CancellationToken()
+    started = {}
+    popen = subprocess.Popen
+
+    def start_then_cancel(*args, **kwargs):
+        started["cbc"] = popen(*args, **kwargs)
+        started["time"] = time.monotonic()
+        token.cancel()
+        return started["cbc"]
+
+    monkeypatch.setattr(subprocess, "Popen", start_then_cancel)
+    with pytest.raises(JobCancelled):
+        generate_string_vectors(pixels, n_anchors=180, n_strings=200, algorithm="graph-optimisation",
+                                cancel_token=token)
+
+    assert time.monotonic() - started["time"] < 0.5
+    assert started["cbc"].returncode is not None and started["cbc"].returncode < 0  # killed, not finished
+
+
+def test_stopping_criteria_tests():
+    plateau = StoppingCriteria(plateau_window=3, plateau_ratio=0.1)
+    plateau.start(100.0)
+    reasons = [plateau.check(e) for e in (80, 60, 40, 30, 29, 28.5, 28.2)]
+    assert reasons == [None] * 6 + ["plateau"]
+
+    target = StoppingCriteria(target_error=0.5)
+    target.start(100.0)
+    assert [target.check(e) for e in (70, 50)] == [None, "target_error"]
+
+    stale = StoppingCriteria(max_stale=2)
+    assert [stale.check(e) for e in (10, 9, 9.5, 9)] == [None, None, None, "stale"]
+
+    assert not StoppingCriteria.coerce(False, {"max_stale": 5})
+    assert StoppingCriteria.coerce({"plateau_window": 10}, {"max_stale": 5}).max_stale == 5
+    with pytest.raises(ValueError, match="Unknown stopping"):
+        StoppingCriteria.coerce({"patience": 3})
+
+
+@pytest.mark.parametrize("algorithm", ["coverage", "michael-crum"])
+def test_converged_runs_stop_early_and_say_why(algorithm):
+    pixels = np.full((96, 96), 255, dtype=np.uint8)
+    pixels[20:76, 44:52] = 0
+    progress = []
+
+    vectors = generate_string_vectors(pixels, n_anchors=48, n_strings=400, algorithm=algorithm,
+                                      stopping={"plateau_window": 20}, progress_callback=progress.append)
+    full = generate_string_vectors(pixels, n_anchors=48, n_strings=400, algorithm=algorithm, stopping=False)
+
+    assert progress[-1]["final"] and progress[-1]["stop_reason"] == "plateau"
+    assert len(vectors) < len(full)
+
+
+def test_population_methods_stop_within_their_generations():
+    pixels = np.random.default_rng(0).integers(0, 256, (64, 64), dtype=np.uint8)
+    progress = []
+
+    generate_string_vectors(pixels, n_anchors=32, n_strings=40, algorithm="memetic",
+                            stopping={"target_error": 0.999}, progress_callback=progress.append)
+
+    assert progress[-1]["stop_reason"] == "target_error"
+    assert max(p.get("generations", 0) for p in progress) < 100
+
+
+def test_memetic_cut_short_returns_at_most_n_strings():
+    pixels = np.random.default_rng(0).integers(0, 256, (64, 64), dtype=np.uint8)
+    progress = []
+
+    vectors = generate_string_vectors(pixels, n_anchors=32, n_strings=40, algorithm="memetic",
+                                      stopping=False, time_budget=0.2, progress_callback=progress.append)
+
+    assert progress[-1]["stop_reason"] == "time_budget"
+    assert max(p.get("generations", 0) for p in progress) > 0
+    assert len(vectors) == 40
+
+
+def test_greedy_stops_on_its_true_squared_error():
+    """
+    Dark pixels overflow the int16 squared differences greedy scores with
+    (255² wraps negative), so the stopping tests must see the int64 SSE.
+    """
+    pixels = np.full((96, 96), 100, dtype=np.uint8)
+    pixels[40:56, 40:56] = 0
+    wrapped = int(np.sum((np.full_like(pixels, 255, dtype=np.int16) - pixels) ** 2))
+    initial = int(np.sum((255 - pixels.astype(np.int64)) ** 2))
+    assert wrapped != initial
+
+    progress = []
+    vectors = generate_string_vectors(pixels, n_anchors=48, n_strings=400, algorithm="greedy", seed=0,
+                                      stopping={"plateau_window": None, "target_error": 0.8},
+                                      progress_callback=progress.append)
+
+    table = chord_table(48, 96, 96)
+    canvas = np.full(pixels.size, 255, dtype=np.int64)
+    errors = []
+    for v in vectors:
+        canvas[table.pixels(table.pair_index[(v["from"], v["to"])])] = 0
+        errors.append(int(np.sum((canvas - pixels.ravel()) ** 2)))
+
+    assert progress[-1]["stop_reason"] == "target_error"
+    assert errors[-1] <= 0.8 * initial < errors[-2]
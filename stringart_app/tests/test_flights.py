@@ -0,0 +1,105 @@
+# stringart_app/tests/test_flights.py
+
+import time
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from stringart_app.flights import FlightTable, run_key
+from stringart_app.views import (
+    FLIGHTS, JOB_LOGS, JOB_RESULTS, JOB_STATE, JobOptions, cancel_job, discard_job, submit_job,
+)
+
+
+def _png(seed=0):
+    rng = np.random.default_rng(seed)
+    buf = BytesIO()
+    Image.fromarray(rng.integers(0, 256, (64, 64), dtype=np.uint8)).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def _wait_for(predicate, timeout=30.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if predicate():
+            return
+        time.sleep(0.01)
+    raise AssertionError("timed out")
+
+
+def _vectors(job_id):
+    return [r["vector"] for r in JOB_RESULTS[job_id] if r.get("phase") == "algorithm"]
+
+
+def _names(job_id):
+    return {r["name"] for r in JOB_RESULTS[job_id] if r.get("phase") == "algorithm"}
+
+
+def _options(n_strings):
+    # greedy over most chords: ~10ms a string, so runs overlap reliably
+    return JobOptions(algorithms=["greedy"], n_anchors=120, n_strings=n_strings, sample_pairs=5000,
+                      stopping=False, previews=False)
+
+
+def _long_job(name="shared.png", n_strings=2000):
+    job_id, _, _ = submit_job({name: _png()}, _options(n_strings))
+    _wait_for(lambda: _vectors(job_id))
+    return job_id
+
+
+def test_cancellation_is_reference_counted():
+    flights = FlightTable()
+    first, leading = flights.join("k", "a")
+    second, following = flights.join("k", "b")
+    assert leading and not following and second is first and first.subscribers == 2
+
+    flights.leave("a")
+    assert not first.is_set()
+    flights.leave("b")
+    assert first.is_set()
+
+    # a new job doesn't join a run that is being abandoned
+    third, leading = flights.join("k", "c")
+    assert leading and third is not first
+
+
+def test_run_key_covers_image_and_parameters():
+    key = run_key(b"image", algorithm="greedy", n_anchors=180)
+    assert key == run_key(b"image", n_anchors=180, algorithm="greedy")
+    assert key != run_key(b"other", algorithm="greedy", n_anchors=180)
+    assert key != run_key(b"image", algorithm="greedy", n_anchors=181)
+
+
+def test_identical_job_follows_the_run_in_progress():
+    leader = _long_job(n_strings=150)
+    followed = FLIGHTS.totals["followed"]
+    follower, _, _ = submit_job({"copy.png": _png()}, _options(150))
+    try:
+        _wait_for(lambda: JOB_STATE[leader] == JOB_STATE[follower] == "done")
+
+        assert FLIGHTS.totals["followed"] == followed + 1
+        assert any("Following an identical run" in line for line in JOB_LOGS[follower])
+        assert _vectors(follower) == _vectors(leader) and len(_vectors(leader)) == 150
+        assert _names(follower) == {"copy"}
+    finally:
+        discard_job(leader)
+        discard_job(follower)
+
+
+def test_run_stops_only_when_every_subscriber_has_left():
+    leader = _long_job()
+    follower = _long_job()
+    try:
+        cancel_job(leader)
+        n = len(_vectors(follower))
+        _wait_for(lambda: len(_vectors(follower)) > n)
+        assert JOB_STATE[follower] == "running"
+
+        cancel_job(follower)
+        _wait_for(lambda: JOB_STATE[leader] == JOB_STATE[follower] == "cancelled")
+        assert len(_vectors(leader)) < 200
+        assert len(FLIGHTS) == 0
+    finally:
+        discard_job(leader)
+        discard_job(follower)
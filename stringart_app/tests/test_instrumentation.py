@@ -0,0 +1,69 @@
+# stringart_app/tests/test_instrumentation.py
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from stringart_app.chords import chord_table
+from stringart_app.instrumentation import MetricsRegistry, RunMetrics
+from stringart_app.planner import generate_string_vectors
+
+
+class InstrumentationTests(SimpleTestCase):
+    def test_run_metrics_records_phases_counters_and_progress(self):
+        """Phases accumulate, commits emit progress, finish() reaches the registry."""
+        registry = MetricsRegistry()
+        events = []
+        metrics = RunMetrics("demo", events.append, registry=registry)
+
+        for _ in range(2):
+            with metrics.phase("scoring"):
+                pass
+        metrics.count("candidates_evaluated", 7)
+        metrics.gauge("error", 3.5)
+        for _ in range(10):
+            metrics.commit()
+        summary = metrics.finish()
+
+        self.assertIn("scoring", summary["phases"])
+        self.assertEqual(summary["strings"], 10)
+        self.assertEqual(summary["candidates_evaluated"], 7)
+        # one event at 10 strings, one final
+        self.assertEqual(len(events), 2)
+        self.assertTrue(events[-1]["final"])
+        self.assertEqual(events[-1]["error"], 3.5)
+
+        text = registry.render_prometheus()
+        self.assertIn('stringart_runs_total{algorithm="demo"} 1.0', text)
+        self.assertIn('stringart_candidates_evaluated_total{algorithm="demo"} 7.0', text)
+        self.assertIn('stringart_phase_seconds_total{algorithm="demo",phase="scoring"}', text)
+        self.assertIn('stringart_last_error{algorithm="demo"} 3.5', text)
+
+    def test_planner_forwards_progress_callback(self):
+        """Algorithms report a final progress event with their phase timings."""
+        img = np.full((30, 30), 255, dtype=np.uint8)
+        img[10:20, 10:20] = 0
+        events = []
+
+        generate_string_vectors(img, n_anchors=8, n_strings=3, algorithm="coverage",
+                                progress_callback=events.append)
+
+        final = events[-1]
+        self.assertTrue(final["final"])
+        self.assertEqual(final["strings"], 3)
+        self.assertGreater(final["candidates_evaluated"], 0)
+        self.assertTrue({"setup", "candidates", "scoring", "commit"} <= set(final["phases"]))
+
+    def test_graph_optimisation_reports_the_rendered_error(self):
+        """Overlapping strings darken a pixel once, so the error is the rendered SSE."""
+        img = np.full((48, 48), 255, dtype=np.uint8)
+        img[12:36, 12:36] = 0
+        events = []
+
+        vectors = generate_string_vectors(img, n_anchors=16, n_strings=40, algorithm="graph-optimisation",
+                                          progress_callback=events.append)
+
+        table = chord_table(16, 48, 48)
+        canvas = np.full(img.size, 255.0)
+        for v in vectors:
+            canvas[table.pixels(table.pair_index[(v["from"], v["to"])])] = 0.0
+        self.assertEqual(events[-1]["error"], float(np.sum((canvas - img.ravel()) ** 2)))
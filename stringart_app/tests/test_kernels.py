@@ -0,0 +1,98 @@
+# stringart_app/tests/test_kernels.py
+#
+# Every available kernel backend against plain-Python versions of the loops
+# they replace. The Numba cases run only where Numba is installed.
+
+import numpy as np
+import pytest
+
+from stringart_app import kernels
+from stringart_app.benchmarks import run_kernel_benchmarks
+
+BACKENDS = list(kernels.BACKENDS)
+
+
+def _bresenham(x0, y0, x1, y1):
+    dx, dy = abs(x1 - x0), abs(y1 - y0)
+    sx, sy = (1 if x0 < x1 else -1), (1 if y0 < y1 else -1)
+    err = dx - dy
+    pts = []
+    while True:
+        pts.append((x0, y0))
+        if x0 == x1 and y0 == y1:
+            return pts
+        e2 = 2 * err
+        if e2 > -dy:
+            err -= dy
+            x0 += sx
+        if e2 < dx:
+            err += dx
+            y0 += sy
+
+
+def _lines(n=300, size=40, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, size, (n, 2)), rng.integers(0, size, (n, 2))
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_bresenham_matches_reference_loop(backend):
+    starts, ends = _lines()
+    indptr, xs, ys = kernels.get_backend(backend).bresenham_lines(starts, ends)
+    for k, ((x0, y0), (x1, y1)) in enumerate(zip(starts.tolist(), ends.tolist())):
+        line = list(zip(xs[indptr[k]:indptr[k + 1]].tolist(), ys[indptr[k]:indptr[k + 1]].tolist()))
+        assert line == _bresenham(x0, y0, x1, y1)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_fearless_scores_match_per_pixel_loop(backend):
+    rng = np.random.default_rng(1)
+    starts, ends = _lines(size=20)
+    indptr, xs, ys = kernels.numpy_backend.bresenham_lines(starts, ends)
+    orig = rng.random((20, 20, 3), dtype=np.float32)
+    current = rng.random((20, 20, 3), dtype=np.float32)
+    color = np.array([0.2, 0.0, 0.5], dtype=np.float32)
+    chords = np.array([5, 0, 17, 299])
+
+    expected = []
+    for k in chords:
+        total = 0.0
+        for x, y in zip(xs[indptr[k]:indptr[k + 1]], ys[indptr[k]:indptr[k + 1]]):
+            new = 0.25 * color + 0.75 * current[y, x]
+            delta = np.sum((orig[y, x] - new) ** 2) - np.sum((orig[y, x] - current[y, x]) ** 2)
+            total += delta if delta < 0 else delta * 0.2
+        expected.append(total)
+
+    scores = kernels.get_backend(backend).fearless_scores(orig, current, color, 0.25, indptr, xs, ys, chords, 0.2)
+    np.testing.assert_allclose(scores, expected, rtol=1e-5)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_chord_gains_keep_greedy_int16_arithmetic(backend):
+    rng = np.random.default_rng(2)
+    indptr = np.array([0, 3, 3 + 50, 60])
+    indices = rng.integers(0, 100, 60).astype(np.int32)
+    canvas = np.where(rng.random(100) < 0.5, 255, 0).astype(np.int16)
+    pixels = rng.integers(0, 256, 100).astype(np.int16)
+    chords = np.array([2, 0, 1])
+
+    expected = []
+    for k in chords:
+        px = indices[indptr[k]:indptr[k + 1]]
+        expected.append(np.sum((canvas[px] - pixels[px]) ** 2) - np.sum((-pixels[px]) ** 2))
+
+    gains = kernels.get_backend(backend).chord_gains(canvas, pixels, indptr, indices, chords)
+    assert gains.tolist() == expected
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        kernels.get_backend("fortran")
+
+
+@pytest.mark.benchmark
+def test_kernel_backends_side_by_side():
+    results = run_kernel_benchmarks(repeat=3)
+    assert {r["backend"] for r in results} == set(BACKENDS)
+    for r in results:
+        print(f"{r['kernel']:<18} {r['backend']:<6} {r['seconds'] * 1000:8.2f}ms")
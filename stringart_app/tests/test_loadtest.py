@@ -0,0 +1,29 @@
+# stringart_app/tests/test_loadtest.py
+
+from stringart_app.benchmarks.loadtest import LoadProfile, run_load_test
+
+
+def test_load_test_runs_and_cancels_jobs(live_server, settings):
+    settings.ALLOWED_HOSTS = ["*"]
+    profile = LoadProfile(clients=3, cancel_fraction=0.5, n_anchors=48, n_strings=40,
+                          ramp=0.0, job_timeout=60.0, seed=3)
+
+    report = run_load_test(live_server.url, profile)
+
+    assert report["jobs"] == 3
+    assert report["error_rate"] == 0, report["errors"]
+    outcomes = report["outcomes"]
+    assert outcomes.get("completed", 0) + outcomes.get("cancelled", 0) == 3
+    assert report["time_to_first_vector"]["n"] == 3
+    assert report["preview_seconds"]["p99"] >= report["preview_seconds"]["p50"] > 0
+
+
+def test_cancelled_jobs_are_counted(live_server, settings):
+    settings.ALLOWED_HOSTS = ["*"]
+    profile = LoadProfile(clients=2, cancel_fraction=1.0, n_anchors=120, n_strings=5000,
+                          ramp=0.0, job_timeout=60.0)
+
+    report = run_load_test(live_server.url, profile)
+
+    assert report["outcomes"] == {"cancelled": 2}, report["errors"]
+    assert report["cancel_latency"]["n"] == 2
@@ -1,9 +1,13 @@
 # stringart_app/tests/test_planner.py
 
+import subprocess
+import sys
+from pathlib import Path
+
 import numpy as np
 import pytest
 
-from stringart_app.planner import generate_string_vectors
+from stringart_app.planner import generate_string_vectors, generate_string_vectors_at, generate_string_vectors_batch
 
 
 def test_generate_string_vectors_one_pick_on_nonblank():
@@ -48,3 +52,140 @@ def test_generate_string_vectors_blank_raises_value_error():
             algorithm="greedy"
         )
     assert "probabilities do not sum to 1" in str(excinfo.value)
+
+
+def test_registry_lists_algorithms_without_importing_them():
+    """
+    Listing the registry must not import any algorithm module (and with it
+    scikit-image or PuLP), nor the refinement pass and scipy.sparse; the
+    first lookup imports just that one.
+    """
+    code = (
+        "import sys\n"
+        "from stringart_app.planner import ALGORITHMS\n"
+        "assert 'greedy' in ALGORITHMS and len(list(ALGORITHMS)) >= 7\n"
+        "assert ALGORITHMS.info('coverage').class_name == 'CoverageMulticoverAlgorithm'\n"
+        "assert ALGORITHMS.attribute('coverage', 'PREFIX_RESULTS') is True\n"
+        "assert ALGORITHMS.attribute('memetic', 'TUNABLES') == {'pop_size': 30, 'generations': 100}\n"
+        "assert ALGORITHMS.attribute('graph-optimisation', 'PREFIX_RESULTS') is False\n"
+        "heavy = [m for m in ('skimage', 'pulp', 'scipy.sparse', 'stringart_app.refine') if m in sys.modules]\n"
+        "assert not heavy, heavy\n"
+        "assert ALGORITHMS['greedy'].name == 'greedy'\n"
+        "assert not ALGORITHMS.is_loaded('coverage')\n"
+    )
+    root = Path(__file__).resolve().parents[2]
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+@pytest.mark.parametrize("algorithm", ["greedy", "coverage", "hough-greedy", "memetic",
+                                       "simualted-annealing", "graph-optimisation", "michael-crum"])
+def test_expired_deadline_returns_valid_partial_result(algorithm):
+    """
+    With no time left every algorithm stops at its first safe point and
+    returns a valid (possibly empty) selection of at most n_strings pairs.
+    """
+    img = np.full((32, 32), 255, dtype=np.uint8)
+    img[8:24, 14:18] = 0
+
+    vecs = generate_string_vectors(img, n_anchors=12, n_strings=6, algorithm=algorithm, time_budget=0)
+
+    assert len(vecs) <= 6
+    assert all(0 <= v["from"] < 12 and 0 <= v["to"] < 12 for v in vecs)
+
+
+@pytest.mark.parametrize("algorithm", ["greedy", "coverage"])
+def test_continuous_mode_winds_a_single_thread(algorithm):
+    """
+    Each string starts at the nail the previous one ended on, respects the
+    minimum skip and, with no_repeat, never reuses a chord.
+    """
+    img = np.full((64, 64), 255, dtype=np.uint8)
+    img[16:48, 16:48] = 100
+
+    vecs = generate_string_vectors(img, n_anchors=24, n_strings=30, algorithm=algorithm,
+                                   continuous=True, start_nail=3, min_skip=4, no_repeat=True)
+
+    assert vecs and vecs[0]["from"] == 3
+    assert all(a["to"] == b["from"] for a, b in zip(vecs, vecs[1:]))
+    assert all(min(abs(v["from"] - v["to"]), 24 - abs(v["from"] - v["to"])) >= 4 for v in vecs)
+    chords = [tuple(sorted((v["from"], v["to"]))) for v in vecs]
+    assert len(set(chords)) == len(chords)
+
+
+def _batch_images():
+    images = []
+    for k in range(3):
+        img = np.full((64, 64), 255, dtype=np.uint8)
+        img[8 + 8 * k:40 + 8 * k, 20:28] = 40 * k
+        img[30:36, 4:60] = 90
+        images.append(img)
+    return images
+
+
+@pytest.mark.parametrize("algorithm", ["coverage", "hough-greedy"])
+def test_batch_matches_one_image_at_a_time(algorithm):
+    """
+    Scoring images together (coverage) or the sequential fallback (hough-greedy)
+    gives each image exactly the vectors it gets on its own, and streams
+    them tagged with the image's index.
+    """
+    images = _batch_images()
+    streamed = []
+
+    batch = generate_string_vectors_batch(images, n_anchors=24, n_strings=15, algorithm=algorithm,
+                                          vector_callback=lambda b, i, j: streamed.append((b, i, j)))
+
+    for index, img in enumerate(images):
+        alone = generate_string_vectors(img, n_anchors=24, n_strings=15, algorithm=algorithm)
+        assert batch[index] == alone
+        assert [(i, j) for b, i, j in streamed if b == index] == [(v["from"], v["to"]) for v in alone]
+
+
+
+@pytest.mark.parametrize("algorithm, options", [("coverage", {}), ("greedy", {"seed": 1})])
+def test_batch_checkpoints_resume_like_single_runs(algorithm, options):
+    """
+    Each image's checkpoint from a batch (lockstep for coverage, sequential
+    for greedy) is the one its own run leaves, so it resumes the same.
+    """
+    images = _batch_images()
+    checkpoints = {}
+
+    generate_string_vectors_batch(images, n_anchors=24, n_strings=10, algorithm=algorithm, stopping=False,
+                                  checkpoint_callback=checkpoints.__setitem__, **options)
+
+    for index, img in enumerate(images):
+        alone = []
+        generate_string_vectors(img, n_anchors=24, n_strings=10, algorithm=algorithm, stopping=False,
+                                checkpoint_callback=alone.append, **options)
+        assert (checkpoints[index].key, checkpoints[index].vectors) == (alone[0].key, alone[0].vectors)
+        resumed = [generate_string_vectors(img, n_anchors=24, n_strings=20, algorithm=algorithm, stopping=False,
+                                           resume=checkpoint, **options)
+                   for checkpoint in (checkpoints[index], alone[0])]
+        assert resumed[0] == resumed[1]
+
+def test_one_run_serves_every_string_count():
+    """
+    For an algorithm whose results are prefixes, each count's result is the
+    separate run's, reported as soon as it is reached, from a single run.
+    """
+    img = _batch_images()[1]
+    reported, streamed = [], []
+
+    results = generate_string_vectors_at(
+        img, [20, 5, 10], n_anchors=24, algorithm="coverage",
+        vector_callback=lambda i, j: streamed.append(i),
+        result_callback=lambda n, vecs: reported.append((n, len(streamed), vecs)),
+    )
+
+    assert sorted(results) == [5, 10, 20]
+    for n, vecs in results.items():
+        assert vecs == generate_string_vectors(img, n_anchors=24, n_strings=n, algorithm="coverage")
+    assert [(n, seen) for n, seen, _ in reported] == [(5, 5), (10, 10), (20, 20)]
+    assert len(streamed) == 20
+
+
+def test_string_counts_must_be_positive():
+    with pytest.raises(ValueError):
+        generate_string_vectors_at(np.zeros((16, 16), dtype=np.uint8), [0, 10], algorithm="coverage")
@@ -1,11 +1,21 @@
 # stringart_app/tests/test_preprocessing.py
 
 import io
+from unittest import mock
+
 import numpy as np
 from PIL import Image
-from django.test import SimpleTestCase
+from PIL.JpegImagePlugin import JpegImageFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+
+from stringart_app.preprocessing import load_image_to_pixels, load_thumbnail
 
-from stringart_app.preprocessing import load_image_to_pixels
+
+def _encode(img, fmt):
+    buf = io.BytesIO()
+    img.save(buf, format=fmt)
+    return buf.getvalue()
 
 
 class PreprocessingTests(SimpleTestCase):
@@ -46,3 +56,53 @@ class PreprocessingTests(SimpleTestCase):
         expected = [round(255 * i / 3) for i in range(4)]
         for v in unique:
             self.assertIn(v, expected)
+
+    def test_job_inputs_decode_jpegs_at_full_scale(self):
+        """Only previews draft; job pixels (and checkpoint keys) keep the full decode."""
+        img = Image.fromarray(np.random.default_rng(0).integers(0, 256, (900, 1200, 3), dtype=np.uint8))
+        data = _encode(img, "JPEG")
+
+        with mock.patch.object(JpegImageFile, "draft", autospec=True) as draft:
+            pixels = load_image_to_pixels(io.BytesIO(data), size=(200, 200))
+        draft.assert_not_called()
+        self.assertEqual(pixels.shape, (200, 200))
+
+    def test_load_thumbnail_decodes_large_jpegs_at_reduced_scale(self):
+        """A big JPEG thumbnails to the target size from a reduced decode."""
+        data = _encode(Image.new("RGB", (4000, 3000), (200, 40, 40)), "JPEG")
+
+        thumb = load_thumbnail(data, (200, 200))
+        self.assertEqual(thumb.size, (200, 150))
+        self.assertEqual(thumb.mode, "RGB")
+
+        # the 12 MP image fits a limit far below its full size
+        self.assertEqual(load_thumbnail(data, (200, 200), max_pixels=1_000_000).size, (200, 150))
+
+    def test_load_thumbnail_composites_transparency_over_white(self):
+        img = Image.new("RGBA", (400, 400), (0, 0, 0, 0))
+        img.paste((0, 0, 0, 255), (0, 0, 200, 400))
+
+        thumb = np.array(load_thumbnail(_encode(img, "PNG"), (200, 200)))
+        self.assertEqual(thumb.shape, (200, 200, 3))
+        self.assertTrue((thumb[:, :90] == 0).all())
+        self.assertTrue((thumb[:, 110:] == 255).all())
+
+    def test_load_thumbnail_refuses_decompression_bombs(self):
+        data = _encode(Image.new("L", (3000, 3000)), "PNG")
+        with self.assertRaises(Image.DecompressionBombError):
+            load_thumbnail(data, (200, 200), max_pixels=1_000_000)
+
+    @override_settings(STRINGART_PREVIEW_MAX_PIXELS=1_000_000)
+    def test_preview_upload_reports_images_it_cannot_preview(self):
+        """Good uploads are previewed; bombs and non-images are listed as errors."""
+        response = self.client.post("/", {"images": [
+            SimpleUploadedFile("photo.jpg", _encode(Image.new("RGB", (4000, 3000)), "JPEG")),
+            SimpleUploadedFile("bomb.png", _encode(Image.new("L", (3000, 3000)), "PNG")),
+            SimpleUploadedFile("notes.txt", b"not an image"),
+        ]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([img["name"] for img in response.context["uploaded_images"]], ["photo.jpg"])
+        errors = response.context["upload_errors"]
+        self.assertEqual([e.split(":")[0] for e in errors], ["bomb.png", "notes.txt"])
+        self.assertIn("pixel limit", errors[0])
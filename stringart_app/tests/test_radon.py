@@ -0,0 +1,88 @@
+# stringart_app/tests/test_radon.py
+
+import numpy as np
+import pytest
+
+from stringart_app.chords import chord_table
+from stringart_app.planner import generate_string_vectors
+from stringart_app.radon import RadonScorer
+
+
+def _field(size=96, seed=0):
+    rng = np.random.default_rng(seed)
+    ys, xs = np.mgrid[:size, :size] / size
+    return sum(
+        np.cos(2 * np.pi * (fx * xs + fy * ys) + phase)
+        for fx, fy, phase in rng.uniform((-3, -3, 0), (3, 3, 2 * np.pi), (4, 3))
+    ).ravel() + 4.0
+
+
+def _image():
+    img = np.full((64, 64), 255, dtype=np.uint8)
+    img[10:54, 28:36] = 0
+    img[30:36, 6:58] = 80
+    return img
+
+
+def test_scores_track_mask_sums():
+    table = chord_table(120, 96, 96)
+    field = _field()
+
+    masks = table.masks @ field
+    radon = RadonScorer(table, field).scores()
+
+    assert np.corrcoef(masks, radon)[0, 1] > 0.95
+    top = set(np.argsort(masks)[-30:].tolist())
+    assert len(top & set(np.argsort(radon)[-30:].tolist())) >= 20
+
+
+def test_update_matches_a_fresh_transform():
+    table = chord_table(120, 96, 96)
+    field = _field()
+    scorer = RadonScorer(table, field)
+
+    for k in (5, 400, 3000):
+        px = table.pixels(k)
+        scorer.update(px, -0.5 * field[px])
+        field[px] *= 0.5
+
+    fresh = RadonScorer(table, field).scores()
+    assert np.abs(scorer.scores() - fresh).max() < 0.02 * np.abs(fresh).max()
+
+
+def test_non_square_canvas_is_rejected():
+    with pytest.raises(ValueError, match="square"):
+        RadonScorer(chord_table(60, 80, 64), np.zeros(80 * 64))
+
+
+@pytest.mark.filterwarnings("error::RuntimeWarning")
+@pytest.mark.parametrize("algorithm, options", [
+    ("coverage", {}),
+    ("greedy", {"sample_pairs": 200}),
+    ("greedy", {"continuous": True, "min_skip": 3}),
+])
+def test_algorithms_run_with_radon_scoring(algorithm, options):
+    vectors = generate_string_vectors(_image(), n_anchors=48, n_strings=30, algorithm=algorithm,
+                                      scoring="radon", **options)
+
+    assert 0 < len(vectors) <= 30
+    assert all(0 <= v["from"] < 48 and 0 <= v["to"] < 48 and v["from"] != v["to"] for v in vectors)
+
+
+def test_unknown_engine_is_rejected():
+    from stringart_app.image_to_vector_algorithms.coverage import CoverageMulticoverAlgorithm
+
+    with pytest.raises(ValueError, match="scoring"):
+        CoverageMulticoverAlgorithm().generate(_image(), 32, 10, scoring="fourier")
+
+
+@pytest.mark.benchmark
+def test_radon_scoring_side_by_side():
+    from stringart_app.benchmarks import run_scoring_benchmarks
+
+    results = run_scoring_benchmarks(anchor_counts=(360,), picks=10)
+    masks, radon = (r for r in results if r["n_anchors"] == 360)
+
+    print(f"\nper pick at 360 anchors: masks {masks['per_pick'] * 1000:.1f}ms, "
+          f"radon {radon['per_pick'] * 1000:.1f}ms (top-50 agreement {radon['top50_agreement']})")
+    assert radon["per_pick"] < masks["per_pick"]
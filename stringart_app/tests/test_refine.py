@@ -0,0 +1,49 @@
+# stringart_app/tests/test_refine.py
+
+import numpy as np
+
+from stringart_app.planner import generate_string_vectors
+from stringart_app.refine import refine_vectors
+from stringart_app.renderer import preview_error, render_vector_list
+
+
+def _image():
+    img = np.full((64, 64), 255, dtype=np.uint8)
+    img[12:52, 28:36] = 0
+    img[40:46, 8:56] = 60
+    return img
+
+
+def test_swaps_lower_the_rendered_error_and_are_streamed():
+    img = _image()
+    start = [{"from": i, "to": (i + 7) % 24} for i in range(0, 24, 2)]
+    swaps = []
+
+    refined = refine_vectors(img, start, n_anchors=24,
+                             replace_callback=lambda k, i, j: swaps.append((k, i, j)))
+
+    assert swaps and len(refined) == len(start)
+    replayed = list(start)
+    for k, i, j in swaps:
+        replayed[k] = {"from": i, "to": j}
+    assert replayed == refined
+    before = preview_error(render_vector_list(start, (64, 64), n_anchors=24), img)
+    after = preview_error(render_vector_list(refined, (64, 64), n_anchors=24), img)
+    assert after < before
+
+
+def test_refinement_stops_at_a_local_optimum():
+    img = _image()
+    once = refine_vectors(img, [{"from": 0, "to": 12}] * 6, n_anchors=24)
+
+    assert refine_vectors(img, once, n_anchors=24) == once
+
+
+def test_planner_refines_after_any_algorithm_but_not_a_thread():
+    img = _image()
+    vecs = generate_string_vectors(img, n_anchors=24, n_strings=10, algorithm="coverage", refine_time=1.0)
+    assert len(vecs) == 10
+
+    wound = generate_string_vectors(img, n_anchors=24, n_strings=10, algorithm="coverage",
+                                    continuous=True, refine_time=1.0)
+    assert all(a["to"] == b["from"] for a, b in zip(wound, wound[1:]))
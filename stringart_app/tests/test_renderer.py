@@ -1,10 +1,20 @@
 # stringart_app/tests/test_renderer.py
 
+import uuid
+from io import BytesIO
+
 import numpy as np
 from django.test import SimpleTestCase
 from PIL import Image
 
-from stringart_app.renderer import render_vector_list
+from stringart_app.renderer import (
+    render_vector_list,
+    render_progressive_frames,
+    preview_error,
+    IncrementalRenderer,
+)
+from stringart_app.sse_logging import ResultLog
+from stringart_app.views import JOB_FINISHED, JOB_RESULTS, discard_job
 
 
 class RendererTests(SimpleTestCase):
@@ -24,3 +34,65 @@ class RendererTests(SimpleTestCase):
         self.assertLess(data.min(), 255)
         # And average remains mostly white
         self.assertGreater(data.mean(), 200)
+
+    def test_progressive_frames_match_full_render(self):
+        """Incremental frames end on the same canvas as a full re-render."""
+        vectors = [{"from": i, "to": (i + 5) % 12} for i in range(12)]
+        size = (60, 60)
+
+        frames = [
+            (count, renderer.snapshot())
+            for count, renderer in render_progressive_frames(vectors, size, n_anchors=12, every=5)
+        ]
+
+        self.assertEqual([c for c, _ in frames], [5, 10, 12])
+        full = render_vector_list(vectors, size=size, n_anchors=12)
+        np.testing.assert_array_equal(np.array(frames[-1][1]), np.array(full))
+
+    def test_incremental_delta_covers_changes(self):
+        """Pasting each delta patch onto a blank canvas rebuilds the frame."""
+        renderer = IncrementalRenderer((50, 50), n_anchors=6)
+        rebuilt = Image.new('L', (50, 50), color=255)
+
+        for v in ({"from": 0, "to": 3}, {"from": 1, "to": 2}):
+            renderer.add(v)
+            patch, box = renderer.delta()
+            rebuilt.paste(patch, box[:2])
+
+        self.assertIsNone(renderer.delta())
+        np.testing.assert_array_equal(np.array(rebuilt), np.array(renderer.snapshot()))
+
+    def test_preview_error_is_rms_difference(self):
+        """A preview scores zero against itself and 255 against its inverse."""
+        preview = render_vector_list([{"from": 0, "to": 2}], size=(20, 20), n_anchors=4)
+        pixels = np.array(preview)
+
+        self.assertEqual(preview_error(preview, pixels), 0.0)
+        self.assertAlmostEqual(preview_error(preview, 255 - pixels), 255.0)
+
+
+class ExportAnimationTests(SimpleTestCase):
+    def setUp(self):
+        self.job_id = str(uuid.uuid4())
+        JOB_RESULTS[self.job_id] = ResultLog(
+            {"phase": "algorithm", "algorithm": "greedy", "name": "a", "node_count": 16,
+             "vector": {"from": i, "to": i + 5}}
+            for i in range(10)
+        )
+        JOB_FINISHED[self.job_id] = {("greedy", "a")}
+        self.addCleanup(discard_job, self.job_id)
+
+    def _get(self, **params):
+        return self.client.get(f"/export-animation/{self.job_id}/",
+                               {"algorithm": "greedy", "name": "a", **params})
+
+    def test_every_must_be_a_positive_integer(self):
+        """Bad frame intervals are a 400, not a server error."""
+        for every in ("abc", "0", "-3", "1.5"):
+            response = self._get(every=every)
+            self.assertEqual(response.status_code, 400, every)
+            self.assertIn("every", response.json()["error"])
+
+        response = self._get(every="5")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Image.open(BytesIO(response.content)).n_frames, 2)
@@ -0,0 +1,55 @@
+# stringart_app/tests/test_scheduler.py
+
+import threading
+
+from stringart_app.costs import CostEstimate, estimate_job, estimate_run
+from stringart_app.scheduler import ADMITTED, QUEUED, REJECTED, JobScheduler
+
+
+def test_estimates_grow_quadratically_with_anchors():
+    small = estimate_job(["greedy", "memetic"], 1, 180, 200)
+    large = estimate_job(["greedy", "memetic"], 1, 400, 200)
+    assert large.peak_bytes > 4 * small.peak_bytes
+    assert large.cpu_seconds > small.cpu_seconds
+    # jobs run their algorithms one at a time: memory peaks, CPU adds up
+    both = estimate_job(["greedy", "graph-optimisation"], 2, 180, 200)
+    alone = estimate_job(["graph-optimisation"], 2, 180, 200)
+    assert both.peak_bytes == alone.peak_bytes
+    assert both.cpu_seconds > alone.cpu_seconds
+    assert estimate_run("not-fitted", 180, 200).peak_bytes >= estimate_run("greedy", 180, 200).peak_bytes
+
+
+def test_scheduler_admits_queues_and_rejects_against_budget():
+    scheduler = JobScheduler(memory_budget=100, max_queued=1, sample_interval=0.01)
+    release = threading.Event()
+    ran = []
+
+    def job(name):
+        def target():
+            release.wait(5)
+            ran.append(name)
+        return target
+
+    first = scheduler.submit("a", CostEstimate(60, 1.0), job("a"))
+    second = scheduler.submit("b", CostEstimate(60, 1.0), job("b"))
+    too_big = scheduler.submit("c", CostEstimate(101, 1.0), job("c"))
+    queue_full = scheduler.submit("d", CostEstimate(10, 1.0), job("d"))
+
+    assert first.status == ADMITTED
+    assert second.status == QUEUED
+    assert too_big.status == REJECTED and "budget" in too_big.reason
+    assert queue_full.status == REJECTED and "full" in queue_full.reason
+    assert scheduler.status("b") == QUEUED
+
+    release.set()
+    deadline = threading.Event()
+    while len(scheduler.calibration()) < 2 and not deadline.wait(0.01):
+        pass
+    assert ran == ["a", "b"]
+    assert scheduler.reserved == 0
+
+    records = scheduler.calibration()
+    assert [r["job_id"] for r in records] == ["a", "b"]
+    assert all(r["measured_cpu_seconds"] is not None for r in records)
+    assert records[1]["queued_seconds"] > 0
+    assert "stringart_scheduler_jobs_total" in scheduler.render_prometheus()
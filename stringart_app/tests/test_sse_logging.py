@@ -0,0 +1,99 @@
+# stringart_app/tests/test_sse_logging.py
+
+import asyncio
+import logging
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from stringart_app.sse_logging import EventLog, ResultLog, create_sse_logger, ProgressThrottle
+
+
+class SSELoggingTests(SimpleTestCase):
+    def test_debug_output_is_opt_in(self):
+        """Default SSE loggers drop debug records; DEBUG jobs keep them."""
+        logs: dict[str, list[str]] = {}
+        quiet = create_sse_logger("quiet", logs)
+        quiet.debug("iteration %d", 1)
+        quiet.info("phase start")
+
+        verbose = create_sse_logger("verbose", logs, level=logging.DEBUG)
+        verbose.debug("iteration %d", 1)
+
+        self.assertEqual(logs["quiet"], ["phase start"])
+        self.assertEqual(logs["verbose"], ["iteration 1"])
+
+    def test_progress_throttle_coalesces_but_keeps_final(self):
+        """Bursts collapse to one update per interval; final always passes."""
+        sent = []
+        throttle = ProgressThrottle(sent.append, interval=0.25)
+
+        with mock.patch("stringart_app.sse_logging.time.monotonic") as clock:
+            for t, strings in [(0.0, 1), (0.1, 2), (0.2, 3), (0.3, 4), (0.35, 5)]:
+                clock.return_value = t
+                throttle({"strings": strings})
+            clock.return_value = 0.4
+            throttle({"strings": 6, "final": True})
+
+        self.assertEqual([p["strings"] for p in sent], [1, 4, 6])
+
+    def test_result_log_indexes_events_as_they_arrive(self):
+        """Vectors (with swaps applied), nail counts and progress per result."""
+        log = ResultLog([{"phase": "grayscale", "name": "a"}])
+        for i in range(3):
+            log.append({"phase": "algorithm", "algorithm": "greedy", "name": "a",
+                        "node_count": 32, "vector": {"from": i, "to": i + 1}})
+        log.append({"phase": "progress", "algorithm": "greedy", "name": "a", "progress": {"strings": 3}})
+        log.append({"phase": "replace", "algorithm": "greedy", "name": "a",
+                    "index": 1, "vector": {"from": 5, "to": 9}})
+        log.append({"phase": "algorithm", "algorithm": "coverage", "name": "a",
+                    "node_count": 32, "vector": {"from": 0, "to": 7}})
+
+        self.assertEqual(len(log), 7)
+        self.assertEqual(log.vectors[("greedy", "a")],
+                         [{"from": 0, "to": 1}, {"from": 5, "to": 9}, {"from": 2, "to": 3}])
+        self.assertEqual(len(log.vectors[("coverage", "a")]), 1)
+        self.assertEqual(log.node_counts[("greedy", "a")], 32)
+        self.assertEqual(log.progress, {("greedy", "a"): {"strings": 3}})
+
+    def test_event_log_wakes_waiters_on_append_and_close(self):
+        """Blocked and awaiting readers wake as soon as another thread appends."""
+        events = EventLog(["a"])
+        self.assertTrue(events.wait(0, timeout=0))
+        self.assertFalse(events.wait(1, timeout=0.01))
+
+        threading.Timer(0.05, events.append, ["b"]).start()
+        t0 = time.monotonic()
+        self.assertTrue(events.wait(1, timeout=5))
+        self.assertLess(time.monotonic() - t0, 1)
+
+        async def await_next():
+            threading.Timer(0.05, events.close).start()
+            await asyncio.wait_for(events.wait_async(2), timeout=5)
+
+        asyncio.run(await_next())
+        self.assertTrue(events.closed)
+        self.assertEqual(events, ["a", "b"])
+
+    async def test_result_stream_under_asgi(self):
+        """The ASGI stream sends appended results at once and ends on cancel."""
+        from stringart_app.views import JOB_CANCEL_EVENTS, JOB_LOGS, JOB_RESULTS, cancel_job, discard_job
+
+        JOB_CANCEL_EVENTS["asgi"] = threading.Event()
+        JOB_LOGS["asgi"] = EventLog()
+        JOB_RESULTS["asgi"] = EventLog([{"n": 0}])
+        try:
+            response = await self.async_client.get("/stream-results/", {"job_id": "asgi"})
+            stream = aiter(response.streaming_content)
+            self.assertEqual(await anext(stream), b'data: {"n": 0}\n\n')
+
+            asyncio.get_running_loop().call_later(0.05, JOB_RESULTS["asgi"].append, {"n": 1})
+            self.assertEqual(await asyncio.wait_for(anext(stream), 1), b'data: {"n": 1}\n\n')
+
+            asyncio.get_running_loop().call_later(0.05, cancel_job, "asgi")
+            with self.assertRaises(StopAsyncIteration):
+                await asyncio.wait_for(anext(stream), 1)
+        finally:
+            discard_job("asgi")
@@ -0,0 +1,57 @@
+# stringart_app/tests/test_vector_format.py
+
+import io
+import json
+
+import pytest
+
+from stringart_app import vector_format
+from stringart_app.vector_format import PAIRS, PATH, VectorHeader, VectorWriter
+
+
+def _path(n, n_anchors=180):
+    nail, vectors = 0, []
+    for k in range(n):
+        nxt = (nail + 1 + (k * 37) % (n_anchors - 1)) % n_anchors
+        vectors.append({"from": nail, "to": nxt})
+        nail = nxt
+    return vectors
+
+
+def test_continuous_result_uses_path_encoding_and_round_trips():
+    vectors = _path(500)
+    data = vector_format.dumps(vectors, 180, (200, 200), "greedy")
+
+    header, pairs = vector_format.loads(data)
+    assert (header.encoding, header.count, header.algorithm) == (PATH, 500, "greedy")
+    assert vector_format.to_dicts(pairs) == vectors
+    assert len(json.dumps(vectors)) / len(data) > 20
+
+
+def test_pairs_decode_without_copying():
+    vectors = [{"from": 3, "to": 90}, {"from": 17, "to": 4}]
+    data = vector_format.dumps(vectors, 180, (200, 200))
+
+    header, pairs = vector_format.loads(data)
+    assert header.encoding == PAIRS
+    assert not pairs.flags.owndata
+    assert vector_format.to_dicts(pairs) == vectors
+
+
+@pytest.mark.parametrize("encoding", [PAIRS, PATH])
+def test_streaming_write_and_read(encoding):
+    vectors = _path(50)
+    buf = io.BytesIO()
+    with VectorWriter(buf, VectorHeader(180, 200, 200, "coverage", encoding), buffer_size=16) as out:
+        for v in vectors:
+            out.write(v["from"], v["to"])
+
+    assert list(vector_format.iter_vectors(io.BytesIO(buf.getvalue()), chunk=7)) == vectors
+    assert vector_format.loads(buf.getvalue())[0].count == 50
+
+
+def test_path_writer_rejects_discontinuous_vectors():
+    out = VectorWriter(io.BytesIO(), VectorHeader(180, 200, 200, encoding=PATH))
+    out.write(1, 5)
+    with pytest.raises(ValueError):
+        out.write(6, 9)
@@ -0,0 +1,64 @@
+# stringart_app/tests/test_views.py
+
+import time
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from stringart_app.views import (
+    AUTOTUNE_MODEL, CHECKPOINTS, JOB_LOGS, JOB_RESULTS, JOB_STATE, JobOptions, discard_job, submit_job,
+)
+
+
+def _png(seed):
+    rng = np.random.default_rng(seed)
+    buf = BytesIO()
+    Image.fromarray(rng.integers(0, 256, (64, 64), dtype=np.uint8)).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def _wait_for(predicate, timeout=30.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if predicate():
+            return
+        time.sleep(0.01)
+    raise AssertionError("timed out")
+
+
+def _phases(job_id, stem):
+    return {r["phase"] for r in JOB_RESULTS[job_id] if r.get("name") == stem}
+
+
+def test_batched_job_matches_one_job_per_image():
+    """
+    A multi-image job scored as one batch streams, checkpoints and feeds the
+    autotuner the same as running each image in a job of its own.
+    """
+    files = {"a.png": _png(0), "b.png": _png(1)}
+    opts = JobOptions(algorithms=["coverage"], n_anchors=32, n_strings=20, previews=False)
+    samples = AUTOTUNE_MODEL.samples("coverage")
+
+    batched, _, _ = submit_job(files, opts)
+    _wait_for(lambda: JOB_STATE[batched] == "done")
+    singles = {}
+    for name, data in files.items():
+        singles[name], _, _ = submit_job({name: data}, opts)
+        _wait_for(lambda: JOB_STATE[singles[name]] == "done")
+    try:
+        assert any("as one batch" in line for line in JOB_LOGS[batched])
+        assert AUTOTUNE_MODEL.samples("coverage") == samples + 2 * len(files)
+
+        for name, single in singles.items():
+            stem = name.removesuffix(".png")
+            assert _phases(batched, stem) == _phases(single, stem)
+            assert JOB_RESULTS[batched].vectors[("coverage", stem)] == JOB_RESULTS[single].vectors[("coverage", stem)]
+            assert JOB_RESULTS[batched].progress[("coverage", stem)]["final"]
+
+            from_batch = CHECKPOINTS.get((batched, "coverage", stem))
+            alone = CHECKPOINTS.get((single, "coverage", stem))
+            assert (from_batch.key, from_batch.vectors) == (alone.key, alone.vectors)
+    finally:
+        for job_id in (batched, *singles.values()):
+            discard_job(job_id)
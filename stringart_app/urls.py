@@ -1,11 +1,19 @@
 # stringart_app/urls.py
 
 from django.urls import path
-from .views import home, stream_logs, stream_results, stop_job
+from . import api
+from .views import home, stream_logs, stream_results, stop_job, export_animation, download_vectors, metrics
 
 urlpatterns = [
     path('', home, name='home'),
     path('stream-logs/', stream_logs, name='stream_logs'),
     path('stream-results/', stream_results, name='stream_results'),
     path('stop-job/<uuid:job_id>/', stop_job, name='stop_job'),
+    path('export-animation/<uuid:job_id>/', export_animation, name='export_animation'),
+    path('download-vectors/<uuid:job_id>/', download_vectors, name='download_vectors'),
+    path('metrics', metrics, name='metrics'),
+    path('api/v1/jobs', api.create_job, name='api_create_job'),
+    path('api/v1/jobs/bulk', api.create_jobs_bulk, name='api_create_jobs_bulk'),
+    path('api/v1/jobs/<uuid:job_id>', api.job_detail, name='api_job_detail'),
+    path('api/v1/jobs/<uuid:job_id>/results', api.job_results, name='api_job_results'),
 ]
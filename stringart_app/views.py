@@ -7,15 +7,19 @@
 # - Manages per-job state (cancellation, logs, results)
 #
 
-import time
 import base64
 import json
 import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from io import BytesIO
 from pathlib import Path
-from typing import BinaryIO
+from typing import BinaryIO, Optional
 
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.http import StreamingHttpResponse, JsonResponse, HttpResponse
 from django.shortcuts import render
 from django.views.decorators.http import require_GET, require_POST
@@ -23,14 +27,71 @@ from PIL import Image
 
 import logging
 
-from .planner import generate_string_vectors, ALGORITHMS
-from .preprocessing import load_image_to_pixels
-from .sse_logging import create_sse_logger
+from . import vector_format
+from .autotune import MODEL as AUTOTUNE_MODEL, tune
+from .checkpoints import CheckpointStore
+from .control import CancellationToken, JobCancelled
+from .costs import CostEstimate, estimate_job
+from .flights import FlightTable, run_key
+from .instrumentation import PROCESS_METRICS
+from .planner import generate_string_vectors_at, generate_string_vectors_batch, ALGORITHMS
+from .preprocessing import load_image_to_pixels, load_thumbnail
+from .renderer import render_progressive_frames, render_vector_list, preview_error, encode_animation
+from .scheduler import JobRecord, JobScheduler, QUEUED, REJECTED
+from .sse_logging import EventLog, ResultLog, create_sse_logger, ProgressThrottle
+
+# Size every uploaded image is processed (and rendered) at
+TARGET_SIZE = (200, 200)
 
 # === Per-job registries ===
 JOB_CANCEL_EVENTS: dict[str, threading.Event] = {}
+# EventLogs, so the SSE streams wake on every append instead of polling;
+# results are ResultLogs, indexing vectors and progress as they arrive
 JOB_LOGS: dict[str, list[str]] = {}
-JOB_RESULTS: dict[str, list[dict]] = {}
+JOB_RESULTS: dict[str, ResultLog] = {}
+# (algorithm, image stem) pairs whose vectors are complete
+JOB_FINISHED: dict[str, set[tuple[str, str]]] = {}
+# Whole-job state: queued, running, done, cancelled or failed
+JOB_STATE: dict[str, str] = {}
+# What each job was asked for: algorithms, image stems, nails, strings;
+# "finished_at" (time.monotonic()) once it is no longer queued or running
+JOB_META: dict[str, dict] = {}
+
+RUNNING = "running"
+DONE = "done"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+# Admits jobs against the configured memory budget
+SCHEDULER = JobScheduler(
+    memory_budget=settings.STRINGART_JOB_MEMORY_BUDGET_MB * 2 ** 20,
+    max_queued=settings.STRINGART_MAX_QUEUED_JOBS,
+)
+
+# Cost model for latency-targeted jobs, starting from a benchmark report
+# (read when the first job is tuned) and refitted from every plain run
+if settings.STRINGART_AUTOTUNE_CALIBRATION:
+    AUTOTUNE_MODEL.calibrate_on_first_use(settings.STRINGART_AUTOTUNE_CALIBRATION)
+
+# Thumbnails preview uploads, several images at once
+PREVIEW_POOL = ThreadPoolExecutor(max_workers=settings.STRINGART_PREVIEW_WORKERS, thread_name_prefix="preview")
+
+# Runs in progress, so identical runs of other jobs follow them
+FLIGHTS = FlightTable()
+
+# End-of-run solver state, keyed by (job_id, algorithm, image stem)
+CHECKPOINTS = CheckpointStore(
+    ttl=settings.STRINGART_CHECKPOINT_TTL_SECONDS,
+    max_entries=settings.STRINGART_CHECKPOINT_MAX_ENTRIES,
+)
+
+
+def _preview(data: bytes) -> str:
+    """Base64 PNG thumbnail of an uploaded image."""
+    img = load_thumbnail(data, TARGET_SIZE, max_pixels=settings.STRINGART_PREVIEW_MAX_PIXELS)
+    buf = BytesIO()
+    img.save(buf, format='PNG')
+    return base64.b64encode(buf.getvalue()).decode('ascii')
 
 
 def home(request):
@@ -38,69 +99,286 @@ def home(request):
         return render(request, 'core/home.html', {
             'algorithms': list(ALGORITHMS.keys()),
             'selected_algorithms': list(ALGORITHMS.keys()),
+            'time_budget_tiers': settings.STRINGART_TIME_BUDGET_TIERS,
         })
 
     # Preview upload
     if request.method == 'POST' and request.FILES.getlist('images') and not request.POST.get('run_algos'):
         selected = request.POST.getlist('algorithms') or list(ALGORITHMS.keys())
         selected = [a for a in selected if a in ALGORITHMS] or list(ALGORITHMS.keys())
-        uploaded = []
-        for f in request.FILES.getlist('images'):
-            data = f.read()
-            img = Image.open(BytesIO(data))
-
-            # Composite transparency over white
-            if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
-                img = img.convert("RGBA")
-                bg = Image.new("RGBA", img.size, (255, 255, 255, 255))
-                img = Image.alpha_composite(bg, img)
-
-            img = img.convert("RGB")
-            img.thumbnail((200, 200), Image.Resampling.LANCZOS)
-
-            buf = BytesIO()
-            img.save(buf, format='PNG')
-            uploaded.append({
-                'name': f.name,
-                'data': base64.b64encode(buf.getvalue()).decode('ascii')
-            })
+        files = request.FILES.getlist('images')
+        uploaded, errors = [], []
+        # Decoding and resampling release the GIL, so uploads thumbnail in parallel
+        previews = [PREVIEW_POOL.submit(_preview, f.read()) for f in files]
+        for f, preview in zip(files, previews):
+            try:
+                uploaded.append({'name': f.name, 'data': preview.result()})
+            except (OSError, ValueError, Image.DecompressionBombError) as e:
+                errors.append(f"{f.name}: {e}")
 
         return render(request, 'core/home.html', {
             'algorithms': list(ALGORITHMS.keys()),
             'selected_algorithms': selected,
-            'uploaded_images': uploaded
-        })
+            'uploaded_images': uploaded,
+            'upload_errors': errors,
+            'time_budget_tiers': settings.STRINGART_TIME_BUDGET_TIERS,
+        }, status=400 if errors and not uploaded else 200)
 
     # Kickoff job
     if request.method == 'POST' and request.POST.get('run_algos'):
-        job_id = str(uuid.uuid4())
-        cancel_ev = threading.Event()
-        JOB_CANCEL_EVENTS[job_id] = cancel_ev
-        JOB_LOGS[job_id] = []
-        JOB_RESULTS[job_id] = []
-
-        logger = create_sse_logger(job_id, JOB_LOGS)
-
         names = request.POST.getlist('image_name')
         datas = request.POST.getlist('image_data')
         files = {n: base64.b64decode(d) for n, d in zip(names, datas)}
 
-        TARGET_SIZE = (200, 200)
-        levels = int(request.POST.get('levels', 8))
-        algos = request.POST.getlist('algorithms') or list(ALGORITHMS.keys())
-        algos = [a for a in algos if a in ALGORITHMS] or list(ALGORITHMS.keys())
-        n_anchors = int(request.POST.get('n_anchors', 180))
-        n_strings = int(request.POST.get('n_strings', 200))
+        job_id, record, estimate = submit_job(files, _form_options(request.POST))
+        if record.status == REJECTED:
+            return JsonResponse(
+                {"error": f"Job rejected: {record.reason}", "estimate": estimate.as_dict()},
+                status=503,
+            )
+        return JsonResponse({"job_id": job_id, "status": record.status, "estimate": estimate.as_dict()})
+
+    return render(request, 'core/home.html', {})
+
 
-        def worker():
-            # Phase 1: grayscale-only
+@dataclass
+class JobOptions:
+    """
+    Everything a job runs with besides its images; filled from the home
+    page form (_form_options) or a JSON API request (see api.py).
+    """
+    algorithms: list[str]
+    n_anchors: int = 180
+    n_strings: int = 200
+    levels: int = 8
+    # Optional string counts (e.g. [100, 200, 400]), each reported with its
+    # error; one run to the largest serves them all where the algorithm allows
+    string_counts: list[int] = field(default_factory=list)
+    # Seconds each algorithm run may take before returning its best so far
+    time_budget: Optional[float] = None
+    # Continuous-thread winding, for algorithms that support it
+    winding: dict = field(default_factory=dict)
+    # Restrict supporting algorithms to the shared Hough candidate chords
+    hough_candidates: bool = False
+    # Chord-scoring engine, for algorithms that offer a choice
+    scoring: Optional[str] = None
+    # Overrides of each algorithm's convergence tests, or False to run
+    # every algorithm to its full length
+    stopping: Optional[dict | bool] = None
+    # Continue this earlier job's checkpoints up to the new n_strings
+    extend_job: Optional[str] = None
+    # Local-search post-pass after every algorithm
+    refine_time: Optional[float] = None
+    # Per-iteration algorithm debug output
+    debug: bool = False
+    # Grayscale and per-count preview PNGs in the results, for the web page
+    previews: bool = True
+    # Candidate chords greedy scores per string
+    sample_pairs: int = 1000
+    # Per algorithm, TUNABLES keyword arguments for its runs
+    tunables: dict = field(default_factory=dict)
+    # Seconds the whole job should take: autotune.tune then picks n_anchors,
+    # n_strings (both no higher than given), sample_pairs and tunables
+    target_latency: Optional[float] = None
+    # Share of a CPU the job counts on for target_latency; defaults to
+    # STRINGART_AUTOTUNE_CPUS
+    cpus: Optional[float] = None
+
+    def __post_init__(self):
+        self.string_counts = sorted(set(self.string_counts))
+        if self.string_counts:
+            self.n_strings = self.string_counts[-1]
+
+
+def _form_options(post) -> JobOptions:
+    """JobOptions from the home page's job form."""
+    algos = post.getlist('algorithms') or list(ALGORITHMS.keys())
+    return JobOptions(
+        algorithms=[a for a in algos if a in ALGORITHMS] or list(ALGORITHMS.keys()),
+        n_anchors=int(post.get('n_anchors', 180)),
+        n_strings=int(post.get('n_strings', 200)),
+        levels=int(post.get('levels', 8)),
+        string_counts=[int(n) for n in post.get('string_counts', '').split(',') if n.strip()],
+        time_budget=settings.STRINGART_TIME_BUDGET_TIERS.get(post.get('tier')),
+        winding={
+            'continuous': True,
+            'min_skip': int(post.get('min_skip') or 0),
+            'no_repeat': post.get('no_repeat') == '1',
+        } if post.get('continuous') == '1' else {},
+        hough_candidates=post.get('hough_candidates') == '1',
+        scoring=post.get('scoring') or None,
+        stopping=False if post.get('full_length') == '1' else None,
+        extend_job=post.get('previous_job') if post.get('extend') == '1' else None,
+        refine_time=settings.STRINGART_REFINE_SECONDS if post.get('refine') == '1' else None,
+        debug=post.get('debug') == '1',
+        target_latency=float(post['target_latency']) if post.get('autotune') == '1' else None,
+        cpus=float(post['cpus']) if post.get('autotune') == '1' and post.get('cpus') else None,
+    )
+
+
+def _autotune(opts: JobOptions, n_images: int) -> tuple[JobOptions, dict]:
+    """
+    Settings for a job with a target latency, and what was chosen. No run
+    may take longer than the whole target, whatever the model predicted.
+    """
+    tuned = tune(
+        opts.algorithms,
+        opts.target_latency,
+        cpus=opts.cpus or settings.STRINGART_AUTOTUNE_CPUS,
+        n_images=n_images,
+        size=TARGET_SIZE[0],
+        max_anchors=opts.n_anchors,
+        max_strings=opts.n_strings,
+    )
+    counts = [n for n in opts.string_counts if n < tuned.n_strings]
+    return replace(
+        opts,
+        n_anchors=tuned.n_anchors,
+        n_strings=tuned.n_strings,
+        string_counts=counts + [tuned.n_strings] if opts.string_counts else [],
+        sample_pairs=tuned.sample_pairs,
+        tunables=tuned.options,
+        time_budget=min(opts.time_budget or opts.target_latency, opts.target_latency),
+    ), tuned.as_dict()
+
+
+def submit_job(files: dict[str, bytes], opts: JobOptions) -> tuple[str, JobRecord, CostEstimate]:
+    """
+    Register a job over `files` (name → encoded image) and hand it to the
+    scheduler. Its logs, results and state are then in the per-job
+    registries under the returned job id; a rejected job's are removed again.
+    """
+    tuned = None
+    if opts.target_latency:
+        opts, tuned = _autotune(opts, len(files))
+
+    job_id = str(uuid.uuid4())
+    cancel_ev = threading.Event()
+    JOB_CANCEL_EVENTS[job_id] = cancel_ev
+    cancel_token = CancellationToken(cancel_ev)
+    JOB_LOGS[job_id] = EventLog()
+    JOB_RESULTS[job_id] = results = ResultLog()
+    JOB_FINISHED[job_id] = set()
+    JOB_STATE[job_id] = QUEUED
+    JOB_META[job_id] = {
+        "algorithms": opts.algorithms,
+        "images": [Path(name).stem for name in files],
+        "n_anchors": opts.n_anchors,
+        "n_strings": opts.n_strings,
+        "autotune": tuned,
+    }
+
+    logger = create_sse_logger(job_id, JOB_LOGS, level=logging.DEBUG if opts.debug else logging.INFO)
+    if tuned:
+        knobs = "".join(f", {algo}: " + ", ".join(f"{k}={v}" for k, v in kw.items())
+                        for algo, kw in tuned["options"].items())
+        logger.info(
+            f"Autotuned for {tuned['target_seconds']:g}s on {tuned['cpus']:g} CPU: "
+            f"{tuned['n_anchors']} anchors, {tuned['n_strings']} strings, "
+            f"sample_pairs={tuned['sample_pairs']}{knobs}; predicted {tuned['predicted_seconds']:.1f}s"
+            + ("" if tuned["fits"] else " (smallest settings; the target is too tight)")
+        )
+        JOB_RESULTS[job_id].append({"phase": "autotune", "settings": tuned})
+
+    algos = opts.algorithms
+    levels = opts.levels
+    n_anchors = opts.n_anchors
+    n_strings = opts.n_strings
+    string_counts = opts.string_counts
+    time_budget = opts.time_budget
+    winding = opts.winding
+    extend_job = opts.extend_job
+    refine_time = opts.refine_time
+
+    # runs priced the way the autotuner's cost model prices them: one run
+    # per image at n_strings, without options that change the work
+    plain_runs = not (winding or extend_job or string_counts or opts.hough_candidates or opts.scoring)
+
+    def set_state(state: str):
+        if job_id in JOB_STATE:
+            JOB_STATE[job_id] = state
+
+    def worker():
+        set_state(RUNNING)
+        try:
+            run_job()
+        except JobCancelled:
+            set_state(CANCELLED)
+            logger.info("Job cancelled.")
+        except Exception:
+            set_state(FAILED)
+            raise
+        else:
+            set_state(DONE)
+        finally:
+            if job_id in JOB_META:
+                JOB_META[job_id]["finished_at"] = time.monotonic()
+
+    def run_job():
+        # Phase 1: grayscale-only, for the page to show while algorithms run
+        if opts.previews:
             logger.info(f"=== Phase 1: grayscale-only for {len(files)} images ===")
+        for name, data in (files.items() if opts.previews else ()):
+            cancel_token.raise_if_cancelled()
+            stem = Path(name).stem
+            logger.info(f"[grayscale] {name}")
+            stream: BinaryIO = BytesIO(data)
+            pixels = load_image_to_pixels(
+                path=stream,
+                size=TARGET_SIZE,
+                levels=levels,
+                gamma=0.8,
+                autocontrast=True
+            )
+            buf = BytesIO()
+            Image.fromarray(pixels, 'L').save(buf, 'PNG')
+            JOB_RESULTS[job_id].append({
+                "phase": "grayscale",
+                "algorithm": None,
+                "name": stem,
+                "processed_image": base64.b64encode(buf.getvalue()).decode('ascii'),
+            })
+
+        # Phase 2: string-art algorithms, streaming each vector
+        for algo in algos:
+            logger.info(f"=== Phase 2: {algo} ===")
+            if (ALGORITHMS[algo].SUPPORTS_BATCH and len(files) > 1
+                    and not (winding or extend_job or string_counts or refine_time or opts.scoring)):
+                run_batch(algo)
+                continue
             for name, data in files.items():
-                if cancel_ev.is_set():
-                    logger.info("Job cancelled.")
-                    return
+                cancel_token.raise_if_cancelled()
                 stem = Path(name).stem
-                logger.info(f"[grayscale] {name}")
+                logger.info(f"[{algo}] {name}")
+
+                options = {**winding, **opts.tunables.get(algo, {})}
+                if winding and not ALGORITHMS[algo].SUPPORTS_CONTINUOUS:
+                    logger.info(f"[{algo}] Continuous thread not supported; running unconstrained")
+                    options = opts.tunables.get(algo, {})
+
+                # Identical runs already in progress are followed instead of
+                # solved again; resumed runs depend on this job's history
+                flight, leading = None, True
+                if not extend_job:
+                    flight, leading = FLIGHTS.join(run_key(
+                        data, algorithm=algo, levels=levels, n_anchors=n_anchors, n_strings=n_strings,
+                        string_counts=string_counts, options=options, sample_pairs=opts.sample_pairs,
+                        time_budget=time_budget, hough_candidates=opts.hough_candidates,
+                        scoring=opts.scoring, stopping=opts.stopping, refine_time=refine_time,
+                        previews=opts.previews,
+                    ), job_id)
+                if not leading:
+                    logger.info(f"[{algo}] Following an identical run in progress "
+                                f"({flight.subscribers} subscribers)")
+                    follow(flight, algo, stem)
+                    JOB_FINISHED[job_id].add((algo, stem))
+                    continue
+
+                def emit(result: dict):
+                    results.append(result)
+                    if flight is not None:
+                        flight.events.append(result)
+
                 stream: BinaryIO = BytesIO(data)
                 pixels = load_image_to_pixels(
                     path=stream,
@@ -109,107 +387,390 @@ def home(request):
                     gamma=0.8,
                     autocontrast=True
                 )
-                buf = BytesIO()
-                Image.fromarray(pixels, 'L').save(buf, 'PNG')
-                JOB_RESULTS[job_id].append({
-                    "phase": "grayscale",
-                    "algorithm": None,
-                    "name": stem,
-                    "processed_image": base64.b64encode(buf.getvalue()).decode('ascii'),
-                })
-
-            # Phase 2: string-art algorithms, streaming each vector
-            for algo in algos:
-                logger.info(f"=== Phase 2: {algo} ===")
-                for name, data in files.items():
-                    if cancel_ev.is_set():
-                        logger.info("Job cancelled.")
-                        return
-                    stem = Path(name).stem
-                    logger.info(f"[{algo}] {name}")
-                    stream: BinaryIO = BytesIO(data)
-                    pixels = load_image_to_pixels(
-                        path=stream,
-                        size=TARGET_SIZE,
-                        levels=levels,
-                        gamma=0.8,
-                        autocontrast=True
-                    )
 
-                    # Callback streams one vector at a time, including node count
-                    def on_vector(frm: int, to: int):
-                        JOB_RESULTS[job_id].append({
-                            "phase": "algorithm",
-                            "algorithm": algo,
-                            "name": stem,
-                            "node_count": n_anchors,
-                            "vector": {"from": frm, "to": to},
-                        })
-
-                    generate_string_vectors(
+                # Callback streams one vector at a time, including node count
+                def on_vector(frm: int, to: int):
+                    emit({
+                        "phase": "algorithm",
+                        "algorithm": algo,
+                        "name": stem,
+                        "node_count": n_anchors,
+                        "vector": {"from": frm, "to": to},
+                    })
+
+                # Structured progress: strings/sec, candidates evaluated, error,
+                # coalesced to a few updates per second. Plain runs' final
+                # events are timing samples for the autotuner's cost model
+                @ProgressThrottle
+                def on_progress(progress: dict):
+                    emit({
+                        "phase": "progress",
+                        "algorithm": algo,
+                        "name": stem,
+                        "progress": progress,
+                    })
+                    if progress.get("final") and plain_runs:
+                        AUTOTUNE_MODEL.record_progress(algo, {
+                            "n_anchors": n_anchors,
+                            "n_strings": n_strings,
+                            "size": TARGET_SIZE[0],
+                            "sample_pairs": opts.sample_pairs,
+                            **opts.tunables.get(algo, {}),
+                        }, progress)
+
+                resume = CHECKPOINTS.get((extend_job, algo, stem)) if extend_job else None
+                if extend_job and resume is None and ALGORITHMS[algo].SUPPORTS_RESUME:
+                    logger.info(f"[{algo}] No checkpoint for {name}; running from scratch")
+
+                def on_checkpoint(checkpoint):
+                    if flight is not None:
+                        flight.checkpoint = checkpoint
+                    size = CHECKPOINTS.put((job_id, algo, stem), checkpoint)
+                    logger.debug(f"[{algo}] Checkpointed {len(checkpoint.vectors)} strings ({size} bytes)")
+
+                # Refinement swaps: string `index` becomes from → to
+                def on_replace(index: int, frm: int, to: int):
+                    emit({
+                        "phase": "replace",
+                        "algorithm": algo,
+                        "name": stem,
+                        "index": index,
+                        "vector": {"from": frm, "to": to},
+                    })
+
+                # Labelled result, error and (for the page) preview per
+                # requested string count
+                def on_result(count: int, vectors: list[dict]):
+                    preview = render_vector_list(vectors, TARGET_SIZE, n_anchors=n_anchors)
+                    result = {
+                        "phase": "result",
+                        "algorithm": algo,
+                        "name": stem,
+                        "node_count": n_anchors,
+                        "n_strings": count,
+                        "strings_drawn": len(vectors),
+                        "error": preview_error(preview, pixels),
+                    }
+                    if opts.previews:
+                        buf = BytesIO()
+                        preview.save(buf, 'PNG')
+                        result["preview"] = base64.b64encode(buf.getvalue()).decode('ascii')
+                    emit(result)
+
+                # A followed run carries on while any subscriber is left
+                outcome = FAILED
+                try:
+                    generate_string_vectors_at(
                         pixels,
+                        string_counts or [n_strings],
                         n_anchors=n_anchors,
-                        n_strings=n_strings,
                         line_thickness=1,
-                        sample_pairs=1000,
+                        sample_pairs=opts.sample_pairs,
                         algorithm=algo,
                         logger=logger,
-                        vector_callback=on_vector
+                        vector_callback=on_vector,
+                        result_callback=on_result if string_counts else None,
+                        progress_callback=on_progress,
+                        time_budget=time_budget,
+                        cancel_token=CancellationToken(flight) if flight is not None else cancel_token,
+                        hough_candidates=opts.hough_candidates,
+                        scoring=opts.scoring,
+                        stopping=opts.stopping,
+                        resume=resume,
+                        checkpoint_callback=on_checkpoint,
+                        refine_time=refine_time,
+                        replace_callback=on_replace,
+                        **options
                     )
+                    outcome = DONE
+                except JobCancelled:
+                    outcome = CANCELLED
+                    raise
+                finally:
+                    if flight is not None:
+                        FLIGHTS.finish(flight, outcome)
+                # this job may have left a run its followers kept going
+                cancel_token.raise_if_cancelled()
+                JOB_FINISHED[job_id].add((algo, stem))
+
+        logger.info("Job complete.")
+
+    def follow(flight, algo: str, stem: str):
+        # Replay the run's events so far, relabelled for this job's image
+        # name, then follow it live until it ends or this job is cancelled
+        idx = 0
+        events = flight.events
+        while True:
+            cancel_token.raise_if_cancelled()
+            closed = events.closed
+            while idx < len(events):
+                results.append({**events[idx], "name": stem})
+                idx += 1
+            if closed:
+                break
+            events.wait(idx)
+        cancel_token.raise_if_cancelled()
+        if flight.outcome != DONE:
+            raise RuntimeError(f"[{algo}] The run this job followed was {flight.outcome}")
+        if flight.checkpoint is not None:
+            CHECKPOINTS.put((job_id, algo, stem), flight.checkpoint)
+
+    def run_batch(algo):
+        # Every image scored together, one matrix product per iteration
+        stems = [Path(name).stem for name in files]
+        logger.info(f"[{algo}] {len(stems)} images as one batch")
+        images = [
+            load_image_to_pixels(path=BytesIO(data), size=TARGET_SIZE, levels=levels, gamma=0.8, autocontrast=True)
+            for data in files.values()
+        ]
+
+        def on_vector(index: int, frm: int, to: int):
+            JOB_RESULTS[job_id].append({
+                "phase": "algorithm",
+                "algorithm": algo,
+                "name": stems[index],
+                "node_count": n_anchors,
+                "vector": {"from": frm, "to": to},
+            })
 
-            logger.info("Job complete.")
+        # The batch's final progress is a timing sample for each image's
+        # share of it, as the per-image runs' are for a whole run each
+        @ProgressThrottle
+        def on_progress(progress: dict):
+            for stem in stems:
+                JOB_RESULTS[job_id].append({
+                    "phase": "progress",
+                    "algorithm": algo,
+                    "name": stem,
+                    "progress": progress,
+                })
+            if progress.get("final") and plain_runs:
+                share = {**progress, "elapsed": progress["elapsed"] / len(stems)}
+                for _ in stems:
+                    AUTOTUNE_MODEL.record_progress(algo, {
+                        "n_anchors": n_anchors,
+                        "n_strings": n_strings,
+                        "size": TARGET_SIZE[0],
+                        "sample_pairs": opts.sample_pairs,
+                        **opts.tunables.get(algo, {}),
+                    }, share)
+
+        # each image's end state, so the job can be extended like any other
+        def on_checkpoint(index: int, checkpoint):
+            size = CHECKPOINTS.put((job_id, algo, stems[index]), checkpoint)
+            logger.debug(f"[{algo}] Checkpointed {len(checkpoint.vectors)} strings of {stems[index]} ({size} bytes)")
+
+        generate_string_vectors_batch(
+            images,
+            n_anchors=n_anchors,
+            n_strings=n_strings,
+            line_thickness=1,
+            sample_pairs=opts.sample_pairs,
+            algorithm=algo,
+            logger=logger,
+            vector_callback=on_vector,
+            progress_callback=on_progress,
+            # the images run in lockstep, so each one's run lasts the whole
+            # batch: the per-run budget bounds it as it bounds a single run
+            time_budget=time_budget,
+            cancel_token=cancel_token,
+            stopping=opts.stopping,
+            checkpoint_callback=on_checkpoint,
+            **opts.tunables.get(algo, {}),
+        )
+        JOB_FINISHED[job_id].update((algo, stem) for stem in stems)
+
+    estimate = estimate_job(algos, len(files), n_anchors, n_strings, TARGET_SIZE)
+    record = SCHEDULER.submit(job_id, estimate, worker, logger=logger)
+    if record.status == REJECTED:
+        discard_job(job_id)
+    elif record.status == QUEUED:
+        logger.info(f"Job queued: {record.reason}")
+    return job_id, record, estimate
+
+
+def discard_job(job_id: str) -> None:
+    """Drop a job from every per-job registry."""
+    for registry in (JOB_CANCEL_EVENTS, JOB_LOGS, JOB_RESULTS, JOB_FINISHED, JOB_STATE, JOB_META):
+        registry.pop(job_id, None)
+
+
+def cancel_job(job_id: str) -> bool:
+    """
+    Cancel a job and end its log and result streams. False if there is no
+    such job.
+    """
+    ev = JOB_CANCEL_EVENTS.get(job_id)
+    if ev is None:
+        return False
+    ev.set()
+    FLIGHTS.leave(job_id)
+    for registry in (JOB_LOGS, JOB_RESULTS):
+        events = registry.get(job_id)
+        if isinstance(events, EventLog):
+            events.close()
+    return True
+
+
+def _event_stream(request, job_id: str, events: EventLog, encode, on_end=None) -> StreamingHttpResponse:
+    """
+    SSE response sending every item of `events` as it is appended, until the
+    job is cancelled. Under ASGI the stream awaits the log's wakeups on the
+    event loop; under WSGI it blocks its worker thread on them instead.
+    """
+    cancel_ev = JOB_CANCEL_EVENTS.get(job_id)
+
+    def cancelled():
+        return cancel_ev is None or cancel_ev.is_set()
+
+    async def async_stream():
+        idx = 0
+        while not cancelled():
+            while idx < len(events):
+                yield f"data: {encode(events[idx])}\n\n".encode()
+                idx += 1
+            await events.wait_async(idx)
+        if on_end:
+            on_end()
 
-        threading.Thread(target=worker, daemon=True).start()
-        return JsonResponse({"job_id": job_id})
+    def sync_stream():
+        idx = 0
+        while not cancelled():
+            while idx < len(events):
+                yield f"data: {encode(events[idx])}\n\n".encode()
+                idx += 1
+            events.wait(idx)
+        if on_end:
+            on_end()
 
-    return render(request, 'core/home.html', {})
+    stream = async_stream() if isinstance(request, ASGIRequest) else sync_stream()
+    return StreamingHttpResponse(stream, content_type='text/event-stream')
 
 
 @require_GET
-def stream_logs(request):
+async def stream_logs(request):
     job_id = request.GET.get('job_id')
     if job_id not in JOB_LOGS:
         return HttpResponse(status=404)
-
-    def event_stream():
-        idx = 0
-        cancel_ev = JOB_CANCEL_EVENTS.get(job_id)
-        while not (cancel_ev and cancel_ev.is_set()):
-            logs = JOB_LOGS[job_id]
-            while idx < len(logs):
-                yield f"data: {logs[idx]}\n\n".encode()
-                idx += 1
-            time.sleep(0.2)
-        JOB_LOGS.pop(job_id, None)
-        JOB_CANCEL_EVENTS.pop(job_id, None)
-        JOB_RESULTS.pop(job_id, None)
-
-    return StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    return _event_stream(request, job_id, JOB_LOGS[job_id], str, on_end=lambda: discard_job(job_id))
 
 
 @require_GET
-def stream_results(request):
+async def stream_results(request):
     job_id = request.GET.get('job_id')
     if job_id not in JOB_RESULTS:
         return HttpResponse(status=404)
-
-    def event_stream():
-        idx = 0
-        cancel_ev = JOB_CANCEL_EVENTS.get(job_id)
-        while not (cancel_ev and cancel_ev.is_set()):
-            results = JOB_RESULTS[job_id]
-            while idx < len(results):
-                yield f"data: {json.dumps(results[idx])}\n\n".encode()
-                idx += 1
-            time.sleep(0.2)
-
-    return StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    return _event_stream(request, job_id, JOB_RESULTS[job_id], json.dumps)
 
 
 @require_POST
 def stop_job(request, job_id):
-    ev = JOB_CANCEL_EVENTS.get(job_id)
-    if ev:
-        ev.set()
+    if cancel_job(str(job_id)):
         return HttpResponse(status=204)
     return HttpResponse(status=404)
+
+
+@require_GET
+def metrics(request):
+    """
+    Process-wide algorithm timings and counters, job scheduler state and
+    run coalescing, in Prometheus text format.
+    """
+    return HttpResponse(
+        PROCESS_METRICS.render_prometheus() + SCHEDULER.render_prometheus() + FLIGHTS.render_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+def _result_vectors(job_id: str, algorithm: str, name: str) -> tuple[list[dict], int]:
+    """
+    Vectors streamed so far for one (algorithm, image) of a job, with any
+    refinement swaps applied, and its nail count.
+    """
+    results = JOB_RESULTS[job_id]
+    key = (algorithm, name)
+    return list(results.vectors.get(key, ())), results.node_counts.get(key, 180)
+
+
+@require_GET
+def download_vectors(request, job_id):
+    """
+    A finished (algorithm, image) result in the compact binary vector format
+    (see vector_format.py), for loading onto string-art machines.
+    """
+    job_id = str(job_id)
+    algorithm = request.GET.get('algorithm')
+    name = request.GET.get('name')
+
+    if job_id not in JOB_RESULTS:
+        return HttpResponse(status=404)
+    if (algorithm, name) not in JOB_FINISHED.get(job_id, set()):
+        return JsonResponse({"error": "Result is not finished yet"}, status=409)
+
+    vectors, n_anchors = _result_vectors(job_id, algorithm, name)
+    response = HttpResponse(
+        vector_format.dumps(vectors, n_anchors, TARGET_SIZE, algorithm),
+        content_type='application/octet-stream',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{name}-{algorithm}.sart"'
+    return response
+
+
+ANIMATION_FORMATS = {'gif': ('GIF', 'image/gif'), 'webp': ('WEBP', 'image/webp')}
+
+
+@require_GET
+def export_animation(request, job_id):
+    """
+    Build-up animation of a finished (algorithm, image) result, rendered in a
+    single pass over its vectors with one frame every `every` strings.
+
+    ?format=gif|webp returns an animated image; ?format=png streams SSE events
+    carrying only the changed region of each frame as a base64 PNG patch.
+    """
+    job_id = str(job_id)
+    algorithm = request.GET.get('algorithm')
+    name = request.GET.get('name')
+    fmt = request.GET.get('format', 'gif').lower()
+    try:
+        every = int(request.GET.get('every', 10))
+    except ValueError:
+        every = 0
+
+    if job_id not in JOB_RESULTS:
+        return HttpResponse(status=404)
+    if every < 1:
+        return JsonResponse({"error": "'every' must be an integer >= 1"}, status=400)
+    if fmt not in ANIMATION_FORMATS and fmt != 'png':
+        return JsonResponse({"error": f"Unknown format '{fmt}'"}, status=400)
+    if (algorithm, name) not in JOB_FINISHED.get(job_id, set()):
+        return JsonResponse({"error": "Result is not finished yet"}, status=409)
+
+    vectors, n_anchors = _result_vectors(job_id, algorithm, name)
+    frames = render_progressive_frames(vectors, TARGET_SIZE, n_anchors=n_anchors, every=every)
+
+    if fmt == 'png':
+        def event_stream():
+            for count, renderer in frames:
+                delta = renderer.delta()
+                if delta is None:
+                    continue
+                patch, box = delta
+                buf = BytesIO()
+                patch.save(buf, 'PNG')
+                payload = {
+                    "strings": count,
+                    "box": box,
+                    "png": base64.b64encode(buf.getvalue()).decode('ascii'),
+                }
+                yield f"data: {json.dumps(payload)}\n\n".encode()
+
+        return StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+
+    pil_format, content_type = ANIMATION_FORMATS[fmt]
+    snapshots = [renderer.snapshot() for _, renderer in frames]
+    if not snapshots:
+        return JsonResponse({"error": "Result has no vectors"}, status=404)
+    response = HttpResponse(encode_animation(snapshots, fmt=pil_format), content_type=content_type)
+    response['Content-Disposition'] = f'inline; filename="{name}-{algorithm}.{fmt}"'
+    return response
@@ -81,6 +81,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'stringart_project.wsgi.application'
+ASGI_APPLICATION = 'stringart_project.asgi.application'
 
 
 # Database
@@ -128,7 +129,63 @@ STATICFILES_DIRS = [
 ]
 
 
+# String-art algorithms are imported lazily on first use. Set to True (or a
+# list of algorithm keys) to import them at startup instead.
+STRINGART_WARMUP_ALGORITHMS = False
+
+# Scoring kernels use Numba when it is installed (STRINGART_KERNELS=numpy in
+# the environment forces the NumPy reference). Compile them at startup.
+STRINGART_WARMUP_KERNELS = True
+
+# Per-run time budgets (seconds) offered on the job form; each algorithm run
+# returns its best result so far once its tier's budget is spent. None means
+# run to completion.
+STRINGART_TIME_BUDGET_TIERS = {
+    "unlimited": None,
+    "standard": 30.0,
+    "express": 5.0,
+}
+
+# Estimated peak memory (MB) that running jobs may reserve between them.
+# Jobs that would exceed what's free wait in a queue of at most
+# STRINGART_MAX_QUEUED_JOBS; jobs estimated above the whole budget are
+# rejected. Leave room for the server process itself (~200 MB) below the
+# container's memory limit.
+STRINGART_JOB_MEMORY_BUDGET_MB = 1024
+STRINGART_MAX_QUEUED_JOBS = 8
+
+# Solver state kept after each run (of algorithms that can resume) so that
+# "extend previous run" continues it rather than recomputing. Compressed,
+# in memory, and dropped after the TTL or beyond the entry limit.
+STRINGART_CHECKPOINT_TTL_SECONDS = 1800
+STRINGART_CHECKPOINT_MAX_ENTRIES = 256
+
+# Seconds of local-search refinement after each algorithm run, when the job
+# asks for it. Most runs reach a local optimum well within this.
+STRINGART_REFINE_SECONDS = 2.0
+
+# Preview thumbnails: threads decoding uploads (shared by all requests), and
+# the most pixels one upload may decode. JPEGs decode at reduced scale, so
+# the limit mostly stops decompression bombs in other formats.
+STRINGART_PREVIEW_WORKERS = 4
+STRINGART_PREVIEW_MAX_PIXELS = 50_000_000
+
+# Most jobs one /api/v1/jobs/bulk request may submit; each is still
+# admitted or queued by the scheduler on its own.
+STRINGART_API_MAX_BULK_JOBS = 100
+
+# Seconds a finished API job's results stay available for polling before
+# the job is forgotten (checked whenever an API job is submitted).
+STRINGART_API_JOB_TTL_SECONDS = 3600
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Latency-targeted jobs (see stringart_app/autotune.py): the benchmark report
+# their cost model starts from (None for the built-in coefficients only), and
+# the share of a CPU a job counts on when it doesn't say.
+STRINGART_AUTOTUNE_CALIBRATION = BASE_DIR / 'stringart_app' / 'benchmarks' / 'calibration.json'
+STRINGART_AUTOTUNE_CPUS = 1.0